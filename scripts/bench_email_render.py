@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Email Rendering Benchmark for Operation Code Backend
+
+Measures how many emails per second can be rendered (not sent) with:
+
+- the welcome email rendered from scratch on every send (`render_to_string`)
+  versus once per process (`core.mail.render_static`)
+- the signup confirmation email compiled from source on every send versus
+  rendered from a precompiled template (`core.mail.render_template`)
+
+Usage:
+    ./scripts/bench_email_render.py
+    ./scripts/bench_email_render.py --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.template import engines  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+
+from core.mail import render_static, render_template  # noqa: E402
+
+WELCOME = ("registration/welcome.html", "registration/welcome.txt")
+CONFIRMATION = (
+    "account/email/email_confirmation_signup_message.txt",
+    "account/email/email_confirmation_message.html",
+)
+CONTEXT = {
+    "user": User(username="jo@example.com", email="jo@example.com"),
+    "activate_url": "https://operationcode.org/confirm_email?key=abc",
+    "current_site": {"name": "Operation Code", "domain": "operationcode.org"},
+    "key": "abc",
+}
+
+
+def welcome_uncached():
+    for name in WELCOME:
+        render_to_string(name)
+
+
+def welcome_static():
+    for name in WELCOME:
+        render_static(name)
+
+
+def confirmation_uncompiled():
+    backend = engines["django"]
+    for name in CONFIRMATION:
+        origin = backend.get_template(name).origin
+        backend.from_string(origin.loader.get_contents(origin)).render(CONTEXT)
+
+
+def confirmation_precompiled():
+    for name in CONFIRMATION:
+        render_template(name, CONTEXT)
+
+
+def measure(func, seconds: float) -> float:
+    func()  # warm up
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        func()
+        count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=2, help="Per benchmark")
+    args = parser.parse_args()
+
+    print(f"{'email':<40}{'emails/s':>12}")
+    for label, func in [
+        ("welcome, render_to_string", welcome_uncached),
+        ("welcome, render_static", welcome_static),
+        ("confirmation, compiled per send", confirmation_uncompiled),
+        ("confirmation, precompiled", confirmation_precompiled),
+    ]:
+        print(f"{label:<40}{measure(func, args.seconds):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
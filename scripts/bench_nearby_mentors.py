@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Nearby Mentor Search Benchmark for Operation Code Backend
+
+Measures how many nearby mentor searches per second run against 100k
+profiles spread over the continental US with:
+
+- a full scan: every mentor's coordinates read and filtered in Python, like
+  matching mentors from a dump of the table
+- a bounding box prefilter on latitude/longitude, distances in SQL
+- `core.geo.nearby_mentors`: geohash cells (an index range each) and the bounding box,
+  distances in SQL
+
+Runs in a throwaway test database of the configured engine (`DB_ENGINE`
+etc. in `.env`), so it can also compare SQLite with PostgreSQL.
+
+Usage:
+    ./scripts/bench_nearby_mentors.py
+    ./scripts/bench_nearby_mentors.py --profiles 250000 --radius 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from core import geo  # noqa: E402
+from core.models import Profile  # noqa: E402
+
+# Continental US
+LATITUDES = (24.5, 49.0)
+LONGITUDES = (-124.7, -67.0)
+BATCH_SIZE = 5000
+
+
+def create_profiles(count: int, mentor_share: float, rng: random.Random) -> None:
+    for start in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - start)
+        users = User.objects.bulk_create(
+            User(username=f"user{start + i}", password="!") for i in range(size)
+        )
+        profiles = []
+        for user in users:
+            latitude, longitude = rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)
+            profiles.append(
+                Profile(
+                    user=user,
+                    is_mentor=rng.random() < mentor_share,
+                    latitude=latitude,
+                    longitude=longitude,
+                    geohash=geo.encode(latitude, longitude),
+                )
+            )
+        Profile.objects.bulk_create(profiles)
+
+
+def full_scan(latitude: float, longitude: float, radius: float) -> list:
+    mentors = Profile.objects.filter(is_mentor=True).values_list(
+        "pk", "latitude", "longitude"
+    )
+    found = []
+    for pk, lat, lon in mentors:
+        distance = geo.distance(latitude, longitude, lat, lon)
+        if distance <= radius:
+            found.append((distance, pk))
+    return [pk for _, pk in sorted(found)]
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> list:
+    box = geo.bounding_box(latitude, longitude, radius)
+    return list(
+        Profile.objects.filter(geo.in_box(box), is_mentor=True)
+        .annotate(distance=geo.distance_expression(latitude, longitude))
+        .filter(distance__lte=radius)
+        .order_by("distance", "pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def geohash(latitude: float, longitude: float, radius: float) -> list:
+    mentors = geo.nearby_mentors(Profile.objects.all(), latitude, longitude, radius)
+    return list(mentors.values_list("pk", flat=True))
+
+
+SEARCHES = {"full scan": full_scan, "bounding box": bounding_box, "geohash": geohash}
+
+
+def measure(search, points: list, radius: float) -> tuple:
+    found = 0
+    start = time.perf_counter()
+    for latitude, longitude in points:
+        found += len(search(latitude, longitude, radius))
+    elapsed = time.perf_counter() - start
+    return len(points) / elapsed, found / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument("--mentor-share", type=float, default=0.1)
+    parser.add_argument("--searches", type=int, default=50, help="Per method")
+    parser.add_argument("--radius", type=float, default=25, help="In miles")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"database: {connection.vendor}, creating {args.profiles} profiles")
+        create_profiles(args.profiles, args.mentor_share, rng)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE profile")
+
+        points = [
+            (rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES))
+            for _ in range(args.searches)
+        ]
+        print(f"{'search':<14}{'searches/s':>12}{'mentors found':>15}")
+        for name, search in SEARCHES.items():
+            rate, found = measure(search, points, args.radius)
+            print(f"{name:<14}{rate:>12.1f}{found:>15.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
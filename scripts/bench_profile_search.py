@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Profile Search Benchmark for Operation Code Backend
+
+Measures the latency of profile searches against 100k profiles with:
+
+- `icontains`: every word looked up with `LIKE '%word%'` in each searched
+  column, like `ProfileAdmin.search_fields` over names, email, company, MOS
+  and bio would
+- `core.search.search_profiles`: the full-text index (FTS5 on SQLite, a GIN
+  indexed tsvector on PostgreSQL), ranked
+
+Each search counts its results and reads the first page (20 profiles), best
+first for the full-text search, like the search API and the admin. Searches
+are for a name, an email, a company and role, and two words of bios, which
+match a handful, a single, thousands and most profiles. Also reports how long
+rebuilding the index takes.
+
+Runs in a throwaway test database of the configured engine (`DB_ENGINE`
+etc. in `.env`), so it can also compare SQLite with PostgreSQL.
+
+Usage:
+    ./scripts/bench_profile_search.py
+    ./scripts/bench_profile_search.py --profiles 250000 --searches 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from functools import reduce
+from operator import and_, or_
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from core import search  # noqa: E402
+from core.models import Profile  # noqa: E402
+
+BATCH_SIZE = 5000
+PAGE_SIZE = 20
+
+FIRST_NAMES = [
+    "james",
+    "maria",
+    "robert",
+    "linda",
+    "michael",
+    "aisha",
+    "david",
+    "elena",
+    "william",
+    "sofia",
+    "joseph",
+    "grace",
+    "thomas",
+    "nadia",
+    "charles",
+    "yuki",
+    "daniel",
+    "fatima",
+    "matthew",
+    "olivia",
+]
+# Last names are made of two of these, ~900 of them
+SYLLABLES = [
+    "al",
+    "ber",
+    "cas",
+    "dor",
+    "el",
+    "fen",
+    "gar",
+    "hol",
+    "is",
+    "jor",
+    "kel",
+    "lan",
+    "mor",
+    "nor",
+    "ol",
+    "par",
+    "quin",
+    "ros",
+    "sen",
+    "tor",
+    "ul",
+    "val",
+    "wes",
+    "yor",
+    "zan",
+    "bri",
+    "cor",
+    "dal",
+    "fer",
+    "ham",
+]
+COMPANIES = [
+    "acme",
+    "globex",
+    "initech",
+    "umbrella",
+    "hooli",
+    "stark",
+    "wayne",
+    "wonka",
+    "cyberdyne",
+    "soylent",
+]
+ROLES = [
+    "backend engineer",
+    "frontend developer",
+    "data analyst",
+    "devops engineer",
+    "product manager",
+    "security engineer",
+]
+SPECIALTIES = [
+    "infantry",
+    "cyber operations specialist",
+    "signal support",
+    "intelligence analyst",
+    "logistics",
+    "aviation mechanic",
+]
+BIO_WORDS = [
+    "python",
+    "javascript",
+    "react",
+    "django",
+    "kubernetes",
+    "cloud",
+    "mentor",
+    "veteran",
+    "learning",
+    "career",
+    "transition",
+    "security",
+    "networks",
+    "databases",
+    "teaching",
+    "startup",
+    "open",
+    "source",
+]
+
+SEARCHED_FIELDS = [
+    "user__first_name",
+    "user__last_name",
+    "user__email",
+    "company_name",
+    "company_role",
+    "military_occupational_specialty",
+    "bio",
+]
+
+
+def create_profiles(count: int, rng: random.Random) -> None:
+    for start in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - start)
+        users = []
+        for i in range(size):
+            first = rng.choice(FIRST_NAMES)
+            last = "".join(rng.choices(SYLLABLES, k=2))
+            users.append(
+                User(
+                    username=f"user{start + i}",
+                    password="!",
+                    first_name=first.title(),
+                    last_name=last.title(),
+                    email=f"{first}.{last}{start + i}@example.com",
+                )
+            )
+        users = User.objects.bulk_create(users)
+        Profile.objects.bulk_create(
+            Profile(
+                user=user,
+                company_name=rng.choice(COMPANIES).title(),
+                company_role=rng.choice(ROLES).title(),
+                military_occupational_specialty=rng.choice(SPECIALTIES).title(),
+                bio=" ".join(rng.choices(BIO_WORDS, k=20)),
+            )
+            for user in users
+        )
+
+
+def queries(kind: str, count: int, rng: random.Random) -> list:
+    if kind == "company":
+        return [
+            f"{rng.choice(COMPANIES)} {rng.choice(ROLES).split()[0]}"
+            for _ in range(count)
+        ]
+    if kind == "bio":
+        return [" ".join(rng.sample(BIO_WORDS, 2)) for _ in range(count)]
+
+    users = User.objects.order_by("?").values_list("first_name", "last_name", "email")
+    if kind == "name":
+        return [f"{first} {last}" for first, last, _ in users[:count]]
+    return [email for _, _, email in users[:count]]
+
+
+def icontains(query: str) -> list:
+    words = search.terms(query)
+    condition = reduce(
+        and_,
+        (
+            reduce(
+                or_, (Q(**{f"{field}__icontains": word}) for field in SEARCHED_FIELDS)
+            )
+            for word in words
+        ),
+    )
+    profiles = Profile.objects.filter(condition).order_by("pk")
+    return profiles.count(), list(profiles.values_list("pk", flat=True)[:PAGE_SIZE])
+
+
+def full_text(query: str) -> list:
+    profiles = search.search_profiles(Profile.objects.all(), query)
+    page = profiles.order_by("-rank", "pk").values_list("pk", flat=True)[:PAGE_SIZE]
+    return profiles.count(), list(page)
+
+
+SEARCHES = {"icontains": icontains, "full text": full_text}
+QUERY_KINDS = ["name", "email", "company", "bio"]
+
+
+def measure(search_func, queries: list) -> tuple:
+    latencies = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        found += search_func(query)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return statistics.median(latencies), p95, found / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", type=int, default=100_000)
+    parser.add_argument(
+        "--searches", type=int, default=50, help="Per kind of query and method"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"database: {connection.vendor}, creating {args.profiles} profiles")
+        create_profiles(args.profiles, rng)
+        start = time.perf_counter()
+        search.rebuild()
+        print(f"index rebuilt in {time.perf_counter() - start:.1f}s")
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE profile")
+
+        print(f"{'query':<10}{'search':<12}{'p50 ms':>10}{'p95 ms':>10}{'found':>10}")
+        for kind in QUERY_KINDS:
+            kind_queries = queries(kind, args.searches, rng)
+            for name, search_func in SEARCHES.items():
+                p50, p95, found = measure(search_func, kind_queries)
+                print(f"{kind:<10}{name:<12}{p50:>10.2f}{p95:>10.2f}{found:>10.0f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Task Broker Benchmark for Operation Code Backend
+
+Measures how many queued tasks per second 1, 4 and 16 worker processes
+dequeue and acknowledge with:
+
+- django-q's ORM broker, which polls the queue table and races other
+  workers for the same rows
+- `core.brokers.PostgresBroker`, which claims rows with SKIP LOCKED
+
+Run it against the database in `.env` (`DB_ENGINE` etc.); on SQLite both
+brokers behave the same. Tasks are no-ops, so this is broker overhead only.
+
+Usage:
+    ./scripts/bench_task_broker.py
+    ./scripts/bench_task_broker.py --tasks 5000 --workers 1 4 16 --bulk 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django import db  # noqa: E402
+from django.db import OperationalError  # noqa: E402
+from django_q.brokers.orm import ORM  # noqa: E402
+from django_q.conf import Conf  # noqa: E402
+from django_q.models import OrmQ  # noqa: E402
+
+from core.brokers import PostgresBroker  # noqa: E402
+
+QUEUE = "benchmark"
+BROKERS = {"orm": ORM, "skip-locked": PostgresBroker}
+
+
+def work(broker_class, done, stop) -> None:
+    db.connections.close_all()  # Don't share the parent's connection
+    broker = broker_class(list_key=QUEUE)
+    while not stop.is_set():
+        try:
+            tasks = broker.dequeue() or []
+            for task_id, _ in tasks:
+                broker.acknowledge(task_id)
+        except OperationalError:  # SQLite: database is locked
+            continue
+        with done.get_lock():
+            done.value += len(tasks)
+
+
+def measure(broker_class, workers: int, tasks: int) -> float:
+    OrmQ.objects.filter(key=QUEUE).delete()
+    broker = broker_class(list_key=QUEUE)
+    for i in range(tasks):
+        broker.enqueue(f"task {i}")
+    db.connections.close_all()
+
+    done = multiprocessing.Value("i", 0)
+    stop = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=work, args=(broker_class, done, stop))
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    while done.value < tasks:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for process in processes:
+        # Idle workers may be waiting for a notification
+        process.join(0.5)
+        process.terminate()
+    return tasks / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=2000, help="Per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument(
+        "--bulk", type=int, default=Conf.BULK, help="Tasks dequeued at once"
+    )
+    args = parser.parse_args()
+    Conf.BULK = args.bulk
+
+    print(f"database: {db.connection.vendor}, bulk: {Conf.BULK}")
+    print(f"{'broker':<14}{'workers':>8}{'tasks/s':>12}")
+    for name, broker_class in BROKERS.items():
+        for workers in args.workers:
+            rate = measure(broker_class, workers, args.tasks)
+            print(f"{name:<14}{workers:>8}{rate:>12.0f}")
+    OrmQ.objects.filter(key=QUEUE).delete()
+
+
+if __name__ == "__main__":
+    main()
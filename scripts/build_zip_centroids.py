@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Builds the zip code centroid index used by `core.zipcodes`
+
+Reads the Census Bureau's ZCTA Gazetteer file (public domain, tab separated,
+with the GEOID, INTPTLAT and INTPTLONG columns), plain or zipped, from a path
+or downloaded from its URL, and writes `src/core/data/zip_centroids.bin`.
+
+Downloads must match the SHA-256 given with `--sha256` (the Docker build
+passes the pinned `GAZETTEER_SHA256`), so a changed or corrupt file fails the
+build instead of silently changing the index.
+
+Usage:
+    ./scripts/build_zip_centroids.py --sha256 <sha256 of the zip>
+    ./scripts/build_zip_centroids.py --source 2023_Gaz_zcta_national.txt
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import sys
+import urllib.request
+import zipfile
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from core.zipcodes import write_index  # noqa: E402
+
+GAZETTEER_URL = (
+    "https://www2.census.gov/geo/docs/maps-data/data/gazetteer/"
+    "2023_Gazetteer/2023_Gaz_zcta_national.zip"
+)
+OUTPUT = SRC / "core" / "data" / "zip_centroids.bin"
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def read_source(source: str, sha256: str = None) -> str:
+    if is_url(source):
+        with urllib.request.urlopen(source, timeout=60) as res:  # nosec
+            data = res.read()
+    else:
+        data = Path(source).read_bytes()
+
+    digest = hashlib.sha256(data).hexdigest()
+    if sha256 and digest != sha256.lower():
+        raise SystemExit(f"{source} doesn't match SHA-256 {sha256} (got {digest})")
+
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            [name] = [n for n in archive.namelist() if n.endswith(".txt")]
+            data = archive.read(name)
+    return data.decode("utf-8-sig")
+
+
+def parse_gazetteer(text: str):
+    rows = csv.DictReader(io.StringIO(text), delimiter="\t")
+    for row in rows:
+        row = {key.strip(): value.strip() for key, value in row.items()}
+        yield int(row["GEOID"]), float(row["INTPTLAT"]), float(row["INTPTLONG"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--source", default=GAZETTEER_URL, help="Path or URL")
+    parser.add_argument(
+        "--sha256", help="Expected SHA-256 of the source, required for URLs"
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT)
+    args = parser.parse_args()
+    if is_url(args.source) and not args.sha256:
+        parser.error("--sha256 is required to download the source")
+
+    text = read_source(args.source, args.sha256)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    count = write_index(args.output, parse_gazetteer(text))
+    size = args.output.stat().st_size
+    print(f"Wrote {count} zip codes to {args.output} ({size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
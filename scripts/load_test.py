@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Load Test Script for Operation Code Backend
+
+Logs in concurrently while polling the user/profile endpoints, and reports
+throughput and latency percentiles per endpoint. Used to compare gunicorn
+worker profiles, e.g.:
+
+    gunicorn operationcode_backend.wsgi -c gunicorn_config.py
+    gunicorn operationcode_backend.asgi -c gunicorn_asgi_config.py
+
+Usage:
+    ./scripts/load_test.py EMAIL PASSWORD                      # localhost:8000
+    ./scripts/load_test.py EMAIL PASSWORD --url http://host:8000 \\
+        --concurrency 16 --duration 30
+
+Only uses the standard library.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+
+def request(url, data=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as res:  # nosec
+            return res.status, res.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def login(base_url, email, password):
+    status, body = request(
+        f"{base_url}/auth/login/", {"email": email, "password": password}
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed ({status}): {body[:200]!r}")
+    return json.loads(body)["token"]
+
+
+def worker(base_url, email, password, token, deadline, login_ratio, results, lock):
+    i = 0
+    while time.monotonic() < deadline:
+        i += 1
+        if login_ratio and i % login_ratio == 0:
+            name = "POST /auth/login/"
+            url, data, auth = (
+                f"{base_url}/auth/login/",
+                {"email": email, "password": password},
+                None,
+            )
+        else:
+            path = "/auth/user/" if i % 2 else "/auth/profile/"
+            name = f"GET {path}"
+            url, data, auth = f"{base_url}{path}", None, token
+
+        start = time.perf_counter()
+        status, _ = request(url, data, auth)
+        elapsed = time.perf_counter() - start
+        with lock:
+            results[name].append((status, elapsed))
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("email")
+    parser.add_argument("password")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument(
+        "--login-ratio",
+        type=int,
+        default=5,
+        help="Every Nth request of each client is a login (0 disables logins)",
+    )
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    token = login(base_url, args.email, args.password)
+    results = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(
+                base_url,
+                args.email,
+                args.password,
+                token,
+                deadline,
+                args.login_ratio,
+                results,
+                lock,
+            ),
+        )
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.concurrency} clients for {args.duration:.0f}s against {base_url}")
+    print(
+        f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    total = 0
+    for name, samples in sorted(results.items()):
+        latencies = sorted(elapsed for _, elapsed in samples)
+        errors = sum(1 for status, _ in samples if status >= 400)
+        total += len(samples)
+        print(
+            f"{name:<22}{len(samples):>9}{errors:>8}"
+            f"{len(samples) / args.duration:>9.1f}"
+            f"{statistics.median(latencies) * 1000:>9.1f}"
+            f"{percentile(latencies, 95) * 1000:>9.1f}"
+            f"{percentile(latencies, 99) * 1000:>9.1f}"
+        )
+    print(f"{'total':<22}{total:>9}{'':>8}{total / args.duration:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from rest_framework.request import Request
 
+from core import zipcodes
 from core.serializers import RegisterSerializer
 
 
@@ -26,10 +27,14 @@ class AccountAdapter(DefaultAccountAdapter):
         commit: bool = True,
     ) -> User:
         """
-        Adds the provided zip code to the profile attached
-        to the newly created user
+        Adds the provided zip code, and the coordinates of its center, to the
+        profile attached to the newly created user
         """
         super().save_user(request, user, form)
-        user.profile.zipcode = form.cleaned_data["zipcode"]
-        user.profile.save()
+        profile = user.profile
+        profile.zipcode = form.cleaned_data["zipcode"]
+        coordinates = zipcodes.locate(profile.zipcode)
+        if coordinates is not None:
+            profile.latitude, profile.longitude = coordinates
+        profile.save()
         return user
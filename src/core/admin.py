@@ -1,8 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
-from .models import Profile
+from . import dead_letters, search, tags
+from .models import DeadLetter, Profile, Tag
 
 admin.site.unregister(User)
 
@@ -34,4 +35,53 @@ class ProfileAdmin(admin.ModelAdmin):
         "branch_of_service",
         "created_at",
     )
+    # Only shows the search box, see `get_search_results`
     search_fields = ("user__email",)
+    search_help_text = "Names, emails, companies, MOS and bios"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search.search_profiles(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        tags.sync_tags(obj, tags.TAG_FIELDS.keys() & set(form.changed_data))
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ("name", "kind")
+    list_filter = ("kind",)
+    search_fields = ("name",)
+
+
+@admin.register(DeadLetter)
+class DeadLetterAdmin(admin.ModelAdmin):
+    list_display = ("task", "args", "attempts", "created_at", "failed_at")
+    list_filter = ("task", "failed_at")
+    search_fields = ("args",)
+    readonly_fields = (
+        "task",
+        "args",
+        "kwargs",
+        "error",
+        "attempts",
+        "fingerprint",
+        "created_at",
+        "failed_at",
+    )
+    actions = ["replay"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Replay selected tasks")
+    def replay(self, request, queryset):
+        result = dead_letters.replay(queryset.order_by("pk"))
+        level = messages.WARNING if result.failed else messages.SUCCESS
+        self.message_user(
+            request,
+            f"{result.succeeded} tasks succeeded, {result.failed} failed again",
+            level,
+        )
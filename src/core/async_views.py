@@ -0,0 +1,61 @@
+"""
+Async entry points for the hot authentication views, used when the app is
+served over ASGI (see `operationcode_backend/asgi.py`).
+
+DRF views are synchronous, and under ASGI Django runs every sync view on a
+single thread per worker, so one ~250ms Argon2 verification stalls every
+other request. `offload` wraps a view in an async view that runs it on a
+bounded thread pool instead: the event loop stays free, and concurrency (and
+with it the number of open database connections) is capped by
+`ASYNC_VIEW_THREADS`. Argon2 releases the GIL while hashing, so logins on
+different threads genuinely run in parallel.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, HttpResponse
+
+# Threads are started lazily on first use, so this is safe with `preload_app`
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix="async-view"
+)
+
+
+def _run_view(view: Callable, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+    try:
+        response = view(request, *args, **kwargs)
+        # Render here too, so serialization doesn't land on the event loop
+        if hasattr(response, "render") and callable(response.render):
+            response.render()
+        return response
+    finally:
+        # Executor threads outlive requests; don't let their connections leak
+        close_old_connections()
+
+
+def offload(view: Callable) -> Callable:
+    """
+    Wraps a sync view in an async view that runs it on the bounded `executor`
+    """
+
+    @functools.wraps(view)
+    async def async_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(_run_view, view, request, *args, **kwargs)
+        )
+
+    return async_view
+
+
+def async_view(view: Callable) -> Callable:
+    """
+    Returns the offloaded version of `view` when `ASYNC_VIEWS` is enabled (the
+    ASGI entry point turns it on), and `view` unchanged otherwise
+    """
+    return offload(view) if settings.ASYNC_VIEWS else view
@@ -0,0 +1,256 @@
+"""
+Authentication classes for the REST API.
+"""
+
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import LRUCache
+
+# Model attribute -> claim added by `CustomTokenObtainPairSerializer.get_token`
+USER_CLAIMS = {"email": "email", "first_name": "firstName", "last_name": "lastName"}
+PROFILE_CLAIMS = {"zipcode": "zipcode", "is_mentor": "isMentor"}
+
+
+class UserState(NamedTuple):
+    """
+    The parts of a `User` row that can lock an account out, or elevate it,
+    after its token was issued
+    """
+
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    password_hash: str
+
+
+# Maps user ids -> `UserState`. Invalidated on `User` saves/deletes by the
+# receivers in `core.handlers`; the TTL bounds how long a change made by
+# another process takes to lock a user out.
+user_state_cache = LRUCache(
+    maxsize=settings.JWT_USER_STATE_CACHE_SIZE, ttl=settings.JWT_USER_STATE_TTL
+)
+
+
+def get_user_state(user_id: int) -> Optional[UserState]:
+    """
+    Returns the cached `UserState` for the given user id, or `None` if the
+    user no longer exists
+    """
+    state = user_state_cache.get(user_id)
+    if state is not None:
+        return state
+
+    row = (
+        User.objects.filter(pk=user_id)
+        .values_list("is_active", "is_staff", "is_superuser", "password")
+        .first()
+    )
+    if row is None:
+        return None
+
+    is_active, is_staff, is_superuser, password = row
+    password_hash = (
+        get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else ""
+    )
+    state = UserState(is_active, is_staff, is_superuser, password_hash)
+    user_state_cache.set(user_id, state)
+    return state
+
+
+def invalidate_user_state(*user_ids: int) -> None:
+    """
+    Drops the cached state for the given users, or for every user when no ids
+    are given
+    """
+    if not user_ids:
+        user_state_cache.clear()
+        return
+
+    for user_id in user_ids:
+        user_state_cache.delete(user_id)
+
+
+class ClaimsUser:
+    """
+    Lazy stand-in for `User` backed by the claims of a validated access token.
+
+    Reads of claim-backed attributes (see `USER_CLAIMS`) are answered from the
+    token. Any other attribute read, method call or attribute write loads the
+    real `User` (with its profile joined) exactly once and is forwarded to it.
+    After that the model instance is authoritative, so writes are never
+    shadowed by stale claims.
+    """
+
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, token: Token, state: UserState):
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        object.__setattr__(self, "token", token)
+        object.__setattr__(self, "state", state)
+        object.__setattr__(self, "id", user_id)
+        object.__setattr__(self, "pk", user_id)
+
+    @cached_property
+    def _user(self) -> User:
+        return User.objects.select_related("profile").get(pk=self.pk)
+
+    @property
+    def is_loaded(self) -> bool:
+        return "_user" in self.__dict__
+
+    @property
+    def is_active(self) -> bool:
+        return self.state.is_active
+
+    @property
+    def is_staff(self) -> bool:
+        return self.state.is_staff
+
+    @property
+    def is_superuser(self) -> bool:
+        return self.state.is_superuser
+
+    @cached_property
+    def _claims_profile(self) -> "ClaimsProfile":
+        return ClaimsProfile(self)
+
+    @property
+    def profile(self):
+        if self.is_loaded:
+            return self._user.profile
+        return self._claims_profile
+
+    def claim(self, attr: str, claims: dict) -> Any:
+        """
+        Returns the claim backing `attr`, raising `KeyError` when the token
+        doesn't carry it or the real instance has already been loaded
+        """
+        if self.is_loaded or attr not in claims or claims[attr] not in self.token:
+            raise KeyError(attr)
+        return self.token[claims[attr]]
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+
+        try:
+            return self.claim(attr, USER_CLAIMS)
+        except KeyError:
+            return getattr(self._user, attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._user, attr, value)
+
+    def __eq__(self, other: object) -> bool:
+        return getattr(other, "pk", None) == self.pk and isinstance(
+            other, (ClaimsUser, User)
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.pk)
+
+    def __str__(self) -> str:
+        return str(self._user)
+
+
+class ClaimsProfile:
+    """
+    Lazy stand-in for the `Profile` of a `ClaimsUser`, answering the claims
+    listed in `PROFILE_CLAIMS` and forwarding everything else to the real
+    profile
+    """
+
+    def __init__(self, owner: ClaimsUser):
+        object.__setattr__(self, "_owner", owner)
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+
+        try:
+            return self._owner.claim(attr, PROFILE_CLAIMS)
+        except KeyError:
+            return getattr(self._owner._user.profile, attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._owner._user.profile, attr, value)
+
+    def __str__(self) -> str:
+        return str(self._owner._user.profile)
+
+
+class ProfileUsers:
+    """
+    Stands in for the user model in simplejwt's `get_user`, which only uses
+    its `objects` and `DoesNotExist`, with `objects` loading the profile too
+    """
+
+    def __init__(self, model: type):
+        self.objects = model.objects.select_related("profile")
+        self.DoesNotExist = model.DoesNotExist
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    simplejwt's `JWTAuthentication`, loading the user's `Profile` in the same
+    query so views and serializers reading `request.user.profile` don't issue
+    a second one
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = ProfileUsers(self.user_model)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Opt-in alternative to simplejwt's `JWTAuthentication` that doesn't load
+    the `User` row on every request.
+
+    Returns a `ClaimsUser` built from the token claims. Locked or deleted
+    accounts and (when `CHECK_REVOKE_TOKEN` is on) password changes are still
+    enforced through the short-lived `user_state_cache`.
+    """
+
+    def get_user(self, validated_token: Token) -> ClaimsUser:
+        try:
+            # simplejwt serializes the id claim as a string
+            user_id = User._meta.pk.to_python(
+                validated_token[api_settings.USER_ID_CLAIM]
+            )
+        except KeyError as e:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            ) from e
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not state.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != state.password_hash
+        ):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+
+        return ClaimsUser(validated_token, state)
@@ -0,0 +1,220 @@
+"""
+Batches the side effects of signups (welcome email, slack invite, mailing
+list subscription), so a burst of registrations costs a handful of calls to
+Mandrill, PyBot and Mailchimp instead of one call per user.
+
+`enqueue` stores the side effect as a `PendingSideEffect` row, inside the
+signup's transaction. A batch is flushed by a background task as soon as
+`SIDE_EFFECT_BATCH_SIZE` rows of a kind are waiting, or at most
+`SIDE_EFFECT_BATCH_DELAY` seconds after the first one was queued.
+
+A flush claims a batch in a short transaction and sends it after committing,
+so no row locks are held while Mandrill, PyBot or Mailchimp are called.
+Claims older than `SIDE_EFFECT_CLAIM_TIMEOUT` seconds (a flush that died)
+are claimed again. Rows are only deleted once they were sent; batch tasks
+raise `BatchFailed` with the emails that failed, so only those are retried,
+and moved to the dead letters (see `core.dead_letters`) after
+`SIDE_EFFECT_MAX_ATTEMPTS` failures.
+
+Side effects already queued for an email within `SIDE_EFFECT_DEDUP_TTL`
+seconds are dropped by `enqueue` (see `core.idempotency`).
+
+Flushes run on the queue of their kind (see `core.queues`): welcome emails
+and slack invites are time-sensitive, mailing list syncs are not.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_q.models import Schedule
+from django_q.tasks import async_task, schedule
+
+from core import dead_letters, idempotency, metrics
+from core.models import PendingSideEffect
+from core.queues import BULK, CRITICAL
+
+logger = logging.getLogger(__name__)
+
+WELCOME_EMAIL = "welcome_email"
+SLACK_INVITE = "slack_invite"
+MAILING_LIST = "mailing_list"
+
+# Task that sends a batch of each kind; each takes a list of emails, and
+# raises `BatchFailed` if some of them failed
+BATCH_TASKS = {
+    WELCOME_EMAIL: "core.tasks.send_welcome_emails",
+    SLACK_INVITE: "core.tasks.send_slack_invites",
+    MAILING_LIST: "core.tasks.add_users_to_mailing_list",
+}
+
+# Queue the flush of each kind runs on
+BATCH_QUEUES = {
+    WELCOME_EMAIL: CRITICAL,
+    SLACK_INVITE: CRITICAL,
+    MAILING_LIST: BULK,
+}
+
+
+class BatchFailed(Exception):
+    """
+    Some side effects of a batch failed. `failed` maps their emails to why
+    """
+
+    def __init__(self, failed: Dict[str, str]):
+        self.failed = failed
+        super().__init__(
+            "; ".join(f"{email}: {reason}" for email, reason in failed.items())
+        )
+
+
+def enqueue(kind: str, email: str) -> bool:
+    """
+    Queues a side effect for `email`, to be sent with the next batch. Returns
+    False if it was dropped as a duplicate
+    """
+    key = idempotency.make_key(BATCH_TASKS[kind], email)
+    if not idempotency.claim(key, settings.SIDE_EFFECT_DEDUP_TTL):
+        logger.info(f"Dropped duplicate {kind} for {email}")
+        metrics.increment(f"batching.{kind}.duplicate")
+        return False
+
+    PendingSideEffect.objects.create(kind=kind, email=email)
+    transaction.on_commit(lambda: schedule_flush(kind))
+    return True
+
+
+def scheduled_key(kind: str) -> str:
+    return f"batching:{kind}:scheduled"
+
+
+def queued_key(kind: str) -> str:
+    return f"batching:{kind}:queued"
+
+
+def schedule_flush(kind: str) -> None:
+    """
+    Flushes right away once a batch is full, otherwise makes sure a flush is
+    scheduled within `SIDE_EFFECT_BATCH_DELAY`
+    """
+    if PendingSideEffect.objects.filter(kind=kind).count() >= (
+        settings.SIDE_EFFECT_BATCH_SIZE
+    ):
+        # One queued flush drains every full batch
+        if cache.add(queued_key(kind), True, timeout=settings.SIDE_EFFECT_BATCH_DELAY):
+            async_task("core.batching.flush", kind, cluster=BATCH_QUEUES[kind])
+    else:
+        delay_flush(kind)
+
+
+def delay_flush(kind: str) -> None:
+    """
+    Schedules a flush `SIDE_EFFECT_BATCH_DELAY` seconds from now, unless one
+    is already scheduled
+    """
+    delay = settings.SIDE_EFFECT_BATCH_DELAY
+    # Only the first side effect of a batch creates the schedule
+    if cache.add(scheduled_key(kind), True, timeout=delay):
+        schedule(
+            "core.batching.flush",
+            kind,
+            name=f"flush {kind} {timezone.now().isoformat()}",
+            schedule_type=Schedule.ONCE,
+            next_run=timezone.now() + timedelta(seconds=delay),
+            cluster=BATCH_QUEUES[kind],
+        )
+
+
+def give_up(kind: str, batch: List[PendingSideEffect], error: Exception) -> None:
+    """
+    Counts a failed attempt for the side effects of `batch` (only the ones
+    that failed), releases them to be retried, and moves the ones that failed
+    `SIDE_EFFECT_MAX_ATTEMPTS` times to the dead letters, one per email
+    """
+    PendingSideEffect.objects.filter(
+        id__in=[side_effect.id for side_effect in batch]
+    ).update(attempts=F("attempts") + 1, claimed_at=None)
+
+    exhausted = [
+        side_effect
+        for side_effect in batch
+        if side_effect.attempts + 1 >= settings.SIDE_EFFECT_MAX_ATTEMPTS
+    ]
+    for side_effect in exhausted:
+        if isinstance(error, BatchFailed):
+            # Only why this email failed, not the rest of the batch
+            email = side_effect.email
+            email_error = BatchFailed({email: error.failed.get(email, str(error))})
+        else:
+            email_error = error
+        dead_letters.record(BATCH_TASKS[kind], [[side_effect.email]], None, email_error)
+    PendingSideEffect.objects.filter(
+        id__in=[side_effect.id for side_effect in exhausted]
+    ).delete()
+
+
+def claim(kind: str) -> List[PendingSideEffect]:
+    """
+    Claims the next batch of side effects of `kind` that no other flush is
+    sending
+    """
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=settings.SIDE_EFFECT_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        batch = list(
+            PendingSideEffect.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at=None) | Q(claimed_at__lt=abandoned), kind=kind)
+            .order_by("id")[: settings.SIDE_EFFECT_BATCH_SIZE]
+        )
+        PendingSideEffect.objects.filter(
+            id__in=[side_effect.id for side_effect in batch]
+        ).update(claimed_at=now)
+    return batch
+
+
+def flush(kind: str) -> int:
+    """
+    Sends every pending side effect of `kind`, one batch of at most
+    `SIDE_EFFECT_BATCH_SIZE` at a time. Returns how many were sent
+    """
+    cache.delete_many([scheduled_key(kind), queued_key(kind)])
+    idempotency.purge()
+    send_batch = import_string(BATCH_TASKS[kind])
+
+    sent = 0
+    while True:
+        batch = claim(kind)
+        if not batch:
+            return sent
+
+        emails = [side_effect.email for side_effect in batch]
+        try:
+            send_batch(emails)
+        except BatchFailed as e:
+            logger.warning(f"Sending {len(e.failed)} {kind} failed, retrying later")
+            failed, error = e.failed, e
+        except Exception as e:
+            logger.exception(f"Sending a batch of {kind} failed, retrying later")
+            failed, error = dict.fromkeys(emails, str(e)), e
+        else:
+            failed, error = {}, None
+
+        done = [side_effect for side_effect in batch if side_effect.email not in failed]
+        PendingSideEffect.objects.filter(
+            id__in=[side_effect.id for side_effect in done]
+        ).delete()
+        sent += len(done)
+
+        if failed:
+            retried = [
+                side_effect for side_effect in batch if side_effect.email in failed
+            ]
+            give_up(kind, retried, error)
+            delay_flush(kind)
+            return sent
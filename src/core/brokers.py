@@ -0,0 +1,135 @@
+"""
+django-q broker for PostgreSQL.
+
+Same table and semantics as django-q's ORM broker (a task is locked for
+`retry` seconds when dequeued and deleted when acknowledged), with two
+differences on PostgreSQL:
+
+- workers claim their batch with `SELECT ... FOR UPDATE SKIP LOCKED`, so
+  concurrent clusters each get different tasks instead of racing for the
+  same ones and coming back empty handed
+- an idle cluster blocks on `LISTEN` until a task is queued (`enqueue`
+  sends a `NOTIFY` when its transaction commits) instead of querying the
+  table every `poll` seconds. It still checks the table every
+  `LISTEN_TIMEOUT` seconds, for tasks whose lock expired
+
+On other databases (SQLite in development and tests) it behaves like the
+ORM broker.
+
+`claim` and `wait` are the two halves of `dequeue`, for callers that must
+not block while claiming (`core.executor`).
+"""
+
+import select
+from datetime import timedelta
+from time import sleep
+
+from django.db import connections, transaction
+from django.utils import timezone
+from django_q.brokers.orm import ORM
+from django_q.conf import Conf, logger
+
+
+class PostgresBroker(ORM):
+    # Longest an idle cluster waits for a notification before checking the
+    # table anyway
+    LISTEN_TIMEOUT = 10
+
+    def __init__(self, list_key: str = None):
+        super().__init__(list_key=list_key)
+        self._listener = None
+
+    def __setstate__(self, state):
+        # The listening connection is per process
+        super().__setstate__(state)
+        self._listener = None
+
+    @staticmethod
+    def is_postgres() -> bool:
+        return connections[Conf.ORM].vendor == "postgresql"
+
+    @property
+    def channel(self) -> str:
+        return f"django_q_{self.list_key}"[:63]
+
+    def enqueue(self, task):
+        task_id = super().enqueue(task)
+        if self.is_postgres():
+            with connections[Conf.ORM].cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, '')", [self.channel])
+        return task_id
+
+    def dequeue(self):
+        tasks = self.claim()
+        if tasks:
+            return tasks
+        self.wait()
+
+    def claim(self, count: int = None, retry: int = None) -> list:
+        """
+        Locks up to `count` (`bulk` by default) available tasks for `retry`
+        seconds (`retry` by default) without waiting for any. On PostgreSQL it
+        skips the ones other clusters are claiming
+        """
+        queue = self.get_connection()  # Closes stale connections
+        now = timezone.now()
+        lock = now + timedelta(seconds=retry or Conf.RETRY)
+        available = queue.filter(key=self.list_key, lock__lt=now).order_by("id")
+        count = count or Conf.BULK
+
+        if not self.is_postgres():
+            # Like the ORM broker, drops the ones another cluster locked first
+            return [
+                (task.pk, task.payload)
+                for task in available[:count]
+                if queue.filter(id=task.id, lock=task.lock).update(lock=lock)
+            ]
+
+        with transaction.atomic(using=Conf.ORM):
+            tasks = list(
+                available.select_for_update(skip_locked=True).values_list(
+                    "id", "payload"
+                )[:count]
+            )
+            if tasks:
+                queue.filter(id__in=[pk for pk, _ in tasks]).update(lock=lock)
+        return tasks
+
+    def wait(self) -> None:
+        """
+        Blocks until a task is queued for this cluster, or `LISTEN_TIMEOUT`.
+        Other databases can't notify, so it sleeps `poll` seconds
+        """
+        if not self.is_postgres():
+            sleep(Conf.POLL)
+            return
+        try:
+            listener = self._listen()
+            if select.select([listener], [], [], self.LISTEN_TIMEOUT)[0]:
+                listener.poll()
+                listener.notifies.clear()
+        except Exception as e:
+            logger.warning(f"Listening on {self.channel} failed: {e}")
+            self._close_listener()
+            sleep(Conf.POLL)
+
+    def _listen(self):
+        """
+        Returns this process' connection listening on the channel of this
+        cluster, separate from Django's so it survives `close_old_connections`
+        """
+        if self._listener is None or self._listener.closed:
+            db = connections[Conf.ORM]
+            self._listener = db.get_new_connection(db.get_connection_params())
+            self._listener.autocommit = True
+            with self._listener.cursor() as cursor:
+                cursor.execute(f"LISTEN {db.ops.quote_name(self.channel)}")
+        return self._listener
+
+    def _close_listener(self) -> None:
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except Exception:
+                pass
+            self._listener = None
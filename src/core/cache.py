@@ -0,0 +1,140 @@
+"""
+Caching helpers used by the `core` app.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import quote_etag
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU mapping whose entries expire after `ttl`
+    seconds.
+
+    Lives in process memory only, so every gunicorn worker has its own copy.
+    Use it for small, hot lookups where a bounded amount of staleness (the TTL)
+    across workers is acceptable.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores `value`, expiring it after `ttl` seconds (defaults to the
+        cache-wide TTL)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss counters
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = {}
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+def profile_version_key(user_id: int) -> str:
+    return f"profile-version:{user_id}"
+
+
+def get_profile_version(user_id: int) -> str:
+    """
+    Returns the opaque version stamp of a user's User/Profile rows, creating
+    one if none is cached yet.
+
+    Version stamps live in the `shared` cache directly, like the throttle
+    counters: a stamp kept in a worker's L1 would keep serving cached
+    responses after another worker bumped it
+    """
+    cache = caches["shared"]
+    key = profile_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # `add` so a concurrent bump isn't overwritten
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_profile_version(user_id: int) -> None:
+    """
+    Gives the user a new version stamp, orphaning every cached response
+    built from the previous one
+    """
+    caches["shared"].set(profile_version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def response_cache_key(namespace: str, user_id: int) -> str:
+    return f"response:{namespace}:{user_id}:{get_profile_version(user_id)}"
+
+
+def make_etag(data: Any) -> str:
+    """
+    Builds a strong ETag from the serialized representation of a response
+    """
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.sha256(payload.encode()).hexdigest()[:32])
@@ -0,0 +1,117 @@
+"""
+Django cache backends. See `settings/components/caches.py` for how they are
+wired together.
+"""
+
+import pickle
+import time
+from typing import Any, Dict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.cache import CacheStats, LRUCache
+
+# One L1 cache and one set of counters per process (and per CACHES alias),
+# shared by the per-thread backend instances Django creates
+_l1_caches: Dict[str, LRUCache] = {}
+_stats: Dict[str, CacheStats] = {}
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache: a small in-process LRU (L1) in front of a shared cache
+    (L2) configured as another `CACHES` alias.
+
+    Writes go to both tiers, reads fall through L1 to L2 and repopulate L1.
+    Each worker process has its own L1, so a value changed or deleted by
+    another process can be served stale from L1 for up to `L1_TIMEOUT`
+    seconds; keep it short.
+
+    OPTIONS:
+        SHARED: alias of the L2 cache (required)
+        L1_MAX_ENTRIES: LRU size, defaults to 1024
+        L1_TIMEOUT: upper bound (seconds) on L1 entry lifetime, defaults to 5
+    """
+
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options["SHARED"]
+        self.l1_timeout = options.get("L1_TIMEOUT", 5)
+        name = location or self.shared_alias
+        self.l1 = _l1_caches.setdefault(
+            name, LRUCache(maxsize=options.get("L1_MAX_ENTRIES", 1024), ttl=None)
+        )
+        self.stats = _stats.setdefault(name, CacheStats())
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    def get_stats(self) -> dict:
+        """
+        Returns the `l1_hits`, `l2_hits` and `misses` counters of this process
+        """
+        return {"l1_hits": 0, "l2_hits": 0, "misses": 0, **self.stats.as_dict()}
+
+    def _l1_ttl(self, timeout: Any) -> float:
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, timeout - time.time())
+
+    def _set_l1(self, key: str, value: Any, timeout: Any = DEFAULT_TIMEOUT) -> None:
+        ttl = self._l1_ttl(timeout)
+        if ttl <= 0:
+            self.l1.delete(key)
+        else:
+            self.l1.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl=ttl)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._set_l1(l1_key, value, timeout)
+        return added
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        pickled = self.l1.get(l1_key)
+        if pickled is not None:
+            self.stats.record("l1_hits")
+            return pickle.loads(pickled)  # nosec - only ever holds our own pickles
+
+        missing = object()
+        value = self.l2.get(key, missing, version=version)
+        if value is missing:
+            self.stats.record("misses")
+            return default
+
+        self.stats.record("l2_hits")
+        self._set_l1(l1_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout=timeout, version=version)
+        self._set_l1(l1_key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
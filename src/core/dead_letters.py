@@ -0,0 +1,143 @@
+"""
+Dead letters: calls of background tasks that failed, kept to be replayed.
+
+Tasks decorated with `capture_failures` record their failures with `record`
+instead of raising (and losing) them; `core.batching` records the side
+effects it gave up on. `replay` runs dead letters again on a small thread
+pool, starting at most `rate` per second, and deletes the ones that succeed.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple, Optional
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core import metrics
+from core.models import DeadLetter
+
+logger = logging.getLogger(__name__)
+
+# Longest error (traceback) kept per dead letter
+MAX_ERROR_LENGTH = 10_000
+
+
+class ReplayResult(NamedTuple):
+    succeeded: int
+    failed: int
+
+
+def fingerprint(task: str, args: list, kwargs: dict) -> str:
+    data = json.dumps([task, args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def format_error(error: BaseException) -> str:
+    formatted = "".join(traceback.format_exception(error))
+    return formatted[-MAX_ERROR_LENGTH:]
+
+
+def record(
+    task: str, args: list, kwargs: Optional[dict], error: BaseException
+) -> DeadLetter:
+    """
+    Stores a failed call of `task` (a dotted path), or counts another attempt
+    if the same call already failed
+    """
+    args, kwargs = list(args), kwargs or {}
+    with transaction.atomic():
+        letter, created = DeadLetter.objects.select_for_update().get_or_create(
+            fingerprint=fingerprint(task, args, kwargs),
+            defaults={
+                "task": task,
+                "args": args,
+                "kwargs": kwargs,
+                "error": format_error(error),
+            },
+        )
+        if not created:
+            letter.attempts += 1
+            letter.error = format_error(error)
+            letter.save(update_fields=["attempts", "error", "failed_at"])
+
+    metrics.increment(f"dead_letters.{task}")
+    return letter
+
+
+def capture_failures(func):
+    """
+    Makes a task record its failures as dead letters instead of raising.
+    The undecorated task (which raises) is `func.__wrapped__`
+    """
+    task = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.exception(f"Task {task} failed, storing it as a dead letter")
+            record(task, args, kwargs, e)
+
+    return wrapper
+
+
+def run(letter: DeadLetter) -> Optional[BaseException]:
+    """
+    Calls the task of `letter`. Returns the error if it failed again
+    """
+    try:
+        func = import_string(letter.task)
+        func = getattr(func, "__wrapped__", func)
+        func(*letter.args, **letter.kwargs)
+    except Exception as e:
+        return e
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+def replay(
+    letters: Iterable[DeadLetter], concurrency: int = 4, rate: float = 10
+) -> ReplayResult:
+    """
+    Runs `letters` again, `concurrency` at a time and starting at most `rate`
+    per second (0 for no limit). Deletes the ones that succeed and counts
+    another attempt for the others
+    """
+    interval = 1 / rate if rate else 0
+    next_start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for letter in letters:
+            delay = next_start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_start = max(next_start, time.monotonic()) + interval
+            futures.append((letter, pool.submit(run, letter)))
+
+        succeeded, failed = [], []
+        for letter, future in futures:
+            error = future.result()
+            if error is None:
+                succeeded.append(letter.pk)
+            else:
+                logger.warning(f"Replaying {letter} failed again: {error}")
+                failed.append((letter.pk, format_error(error)))
+
+    # Written from this thread only, once the batch is done
+    DeadLetter.objects.filter(pk__in=succeeded).delete()
+    for pk, error in failed:
+        DeadLetter.objects.filter(pk=pk).update(
+            attempts=F("attempts") + 1, error=error, failed_at=timezone.now()
+        )
+    return ReplayResult(len(succeeded), len(failed))
@@ -32,3 +32,17 @@ def get_data(exc: APIException) -> dict:
         else:
             return exc.detail
     return {"error": exc.detail}
+
+
+class ServiceUnavailable(exceptions.APIException):
+    """
+    Raised when the server sheds load. `wait` becomes the `Retry-After` header
+    """
+
+    status_code = 503
+    default_detail = "The server is busy, please try again shortly."
+    default_code = "service_unavailable"
+
+    def __init__(self, detail=None, code=None, wait: int = 1):
+        super().__init__(detail, code)
+        self.wait = wait
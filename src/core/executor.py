@@ -0,0 +1,320 @@
+"""
+In-process task executor, for deployments that don't run a `qcluster`.
+
+With `TASKS_IN_PROCESS` on, every gunicorn worker starts a `TaskExecutor`
+(from the `post_fork` hook) that takes queued django-q tasks off the queues
+in `TASKS_IN_PROCESS_QUEUES` and runs them on a pool of at most
+`TASKS_IN_PROCESS_WORKERS` threads, next to the request threads. A queue is
+only polled when a thread is free, and no more tasks are claimed than there
+are free threads, so the rest stay queued for the other workers. Tasks are
+locked for their queue's `retry` (see `core.queues`) and their results are
+saved and acknowledged like a cluster would.
+
+It also queues the tasks of due schedules of those queues, which is
+otherwise the cluster scheduler's job (`core.batching` schedules its
+delayed flushes).
+
+On shutdown (`worker_exit`, `worker_int`, `worker_abort`) the executor stops
+taking tasks and waits up to `TASKS_IN_PROCESS_DRAIN_TIMEOUT` seconds for the
+running ones. Unlike a cluster's, tasks can't be killed on timeout, so
+queues whose `timeout` isn't shorter than their `retry` aren't run in
+process.
+"""
+
+import ast
+import logging
+import os
+import pydoc
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django_q.brokers import Broker, get_broker
+from django_q.conf import Conf
+from django_q.models import Schedule
+from django_q.monitor import save_cached, save_task
+from django_q.signals import post_execute, post_execute_in_worker, pre_execute
+from django_q.signing import BadSignature, SignedPackage
+from django_q.tasks import async_task
+
+from core import metrics
+from core.queues import default_queue, queue_names, queue_setting
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for due schedules
+SCHEDULE_INTERVAL = 5
+
+
+class TaskExecutor:
+    """
+    Bounded thread pool running queued tasks inside this process.
+
+    Recreated if the process forks, like `core.hashers.HashingPool`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results_lock = threading.Lock()
+        self._pool = None
+        self._slots = None
+        self._stopping = None
+        self._threads: List[threading.Thread] = []
+        self._futures = set()
+        self._pid = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._pool is not None
+            and not self._stopping.is_set()
+            and self._pid == os.getpid()
+        )
+
+    def start(self, queues: List[str] = None) -> None:
+        with self._lock:
+            if self.running:
+                return
+
+            queues = queues or settings.TASKS_IN_PROCESS_QUEUES or queue_names()
+            queues = [queue for queue in queues if can_run_in_process(queue)]
+            if not queues:
+                return
+
+            workers = settings.TASKS_IN_PROCESS_WORKERS
+            self._pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="tasks"
+            )
+            self._slots = threading.BoundedSemaphore(workers)
+            self._stopping = threading.Event()
+            self._futures = set()
+            self._pid = os.getpid()
+
+            self._threads = [
+                threading.Thread(
+                    target=self._dispatch,
+                    args=(queue,),
+                    name=f"tasks-{queue}",
+                    daemon=True,
+                )
+                for queue in queues
+            ]
+            self._threads.append(
+                threading.Thread(
+                    target=self._schedule,
+                    args=(queues,),
+                    name="tasks-scheduler",
+                    daemon=True,
+                )
+            )
+            for thread in self._threads:
+                thread.start()
+        logger.info(f"Running tasks of {', '.join(queues)} in process {self._pid}")
+
+    def shutdown(self, timeout: float = None) -> bool:
+        """
+        Stops taking tasks and waits up to `timeout` seconds for the running
+        ones. Returns False if some were still running
+        """
+        with self._lock:
+            if not self.running:
+                return True
+            pool, threads = self._pool, self._threads
+            self._stopping.set()
+
+        if timeout is None:
+            timeout = settings.TASKS_IN_PROCESS_DRAIN_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        # Tasks a dispatcher already took off a queue are still run
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        _, pending = wait_futures(
+            set(self._futures), max(deadline - time.monotonic(), 0)
+        )
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        if pending:
+            logger.warning(f"{len(pending)} tasks still running after {timeout}s")
+        return not pending
+
+    def _dispatch(self, queue: str) -> None:
+        """
+        Claims as many tasks of `queue` as there are free threads to run them,
+        and waits for more without holding any
+        """
+        broker = get_broker(queue)
+        stopping, slots = self._stopping, self._slots
+        bulk = queue_setting(queue, "bulk") or Conf.BULK
+        retry = queue_setting(queue, "retry")
+
+        while not stopping.is_set():
+            if not slots.acquire(timeout=Conf.POLL):
+                continue
+            free = 1
+            while free < bulk and slots.acquire(blocking=False):
+                free += 1
+
+            try:
+                task_set = broker.claim(free, retry)
+            except Exception:
+                logger.exception(f"Failed to pull tasks from {queue}")
+                task_set = None
+            for _ in range(free - len(task_set or [])):
+                slots.release()
+
+            if task_set is None:
+                stopping.wait(1)
+            elif not task_set:
+                broker.wait()
+            for ack_id, payload in task_set or []:
+                self._submit(queue, broker, ack_id, payload)
+
+    def _submit(self, queue: str, broker: Broker, ack_id, payload: str) -> None:
+        try:
+            task = SignedPackage.loads(payload)
+        except (TypeError, BadSignature):
+            logger.exception("Failed to unpack task")
+            broker.fail(ack_id)
+            self._slots.release()
+            return
+
+        task["cluster"] = queue
+        task["ack_id"] = ack_id
+        try:
+            future = self._pool.submit(self._run, task, broker)
+        except RuntimeError:
+            # Shut down after claiming it; retried after `retry`
+            self._slots.release()
+            return
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+
+    def _run(self, task: dict, broker: Broker) -> None:
+        """
+        Runs a task and saves its result, like a cluster's worker and monitor
+        """
+        close_old_connections()
+        try:
+            func = task["func"]
+            if not callable(func):
+                func = pydoc.locate(func)
+            pre_execute.send(sender="django_q", func=func, task=task)
+            try:
+                if func is None:
+                    raise ValueError(f"Function {task['func']} is not defined")
+                task["result"] = func(*task["args"], **task["kwargs"])
+                task["success"] = True
+            except Exception as e:
+                task["result"] = f"{e} : {traceback.format_exc()}"
+                task["success"] = False
+            task["stopped"] = timezone.now()
+            post_execute_in_worker.send(sender="django_q", func=func, task=task)
+
+            # One at a time, like a cluster's monitor
+            with self._results_lock:
+                if task.get("cached", False):
+                    save_cached(task, broker)
+                else:
+                    save_task(task, broker)
+                ack_id = task.pop("ack_id", False)
+                if ack_id and (task["success"] or task.get("ack_failure", False)):
+                    broker.acknowledge(ack_id)
+            post_execute.send(sender="django_q", task=task)
+            metrics.increment(
+                f"tasks.{task['cluster']}.{'success' if task['success'] else 'failure'}"
+            )
+        except Exception:
+            logger.exception(f"Running task {task.get('name')} failed")
+        finally:
+            self._slots.release()
+            close_old_connections()
+
+    def _schedule(self, queues: List[str]) -> None:
+        stopping = self._stopping
+        while not stopping.wait(SCHEDULE_INTERVAL):
+            try:
+                enqueue_due_schedules(queues)
+            except Exception:
+                logger.exception("Could not create tasks from schedules")
+            finally:
+                close_old_connections()
+
+
+def can_run_in_process(queue: str) -> bool:
+    """
+    Tasks can't be killed on timeout in process, so a queue is only run here
+    if its tasks are done within their `timeout` before their lock expires
+    after `retry` seconds and another worker runs them again
+    """
+    timeout, retry = queue_setting(queue, "timeout"), queue_setting(queue, "retry")
+    if timeout and retry and timeout >= retry:
+        logger.error(
+            f"Not running {queue} tasks in process: "
+            f"its timeout ({timeout}s) must be shorter than its retry ({retry}s)"
+        )
+        return False
+    return True
+
+
+def enqueue_due_schedules(queues: List[str]) -> int:
+    """
+    Queues the tasks of the due schedules of `queues`. Returns how many
+    """
+    now = timezone.now()
+    clusters = Q(cluster__in=queues)
+    if default_queue() in queues:
+        clusters |= Q(cluster__isnull=True)
+
+    queued = 0
+    with transaction.atomic():
+        due = (
+            Schedule.objects.select_for_update(skip_locked=True)
+            .exclude(repeats=0)
+            .filter(clusters, next_run__lt=now)
+        )
+        for s in due:
+            args = ast.literal_eval(s.args) if s.args else ()
+            if not isinstance(args, tuple):
+                args = (args,)
+            kwargs = ast.literal_eval(s.kwargs) if s.kwargs else {}
+            if s.intended_date_kwarg:
+                kwargs[s.intended_date_kwarg] = s.next_run.isoformat()
+            q_options = kwargs.pop("q_options", {})
+            q_options.update(cluster=s.cluster, group=s.name or s.id)
+            if s.hook:
+                q_options["hook"] = s.hook
+            s.task = async_task(s.func, *args, q_options=q_options, **kwargs)
+            queued += 1
+
+            if s.schedule_type == Schedule.ONCE:
+                if s.repeats < 0:
+                    s.delete()
+                    continue
+                s.repeats = 0
+            else:
+                while s.next_run <= now:
+                    s.next_run = s.calculate_next_run(s.next_run)
+                if s.repeats > 0:
+                    s.repeats -= 1
+            s.save()
+    return queued
+
+
+task_executor = TaskExecutor()
+
+
+def start_task_executor() -> None:
+    if settings.TASKS_IN_PROCESS:
+        task_executor.start()
+
+
+def stop_task_executor(timeout: float = None) -> None:
+    task_executor.shutdown(timeout)
@@ -0,0 +1,156 @@
+"""
+Bulk profile exports, for reporting jobs.
+
+Profiles are read in keyset-paginated batches (`id > last id`, never an
+offset), so every page costs the same however deep the export goes. The JSON
+API returns a page at a time with a cursor to the next one; NDJSON and CSV
+exports are streamed in a single response, one batch in memory at a time.
+
+Under ASGI Django buffers a sync iterator whole before sending it, so the
+stream is then an async iterator reading each batch in a thread instead.
+"""
+
+import csv
+import json
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from djangorestframework_camel_case.util import camelize
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import BaseRenderer
+
+from core import tags
+from core.models import Profile
+from core.serializers import ProfileExportSerializer
+
+EXPORT_BATCH_SIZE = 1000
+
+# Filter (validated by `ProfileExportFilterSerializer`) -> lookup. Tag filters
+# go through `core.tags.filter_by_tags`
+FILTER_LOOKUPS = {
+    "is_mentor": "is_mentor",
+    "military_status": "military_status",
+    "branch_of_service": "branch_of_service",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+}
+
+
+class ProfileCursorPagination(CursorPagination):
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = EXPORT_BATCH_SIZE
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    One JSON document per line. Only renders errors, exports are streamed
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return "".join(ndjson_lines(rows)).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Only renders errors, exports are streamed
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fieldnames = list(rows[0]) if rows else []
+        return "".join(csv_lines(fieldnames, rows)).encode()
+
+
+class Echo:
+    """
+    File-like object handing back what `csv.writer` writes to it
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def filter_profiles(filters: dict) -> QuerySet:
+    lookups = {
+        FILTER_LOOKUPS[name]: value
+        for name, value in filters.items()
+        if name in FILTER_LOOKUPS
+    }
+    return tags.filter_by_tags(
+        Profile.objects.select_related("user").filter(**lookups),
+        tags.selected_tags(filters),
+    )
+
+
+def profile_batches(queryset: QuerySet, batch_size: int) -> Iterator[List[dict]]:
+    """
+    Yields the serialized profiles of `queryset`, `batch_size` at a time
+    """
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id).order_by("pk")[:batch_size])
+        if not batch:
+            return
+        yield camelize(ProfileExportSerializer(batch, many=True).data)
+        last_id = batch[-1].pk
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def csv_lines(fieldnames: List[str], rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.DictWriter(Echo(), fieldnames, extrasaction="ignore")
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+async def async_chunks(lines: Iterator[str], size: int) -> AsyncIterator[str]:
+    """
+    Yields `lines` joined `size` at a time, reading them in a thread since
+    they come from the database
+    """
+    read = sync_to_async(lambda: "".join(islice(lines, size)))
+    while chunk := await read():
+        yield chunk
+
+
+def export_fieldnames() -> List[str]:
+    return list(camelize(dict.fromkeys(ProfileExportSerializer().fields)))
+
+
+def stream_profiles(
+    queryset: QuerySet, renderer: BaseRenderer, batch_size: int = EXPORT_BATCH_SIZE
+) -> StreamingHttpResponse:
+    """
+    Streams every profile of `queryset` as NDJSON or CSV
+    """
+    rows = (row for batch in profile_batches(queryset, batch_size) for row in batch)
+    if renderer.format == CSVRenderer.format:
+        lines = csv_lines(export_fieldnames(), rows)
+    else:
+        lines = ndjson_lines(rows)
+    if settings.ASYNC_VIEWS:
+        lines = async_chunks(lines, batch_size)
+
+    response = StreamingHttpResponse(lines, content_type=renderer.media_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="profiles.{renderer.format}"'
+    )
+    return response
@@ -0,0 +1,207 @@
+"""
+Geohashes and great-circle distances, for the nearby mentor search.
+
+Profiles with coordinates store their geohash (`Profile.geohash`). Every
+point in a geohash cell shares the cell's hash as a prefix, so a cell is a
+contiguous range of the (mentors only) index on that column.
+`nearby_mentors` covers the bounding box of the search circle with at most
+`MAX_CELLS` cells, reads only the mentors in those ranges that are also
+inside the box, and orders them by distance computed in the database. No
+PostGIS needed, on SQLite or PostgreSQL.
+"""
+
+import math
+from functools import reduce
+from operator import or_
+from typing import List, NamedTuple, Optional, Tuple
+
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# About 5m x 5m, more than zip code centroids need
+GEOHASH_LENGTH = 9
+# Most index ranges read per search
+MAX_CELLS = 16
+EARTH_RADIUS_MILES = 3958.8
+
+
+class BoundingBox(NamedTuple):
+    """
+    Longitudes may go past ±180 when the box crosses the antimeridian
+    """
+
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+
+
+def encode(latitude: float, longitude: float, length: int = GEOHASH_LENGTH) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    is_lon = True
+    while len(chars) < length:
+        interval, coordinate = (
+            (lon_range, longitude) if is_lon else (lat_range, latitude)
+        )
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        is_lon = not is_lon
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def cell_size(length: int) -> Tuple[float, float]:
+    """
+    Returns the height and width, in degrees, of geohash cells of `length`
+    """
+    lon_bits = math.ceil(5 * length / 2)
+    lat_bits = 5 * length // 2
+    return 180 / 2**lat_bits, 360 / 2**lon_bits
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> BoundingBox:
+    """
+    Returns the smallest box containing every point within `radius` miles
+    """
+    angle = radius / EARTH_RADIUS_MILES
+    min_lat = latitude - math.degrees(angle)
+    max_lat = latitude + math.degrees(angle)
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+        # The circle contains a pole: every longitude
+        return BoundingBox(max(min_lat, -90), min(max_lat, 90), -180, 180)
+
+    delta_lon = math.degrees(
+        math.asin(min(math.sin(angle) / math.cos(math.radians(latitude)), 1))
+    )
+    return BoundingBox(min_lat, max_lat, longitude - delta_lon, longitude + delta_lon)
+
+
+def covering_cells(box: BoundingBox, max_cells: int = MAX_CELLS) -> List[str]:
+    """
+    Returns the geohashes of the smallest cells, at most `max_cells` of them,
+    that together cover `box`. `[""]` (the whole world) for huge boxes
+    """
+    for length in range(GEOHASH_LENGTH, 0, -1):
+        height, width = cell_size(length)
+        total_rows, total_columns = round(180 / height), round(360 / width)
+        first_row = math.floor((box.min_lat + 90) / height)
+        last_row = math.floor((box.max_lat + 90) / height)
+        rows = range(first_row, min(last_row, total_rows - 1) + 1)
+        first_column = math.floor((box.min_lon + 180) / width)
+        last_column = math.floor((box.max_lon + 180) / width)
+        columns = range(
+            first_column, min(last_column, first_column + total_columns - 1) + 1
+        )
+        if len(rows) * len(columns) > max_cells:
+            continue
+
+        cells = []
+        for row in rows:
+            for column in columns:
+                # Columns past the antimeridian wrap around
+                column %= total_columns
+                cells.append(
+                    encode(
+                        (row + 0.5) * height - 90,
+                        (column + 0.5) * width - 180,
+                        length,
+                    )
+                )
+        return cells
+    return [""]
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance in miles (haversine)
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(math.sqrt(a), 1))
+
+
+def distance_expression(latitude: float, longitude: float):
+    """
+    `distance` from (`latitude`, `longitude`) to the `latitude` and
+    `longitude` columns, computed by the database
+    """
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    a = Power(Sin((Radians(F("latitude")) - Value(lat)) / 2), 2) + Value(
+        math.cos(lat)
+    ) * Cos(Radians(F("latitude"))) * Power(
+        Sin((Radians(F("longitude")) - Value(lon)) / 2), 2
+    )
+    return Value(2 * EARTH_RADIUS_MILES) * ASin(
+        Least(Sqrt(a), Value(1.0)), output_field=FloatField()
+    )
+
+
+def in_box(box: BoundingBox) -> Q:
+    latitudes = Q(latitude__range=(box.min_lat, box.max_lat))
+    if box.min_lon < -180:
+        return latitudes & (
+            Q(longitude__gte=box.min_lon + 360) | Q(longitude__lte=box.max_lon)
+        )
+    if box.max_lon > 180:
+        return latitudes & (
+            Q(longitude__gte=box.min_lon) | Q(longitude__lte=box.max_lon - 360)
+        )
+    return latitudes & Q(longitude__range=(box.min_lon, box.max_lon))
+
+
+def next_cell(cell: str) -> Optional[str]:
+    """
+    Returns the first geohash sorting after every hash starting with `cell`
+    (its last character incremented, with carry), `None` if there's none
+    """
+    cell = cell.rstrip(BASE32[-1])
+    if not cell:
+        return None
+    return cell[:-1] + BASE32[BASE32.index(cell[-1]) + 1]
+
+
+def mentors_in_cells(cells: List[str]) -> Q:
+    """
+    Every hash starting with `cell` sorts between it and `next_cell(cell)`.
+    Both bounds are geohashes, so the range holds under any collation, not
+    only C. Each range repeats the condition of the partial index, or SQLite
+    won't search it
+    """
+    ranges = []
+    for cell in cells:
+        condition = Q(is_mentor=True, geohash__gte=cell)
+        upper = next_cell(cell)
+        if upper is not None:
+            condition &= Q(geohash__lt=upper)
+        ranges.append(condition)
+    return reduce(or_, ranges)
+
+
+def nearby_mentors(
+    queryset: QuerySet, latitude: float, longitude: float, radius: float
+) -> QuerySet:
+    """
+    Narrows `queryset` (of profiles) to the mentors within `radius` miles of
+    (`latitude`, `longitude`), closest first, annotated with their `distance`
+    """
+    box = bounding_box(latitude, longitude, radius)
+    return (
+        queryset.filter(mentors_in_cells(covering_cells(box)), in_box(box))
+        .annotate(distance=distance_expression(latitude, longitude))
+        .filter(distance__lte=radius)
+        .order_by("distance", "pk")
+    )
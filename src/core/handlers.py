@@ -3,12 +3,20 @@ import logging
 from allauth.account.models import EmailConfirmation
 from allauth.account.signals import email_confirmed, user_signed_up
 from dj_rest_auth.serializers import JWTSerializer
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from django_q.tasks import async_task
+from django_q.signals import pre_execute
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from core import batching, search
+from core.authentication import invalidate_user_state
+from core.cache import bump_profile_version
+from core.models import Profile
+from core.permissions import invalidate_group_cache
+from core.queues import record_wait
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,19 +65,101 @@ class BackwardsCompatibleJWTSerializer(JWTSerializer):
 @receiver(user_signed_up)
 def registration_callback(user: User, **kwargs: dict) -> None:
     """
-    Listens for the `user_signed_up` signal and queues background tasks to
-    send the welcome email and slack invite
+    Listens for the `user_signed_up` signal and queues the welcome email and
+    slack invite to be sent with the next batch
     """
     logger.info(f"Received user_signed_up signal for {user}")
-    async_task("core.tasks.send_slack_invite_job", user.email)
-    async_task("core.tasks.send_welcome_email", user.email)
+    batching.enqueue(batching.SLACK_INVITE, user.email)
+    batching.enqueue(batching.WELCOME_EMAIL, user.email)
 
 
 @receiver(email_confirmed)
 def email_confirmed_callback(email_address: EmailConfirmation, **kwargs: dict) -> None:
     """
-    Listens for the `email_confirmed` signal and queues a background task to
-    add the user to the mailing list
+    Listens for the `email_confirmed` signal and queues the user's mailing
+    list subscription to be sent with the next batch
     """
     logger.info(f"Received email_confirmed signal for {email_address.email}")
-    async_task("core.tasks.add_user_to_mailing_list", email_address.email)
+    batching.enqueue(batching.MAILING_LIST, email_address.email)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed_callback(
+    instance, action: str, reverse: bool, pk_set: set, **kwargs: dict
+) -> None:
+    """
+    Listens for changes to `User.groups` (from either side of the relation) and
+    invalidates the cached group memberships of the affected users
+    """
+    if not action.startswith("post_"):
+        return
+
+    if not reverse:
+        invalidate_group_cache(instance.pk)
+    elif pk_set:
+        invalidate_group_cache(*pk_set)
+    else:
+        # `group.user_set.clear()` doesn't tell us which users were removed
+        invalidate_group_cache()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed_callback(instance: Group, **kwargs: dict) -> None:
+    """
+    Group renames and deletions affect every member, so drop the whole cache
+    """
+    invalidate_group_cache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed_callback(instance: User, **kwargs: dict) -> None:
+    """
+    Makes deactivations, permission and password changes visible to
+    `ClaimsJWTAuthentication` immediately in this process
+    """
+    invalidate_user_state(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def profile_changed_callback(instance, **kwargs: dict) -> None:
+    """
+    Invalidates the cached `/auth/user/` and `/auth/profile/` responses of the
+    saved user
+    """
+    user_id = instance.user_id if isinstance(instance, Profile) else instance.pk
+    bump_profile_version(user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def search_index_callback(
+    instance, created: bool, update_fields: frozenset, **kwargs: dict
+) -> None:
+    """
+    Reindexes the saved profile (or the saved user's profile) for search,
+    unless none of the searched fields were saved
+    """
+    if isinstance(instance, User):
+        # New users are indexed with their new profile
+        fields = search.USER_FIELDS
+        if created or (update_fields is not None and not fields & update_fields):
+            return
+        search.index_user(instance.pk)
+    elif update_fields is None or search.PROFILE_FIELDS & update_fields:
+        search.index_profile(instance.pk)
+
+
+@receiver(post_delete, sender=Profile)
+def profile_deleted_callback(instance: Profile, **kwargs: dict) -> None:
+    search.remove_profile(instance.pk)
+
+
+@receiver(pre_execute)
+def task_started_callback(task: dict, **kwargs: dict) -> None:
+    """
+    Records how long each task waited in its queue, per queue
+    """
+    record_wait(task)
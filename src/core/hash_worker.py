@@ -0,0 +1,28 @@
+"""
+Code that runs inside the password hashing pool processes (see
+`core.hashers.HashingPool`).
+
+The pool's processes don't set Django up, so this module must stay
+importable without the app registry: no models, no DRF, nothing that reads
+settings at import time.
+"""
+
+import time
+from typing import Tuple, Union
+
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+def run_hasher(
+    submitted_at: float, method: str, params: tuple, *args: str
+) -> Tuple[Union[str, bool], float, float]:
+    """
+    Calls `method` of an Argon2 hasher using the given
+    `(time_cost, memory_cost, parallelism)`. Returns the result along with how
+    long the job waited in the queue and how long the hash itself took
+    """
+    started_at = time.time()
+    hasher = Argon2PasswordHasher()
+    hasher.time_cost, hasher.memory_cost, hasher.parallelism = params
+    result = getattr(hasher, method)(*args)
+    return result, started_at - submitted_at, time.time() - started_at
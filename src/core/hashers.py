@@ -2,7 +2,32 @@
 Custom password hashers with tuned parameters for web authentication.
 """
 
-from django.contrib.auth.hashers import Argon2PasswordHasher
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptPasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    PBKDF2SHA1PasswordHasher,
+)
+
+from core import metrics
+from core.exceptions import ServiceUnavailable
+from core.hash_worker import run_hasher
+
+logger = logging.getLogger(__name__)
 
 
 class TunedArgon2PasswordHasher(Argon2PasswordHasher):
@@ -18,11 +43,273 @@ class TunedArgon2PasswordHasher(Argon2PasswordHasher):
     strong security against GPU/ASIC attacks. Still significantly more secure
     than BCrypt for the same performance.
 
+    The parameters are read from the `ARGON2_*` settings, so they can be
+    tuned per instance size (see `manage.py calibrate_hasher`). Hashes made
+    with other parameters are rehashed on the user's next login.
+
     References:
     - OWASP Password Storage Cheat Sheet: https://cheatsheetseries.owasp.org/cheatsheets/Password_Storage_Cheat_Sheet.html
     - Django default uses 100 MB which is optimized for maximum security but too slow for web
     """
 
-    time_cost = 2
-    memory_cost = 19456  # 19 MB (OWASP minimum recommendation)
-    parallelism = 1  # Single-threaded for web servers
+    @property
+    def time_cost(self) -> int:
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self) -> int:
+        return settings.ARGON2_MEMORY_COST  # KiB
+
+    @property
+    def parallelism(self) -> int:
+        return settings.ARGON2_PARALLELISM
+
+    def cost_params(self) -> tuple:
+        return self.time_cost, self.memory_cost, self.parallelism
+
+    def run_hash(self, method: str, params: tuple, *args: str):
+        """
+        Calls `method` of an Argon2 hasher using `params` instead of our own
+        """
+        result, _, _ = run_hasher(time.time(), method, params, *args)
+        return result
+
+    def harden_runtime(self, password, encoded):
+        """
+        Verifying a hash made with cheaper parameters than the current ones is
+        faster, which would let an attacker tell (by timing logins) which
+        users haven't been rehashed yet. Make up the difference with a
+        throwaway hash.
+        """
+        decoded = self.decode(encoded)
+        missing = (
+            self.time_cost * self.memory_cost
+            - decoded["time_cost"] * decoded["memory_cost"]
+        )
+        if missing > 0:
+            time_cost = math.ceil(missing / self.memory_cost)
+            params = (time_cost, self.memory_cost, self.parallelism)
+            self.run_hash("encode", params, password, self.salt())
+
+
+class HashingPool:
+    """
+    Size-limited process pool that password hashes run in.
+
+    Created lazily in the process that first uses it (gunicorn's `post_fork`
+    hook warms it up in each worker), and recreated if the process forks.
+    At most `PASSWORD_HASH_PROCESSES + PASSWORD_HASH_MAX_QUEUE` hashes may be
+    queued or running per worker; further requests are rejected immediately
+    with a 503 and `Retry-After` instead of piling up behind each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def start(self) -> Tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+        """
+        Returns the pool of this process and its queue slots, together, so a
+        hash releases the slot it took even if the pool is recreated meanwhile
+        """
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                processes = settings.PASSWORD_HASH_PROCESSES
+                self._executor = ProcessPoolExecutor(
+                    max_workers=processes,
+                    # Never fork the (threaded) web worker itself
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+                self._slots = threading.BoundedSemaphore(
+                    processes + settings.PASSWORD_HASH_MAX_QUEUE
+                )
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def shutdown(self, executor: ProcessPoolExecutor = None) -> None:
+        """
+        Shuts the pool down, cancelling the queued hashes. With `executor`,
+        only if that's still the pool, so callers whose hash was cancelled
+        don't shut down its replacement too
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def run(self, method: str, params: tuple, *args: str):
+        executor, slots = self.start()
+        if not slots.acquire(blocking=False):
+            metrics.increment("password_hash.rejected")
+            raise ServiceUnavailable(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+
+        try:
+            future = executor.submit(run_hasher, time.time(), method, params, *args)
+            result, queue_wait, hash_time = future.result(
+                timeout=settings.PASSWORD_HASH_TIMEOUT
+            )
+        except (BrokenProcessPool, FuturesTimeoutError):
+            logger.exception("Password hashing pool failed, restarting it")
+            metrics.increment("password_hash.failed")
+            self.shutdown(executor)
+            raise ServiceUnavailable(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+        except CancelledError:
+            # Queued behind a hash that failed and shut the pool down
+            metrics.increment("password_hash.cancelled")
+            raise ServiceUnavailable(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+        finally:
+            slots.release()
+
+        metrics.timing("password_hash.queue_wait", queue_wait)
+        metrics.timing("password_hash.hash_time", hash_time)
+        return result
+
+
+hashing_pool = HashingPool()
+
+
+class PooledArgon2PasswordHasher(TunedArgon2PasswordHasher):
+    """
+    `TunedArgon2PasswordHasher` that runs `encode` and `verify` in
+    `hashing_pool` instead of on the request thread, so a burst of logins
+    can't occupy every gunicorn thread.
+
+    Enabled by setting `PASSWORD_HASH_PROCESSES` above 0. Produces the exact
+    same hashes as `TunedArgon2PasswordHasher`.
+    """
+
+    def run_hash(self, method: str, params: tuple, *args: str):
+        return hashing_pool.run(method, params, *args)
+
+    def encode(self, password, salt):
+        return self.run_hash("encode", self.cost_params(), password, salt)
+
+    def verify(self, password, encoded):
+        return self.run_hash("verify", self.cost_params(), password, encoded)
+
+
+class WrappedLegacyPasswordHasher(TunedArgon2PasswordHasher, metaclass=ABCMeta):
+    """
+    Abstract base class of the layered hashers used to upgrade legacy hashes without
+    knowing the passwords (`manage.py rehash_passwords`).
+
+    The legacy hash itself is hashed with Argon2, keeping only the legacy
+    salt and cost next to it:
+
+        argon2_<legacy algorithm>$<legacy setting>$<argon2 hash of legacy hash>
+
+    Verifying recomputes the legacy hash from the password and checks it
+    against the Argon2 layer. Users are moved to plain Argon2 on their next
+    login, since these are never the preferred hasher.
+    """
+
+    legacy_hasher_class = None
+
+    def __init__(self):
+        self.legacy_hasher = self.legacy_hasher_class()
+
+    @property
+    def algorithm(self) -> str:
+        return f"argon2_{self.legacy_hasher.algorithm}"
+
+    @abstractmethod
+    def split_legacy(self, legacy_encoded: str) -> Tuple[str, str]:
+        """
+        Splits a legacy hash into its setting (salt and cost) and the hash
+        """
+
+    @abstractmethod
+    def legacy_hash(self, password: str, setting: str) -> str:
+        """
+        Hashes `password` the way the legacy hasher did with `setting`
+        """
+
+    def wrap(self, legacy_encoded: str, salt: str = None) -> str:
+        setting, legacy_hash = self.split_legacy(legacy_encoded)
+        inner = super().encode(legacy_hash, salt or self.salt())
+        return f"{self.algorithm}${setting}${inner.split('$', 1)[1]}"
+
+    def split(self, encoded: str) -> Tuple[str, str]:
+        """
+        Returns the legacy setting and the Argon2 layer (prefixed with our
+        algorithm, which is what the inherited Argon2 methods expect)
+        """
+        head, *inner = encoded.rsplit("$", 5)
+        algorithm, _, setting = head.partition("$")
+        if algorithm != self.algorithm or len(inner) != 5:
+            raise ValueError(f"Not an {self.algorithm} hash")
+        return setting, "$".join([algorithm, *inner])
+
+    def encode(self, password, salt):
+        legacy_encoded = self.legacy_hasher.encode(password, self.legacy_hasher.salt())
+        return self.wrap(legacy_encoded, salt)
+
+    def verify(self, password, encoded):
+        setting, inner = self.split(encoded)
+        return super().verify(self.legacy_hash(password, setting), inner)
+
+    def decode(self, encoded):
+        return super().decode(self.split(encoded)[1])
+
+    def must_update(self, encoded):
+        return True
+
+
+class WrappedPBKDF2PasswordHasher(WrappedLegacyPasswordHasher):
+    """
+    Wraps PBKDF2 hashes; the setting is `<iterations>$<salt>`
+    """
+
+    def split_legacy(self, legacy_encoded):
+        decoded = self.legacy_hasher.decode(legacy_encoded)
+        return f"{decoded['iterations']}${decoded['salt']}", decoded["hash"]
+
+    def legacy_hash(self, password, setting):
+        iterations, salt = setting.split("$", 1)
+        encoded = self.legacy_hasher.encode(password, salt, int(iterations))
+        return self.legacy_hasher.decode(encoded)["hash"]
+
+
+class WrappedBCryptPasswordHasher(WrappedLegacyPasswordHasher):
+    """
+    Wraps BCrypt hashes; the setting is the bcrypt salt, `$2b$<cost>$<salt>`
+    """
+
+    def split_legacy(self, legacy_encoded):
+        decoded = self.legacy_hasher.decode(legacy_encoded)
+        setting = (
+            f"${decoded['algostr']}${decoded['work_factor']:02d}${decoded['salt']}"
+        )
+        return setting, decoded["checksum"]
+
+    def legacy_hash(self, password, setting):
+        encoded = self.legacy_hasher.encode(password, setting.encode())
+        return self.legacy_hasher.decode(encoded)["checksum"]
+
+
+class Argon2WrappedPBKDF2PasswordHasher(WrappedPBKDF2PasswordHasher):
+    legacy_hasher_class = PBKDF2PasswordHasher
+
+
+class Argon2WrappedPBKDF2SHA1PasswordHasher(WrappedPBKDF2PasswordHasher):
+    legacy_hasher_class = PBKDF2SHA1PasswordHasher
+
+
+class Argon2WrappedBCryptPasswordHasher(WrappedBCryptPasswordHasher):
+    legacy_hasher_class = BCryptPasswordHasher
+
+
+class Argon2WrappedBCryptSHA256PasswordHasher(WrappedBCryptPasswordHasher):
+    legacy_hasher_class = BCryptSHA256PasswordHasher
+
+
+def start_hashing_pool() -> None:
+    """
+    Starts `hashing_pool` if the pooled hasher is in use
+    """
+    if settings.PASSWORD_HASH_PROCESSES:
+        hashing_pool.start()
@@ -0,0 +1,50 @@
+"""
+Idempotency keys for tasks queued on behalf of a user.
+
+`claim` records that a task was queued for an email and tells whether it
+already was within the TTL, so repeated signals (retried requests, double
+submits) are dropped at enqueue time instead of calling PyBot, Mandrill or
+Mailchimp twice. Keys are rows of `IdempotencyKey`, written in the caller's
+transaction: a signup that rolls back releases its keys too, and two
+concurrent claims of a key can't both succeed.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+def make_key(task_name: str, email: str) -> str:
+    normalized = email.strip().lower()
+    return hashlib.sha256(f"{task_name}:{normalized}".encode()).hexdigest()
+
+
+def claim(key: str, ttl: int) -> bool:
+    """
+    Claims `key` for `ttl` seconds. Returns False if it's already claimed
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=key, expires_at=expires_at)
+        return True
+    except IntegrityError:
+        # Expired keys are taken over
+        return bool(
+            IdempotencyKey.objects.filter(key=key, expires_at__lte=now).update(
+                expires_at=expires_at
+            )
+        )
+
+
+def purge() -> int:
+    """
+    Deletes the expired keys. Returns how many were deleted
+    """
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
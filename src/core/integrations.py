@@ -0,0 +1,129 @@
+"""
+HTTP clients for the services background tasks talk to (PyBot, Mailchimp).
+
+Clients are created once per process and reused, so consecutive tasks share
+pooled keep-alive connections instead of paying a TCP/TLS handshake each.
+Every request gets a timeout. Connection errors, and the 429s and 5xx
+responses of idempotent requests (not POSTs), are retried a bounded number
+of times with jittered exponential backoff (honouring `Retry-After`).
+"""
+
+import os
+import threading
+from typing import Dict
+
+import requests
+from django.conf import settings
+from mailchimp3 import MailChimp
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TimeoutSession(requests.Session):
+    """
+    `requests.Session` with a default timeout, since requests has none
+    """
+
+    def __init__(self, timeout: tuple):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def build_session() -> TimeoutSession:
+    session = TimeoutSession(
+        (settings.INTEGRATION_CONNECT_TIMEOUT, settings.INTEGRATION_READ_TIMEOUT)
+    )
+    retry = Retry(
+        total=settings.INTEGRATION_RETRIES,
+        backoff_factor=settings.INTEGRATION_BACKOFF,
+        backoff_jitter=settings.INTEGRATION_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        # Only idempotent methods are retried after reaching the service. A
+        # POST (a Slack invite, a Mailchimp batch) that failed may still have
+        # been processed, so it's only retried when it couldn't connect
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        # Hand the last response back instead of raising, like without retries
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_maxsize=settings.INTEGRATION_POOL_SIZE, max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PooledMailChimp(MailChimp):
+    """
+    Mailchimp client that sends its requests through `session` (it uses a
+    new connection per request otherwise)
+    """
+
+    def __init__(self, session: requests.Session, *args, base_url: str = "", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session
+        if base_url:
+            self.base_url = base_url.rstrip("/") + "/"
+
+    def _make_request(self, **kwargs):
+        return self.session.request(**kwargs)
+
+
+_lock = threading.Lock()
+_pid = None
+_sessions: Dict[str, TimeoutSession] = {}
+_clients: Dict[str, object] = {}
+
+
+def _check_pid() -> None:
+    """
+    Drops the clients inherited from a parent process; sockets can't be shared
+    across a fork. Call with `_lock` held
+    """
+    global _pid
+    if _pid != os.getpid():
+        _sessions.clear()
+        _clients.clear()
+        _pid = os.getpid()
+
+
+def get_session(name: str) -> TimeoutSession:
+    """
+    Returns this process' session for the service called `name`
+    """
+    with _lock:
+        _check_pid()
+        if name not in _sessions:
+            _sessions[name] = build_session()
+        return _sessions[name]
+
+
+def get_mailchimp() -> PooledMailChimp:
+    session = get_session("mailchimp")
+    with _lock:
+        if "mailchimp" not in _clients:
+            _clients["mailchimp"] = PooledMailChimp(
+                session,
+                settings.MAILCHIMP_API_KEY,
+                base_url=settings.MAILCHIMP_API_URL,
+            )
+        return _clients["mailchimp"]
+
+
+def close_sessions() -> None:
+    """
+    Closes every pooled connection of this process
+    """
+    with _lock:
+        _check_pid()
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _clients.clear()
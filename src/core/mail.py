@@ -0,0 +1,69 @@
+"""
+Template rendering for transactional email.
+
+Templates are compiled once per process and kept until their file changes
+(checked by mtime on every use, a single `stat`). Emails without context,
+like the welcome email, are also rendered only once; `render_static` returns
+the cached string afterwards.
+"""
+
+import os
+from typing import Optional, Tuple
+
+from django.template import engines
+from django.template.backends.django import Template
+from django.template.base import Template as CompiledTemplate
+
+from core.cache import LRUCache
+
+_compiled = LRUCache(maxsize=128, ttl=None)
+_rendered = LRUCache(maxsize=128, ttl=None)
+
+
+def _mtime(template: Template) -> Optional[int]:
+    try:
+        return os.stat(template.origin.name).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
+def get_compiled_template(template_name: str) -> Tuple[Template, Optional[int]]:
+    """
+    Returns the compiled template and the mtime of its source file,
+    recompiling it if the file changed since it was compiled
+    """
+    cached = _compiled.get(template_name)
+    if cached is not None:
+        template, mtime = cached
+        if _mtime(template) == mtime:
+            return template, mtime
+
+    backend = engines["django"]
+    # Only used to locate the source: loaders may hand back a stale compiled
+    # copy of their own
+    origin = backend.get_template(template_name).origin
+    source = origin.loader.get_contents(origin)
+    template = Template(
+        CompiledTemplate(source, origin, template_name, backend.engine), backend
+    )
+    mtime = _mtime(template)
+    _compiled.set(template_name, (template, mtime))
+    return template, mtime
+
+
+def render_static(template_name: str) -> str:
+    """
+    Renders a template that takes no context, once per version of its file
+    """
+    template, mtime = get_compiled_template(template_name)
+    key = (template_name, mtime)
+    rendered = _rendered.get(key)
+    if rendered is None:
+        rendered = template.render()
+        _rendered.set(key, rendered)
+    return rendered
+
+
+def clear() -> None:
+    _compiled.clear()
+    _rendered.clear()
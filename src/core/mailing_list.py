@@ -0,0 +1,255 @@
+"""
+Reconciles the Mailchimp list with our confirmed users.
+
+`sync` streams the users with a verified email in keyset-paginated batches
+and compares each with the local snapshot of the list (`MailingListMember`).
+Only new or changed members are pushed, through Mailchimp's batch operations
+endpoint: one upsert per member, `SYNC_BATCH_SIZE` per batch operation.
+Upserts only set the status of new members, so people who unsubscribed in
+Mailchimp stay unsubscribed.
+
+The snapshot is updated from the results of each batch operation, so a
+member whose upsert failed is retried by the next sync. `refresh_snapshot`
+rebuilds it from the members actually on the list.
+
+The sync only adds and updates members, it never removes any: users who are
+deactivated, deleted or lose their verified email stay on the list, and in
+the snapshot. The list isn't only fed by the sync (members can be added in
+Mailchimp, and `refresh_snapshot` takes in everyone on it), so a snapshot
+member without a confirmed user isn't necessarily one of ours to archive.
+Remove them in Mailchimp, then refresh the snapshot.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import tarfile
+import time
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+from allauth.account.models import EmailAddress
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.integrations import get_mailchimp, get_session
+from core.models import MailingListMember
+
+logger = logging.getLogger(__name__)
+
+SYNC_BATCH_SIZE = 500
+# Seconds a sync may take, under the 300s timeout of the bulk cluster it's
+# scheduled on
+SYNC_TIMEOUT = 240
+# Members read per page when refreshing the snapshot (Mailchimp allows 1000)
+MEMBERS_PAGE_SIZE = 1000
+
+
+class SyncResult(NamedTuple):
+    users: int
+    changed: int
+    synced: int
+    failed: int
+
+
+def subscriber_hash(email: str) -> str:
+    return hashlib.md5(email.lower().encode()).hexdigest()
+
+
+def member_digest(email: str, first_name: str, last_name: str) -> str:
+    data = json.dumps([email.lower(), first_name, last_name])
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+def confirmed_users(batch_size: int) -> Iterator[List[Tuple[int, str, str, str]]]:
+    """
+    Yields `(id, email, first_name, last_name)` of every active user with a
+    verified email, `batch_size` at a time
+    """
+    users = User.objects.filter(
+        Exists(EmailAddress.objects.filter(user=OuterRef("pk"), verified=True)),
+        is_active=True,
+    ).exclude(email="")
+
+    last_id = 0
+    while True:
+        batch = list(
+            users.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "email", "first_name", "last_name")[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def changed_members(batch: List[Tuple[int, str, str, str]]) -> Dict[str, tuple]:
+    """
+    Returns `{subscriber_hash: (digest, member)}` for the users of `batch`
+    that aren't in the snapshot as they are now
+    """
+    members = {}
+    for _, email, first_name, last_name in batch:
+        member = {
+            "email_address": email,
+            "status_if_new": "subscribed",
+            "merge_fields": {"FNAME": first_name, "LNAME": last_name},
+        }
+        digest = member_digest(email, first_name, last_name)
+        members[subscriber_hash(email)] = (digest, member)
+
+    synced = MailingListMember.objects.filter(
+        subscriber_hash__in=list(members)
+    ).values_list("subscriber_hash", "digest")
+    for key, digest in synced:
+        if members[key][0] == digest:
+            del members[key]
+    return members
+
+
+def start_batch(members: Dict[str, tuple]) -> str:
+    """
+    Starts a batch operation upserting `members`. Returns its id
+    """
+    operations = [
+        {
+            "method": "PUT",
+            "path": f"/lists/{settings.MAILCHIMP_LIST_ID}/members/{key}",
+            "operation_id": key,
+            "body": json.dumps(member),
+        }
+        for key, (_, member) in members.items()
+    ]
+    return get_mailchimp().batch_operations.create({"operations": operations})["id"]
+
+
+def wait_for_batches(
+    pending: Dict[str, Dict[str, str]], deadline: float, poll_interval: float
+) -> Iterator[Tuple[dict, Dict[str, str]]]:
+    """
+    Yields each batch of `pending` (`{batch id: digests}`) with its digests
+    as soon as it's finished, until `deadline` (`time.monotonic`)
+    """
+    pending = dict(pending)
+    while True:
+        for batch_id in list(pending):
+            batch = get_mailchimp().batch_operations.get(batch_id)
+            if batch["status"] == "finished":
+                yield batch, pending.pop(batch_id)
+        if not pending:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(
+                f"Mailchimp batches {', '.join(pending)} didn't finish in time"
+            )
+        time.sleep(poll_interval)
+
+
+def succeeded_operations(batch: dict) -> set:
+    """
+    Returns the ids of the operations of a finished batch that succeeded,
+    read from its results archive
+    """
+    res = get_session("mailchimp").get(batch["response_body_url"])
+    res.raise_for_status()
+
+    succeeded = set()
+    with tarfile.open(fileobj=io.BytesIO(res.content), mode="r:gz") as archive:
+        for entry in archive:
+            if not entry.isfile() or not entry.name.endswith(".json"):
+                continue
+            for result in json.load(archive.extractfile(entry)):
+                if result["status_code"] < 400:
+                    succeeded.add(result["operation_id"])
+                else:
+                    logger.warning(
+                        f"Mailchimp rejected member {result['operation_id']}: "
+                        f"{result.get('response')}"
+                    )
+    return succeeded
+
+
+def save_snapshot(digests: Dict[str, str]) -> None:
+    now = timezone.now()
+    MailingListMember.objects.bulk_create(
+        [
+            MailingListMember(subscriber_hash=key, digest=digest, synced_at=now)
+            for key, digest in digests.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["subscriber_hash"],
+        update_fields=["digest", "synced_at"],
+        batch_size=SYNC_BATCH_SIZE,
+    )
+
+
+def sync(
+    batch_size: int = SYNC_BATCH_SIZE,
+    timeout: float = SYNC_TIMEOUT,
+    poll_interval: float = 5,
+) -> SyncResult:
+    """
+    Pushes the confirmed users that are new or changed since the last sync to
+    the Mailchimp list. Raises `TimeoutError` if Mailchimp hasn't run every
+    batch `timeout` seconds after starting, once the finished ones are saved
+    """
+    deadline = time.monotonic() + timeout
+    users = changed = 0
+    pending = {}  # batch id -> {subscriber_hash: digest}
+    for batch in confirmed_users(batch_size):
+        users += len(batch)
+        members = changed_members(batch)
+        if members:
+            changed += len(members)
+            pending[start_batch(members)] = {
+                key: digest for key, (digest, _) in members.items()
+            }
+
+    # Mailchimp runs the batches in the background, in parallel
+    synced = 0
+    for batch, digests in wait_for_batches(pending, deadline, poll_interval):
+        succeeded = (
+            succeeded_operations(batch) if batch["errored_operations"] else digests
+        )
+        synced_digests = {key: digests[key] for key in digests if key in succeeded}
+        save_snapshot(synced_digests)
+        synced += len(synced_digests)
+
+    result = SyncResult(users, changed, synced, changed - synced)
+    logger.info(f"Synced the mailing list: {result}")
+    return result
+
+
+def refresh_snapshot() -> int:
+    """
+    Replaces the snapshot with the members currently on the Mailchimp list.
+    Returns how many there are
+    """
+    client = get_mailchimp()
+    digests = {}
+    offset = 0
+    while True:
+        page = client.lists.members.all(
+            settings.MAILCHIMP_LIST_ID,
+            count=MEMBERS_PAGE_SIZE,
+            offset=offset,
+            fields="members.email_address,members.merge_fields,total_items",
+        )
+        for member in page["members"]:
+            fields = member.get("merge_fields", {})
+            email = member["email_address"]
+            digests[subscriber_hash(email)] = member_digest(
+                email, fields.get("FNAME", ""), fields.get("LNAME", "")
+            )
+        offset += MEMBERS_PAGE_SIZE
+        if offset >= page["total_items"]:
+            break
+
+    with transaction.atomic():
+        MailingListMember.objects.all().delete()
+        save_snapshot(digests)
+    return len(digests)
@@ -0,0 +1,147 @@
+import re
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.hash_worker import run_hasher
+
+# OWASP's minimum Argon2id configuration: 19 MiB with 2 iterations
+MIN_MEMORY_COST = 19456
+MIN_TIME_COST = 2
+
+PASSWORD = "calibrate-hasher-password"
+SALT = "calibratehashersalt"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks Argon2 on this machine and recommends the ARGON2_* settings "
+        "that make a password verification take about --target-ms"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Verification time to aim for, in milliseconds (default: 250)",
+        )
+        parser.add_argument(
+            "--max-memory",
+            type=int,
+            default=65536,
+            help="Upper bound for memory_cost in KiB (default: 65536)",
+        )
+        parser.add_argument(
+            "--parallelism",
+            type=int,
+            default=settings.ARGON2_PARALLELISM,
+            help="Argon2 lanes (default: ARGON2_PARALLELISM)",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=5,
+            help="Hashes timed per candidate; the median is used (default: 5)",
+        )
+        parser.add_argument(
+            "--write",
+            nargs="?",
+            const=str(settings.BASE_DIR.parent / ".env"),
+            metavar="ENV_FILE",
+            help="Store the result in an env file (default: the project's .env)",
+        )
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        max_memory = options["max_memory"]
+        parallelism = options["parallelism"]
+        samples = options["samples"]
+        if max_memory < MIN_MEMORY_COST:
+            raise CommandError(f"--max-memory must be at least {MIN_MEMORY_COST}")
+
+        current = (
+            settings.ARGON2_TIME_COST,
+            settings.ARGON2_MEMORY_COST,
+            settings.ARGON2_PARALLELISM,
+        )
+        self.report("Current", current, self.measure(current, samples))
+
+        # Spend the budget on memory first (that's what makes GPU attacks
+        # expensive), then on iterations once memory is capped
+        time_cost = MIN_TIME_COST
+        elapsed = self.measure((time_cost, MIN_MEMORY_COST, parallelism), samples)
+        memory_cost = int(MIN_MEMORY_COST * target / elapsed)
+        memory_cost = max(MIN_MEMORY_COST, min(max_memory, memory_cost // 1024 * 1024))
+        elapsed = self.measure((time_cost, memory_cost, parallelism), samples)
+        if elapsed < target:
+            time_cost = max(time_cost, round(time_cost * target / elapsed))
+
+        params = (time_cost, memory_cost, parallelism)
+        elapsed = self.measure(params, samples)
+        self.report("Calibrated", params, elapsed)
+        if elapsed > target * 1.5:
+            self.stderr.write(
+                self.style.WARNING(
+                    "This machine can't reach the target with OWASP's minimum "
+                    "parameters; using the minimum"
+                )
+            )
+
+        settings_lines = {
+            "ARGON2_TIME_COST": time_cost,
+            "ARGON2_MEMORY_COST": memory_cost,
+            "ARGON2_PARALLELISM": parallelism,
+        }
+        if options["write"]:
+            self.write_env(Path(options["write"]), settings_lines)
+            self.stdout.write(self.style.SUCCESS(f"Updated {options['write']}"))
+        else:
+            for name, value in settings_lines.items():
+                self.stdout.write(f"{name}={value}")
+
+        if params != current:
+            self.stdout.write(
+                "Existing passwords are rehashed with the new parameters when "
+                "their owners next log in."
+            )
+
+    def measure(self, params: tuple, samples: int) -> float:
+        """
+        Returns the median time, in seconds, of verifying a hash made with
+        `params`
+        """
+        encoded, _, _ = run_hasher(time.time(), "encode", params, PASSWORD, SALT)
+        timings = []
+        for _ in range(samples):
+            started_at = time.perf_counter()
+            run_hasher(time.time(), "verify", params, PASSWORD, encoded)
+            timings.append(time.perf_counter() - started_at)
+        return statistics.median(timings)
+
+    def report(self, label: str, params: tuple, elapsed: float) -> None:
+        time_cost, memory_cost, parallelism = params
+        self.stdout.write(
+            f"{label}: time_cost={time_cost} memory_cost={memory_cost} "
+            f"parallelism={parallelism} -> {elapsed * 1000:.0f}ms"
+        )
+
+    def write_env(self, path: Path, values: dict) -> None:
+        """
+        Replaces the given variables in the env file at `path`, appending the
+        ones it doesn't define yet
+        """
+        contents = path.read_text() if path.exists() else ""
+        for name, value in values.items():
+            line = f"{name}={value}"
+            pattern = re.compile(rf"^{name}=.*$", re.MULTILINE)
+            if pattern.search(contents):
+                contents = pattern.sub(line, contents)
+            else:
+                if contents and not contents.endswith("\n"):
+                    contents += "\n"
+                contents += line + "\n"
+        path.write_text(contents)
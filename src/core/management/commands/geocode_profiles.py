@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import geo, zipcodes
+from core.cache import bump_profile_version
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills in the coordinates of profiles from their zip codes, using the "
+        "offline zip code centroids"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Profiles read and updated per query (default: 1000)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also profiles that already have coordinates, e.g. after the "
+            "centroids were updated",
+        )
+
+    def handle(self, *args, **options):
+        if zipcodes.get_index() is None:
+            raise CommandError(f"No zip centroids at {settings.ZIP_CENTROIDS_PATH}")
+
+        profiles = Profile.objects.exclude(zipcode=None).exclude(zipcode="")
+        if not options["all"]:
+            profiles = profiles.filter(latitude=None)
+
+        geocoded = unknown = 0
+        for batch in self.batches(profiles, options["batch_size"]):
+            located = []
+            for profile in batch:
+                coordinates = zipcodes.centroid(profile.zipcode)
+                if coordinates is None:
+                    unknown += 1
+                    continue
+                profile.latitude, profile.longitude = coordinates
+                profile.geohash = geo.encode(*coordinates)
+                located.append(profile)
+
+            Profile.objects.bulk_update(located, ["latitude", "longitude", "geohash"])
+            # `bulk_update` doesn't send `post_save`
+            for profile in located:
+                bump_profile_version(profile.user_id)
+            geocoded += len(located)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Geocoded {geocoded} profiles, {unknown} unknown zip codes"
+            )
+        )
+
+    def batches(self, profiles, batch_size: int):
+        last_pk = 0
+        while True:
+            batch = list(
+                profiles.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("user_id", "zipcode", "latitude", "longitude", "geohash")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
@@ -0,0 +1,57 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.queues import queue_stats
+
+COLUMNS = (
+    "queue",
+    "workers",
+    "queued",
+    "running",
+    "oldest_wait",
+    "done",
+    "mean_latency",
+    "max_latency",
+)
+
+
+def format_value(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the depth of every task queue and how long its tasks wait. "
+        "Latencies are in seconds, from being queued to being done"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="Window of finished tasks the latencies are computed over "
+            "(default: 60)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the stats as JSON"
+        )
+
+    def handle(self, *args, **options):
+        stats = queue_stats(since=timedelta(minutes=options["minutes"]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(stats))
+            return
+
+        self.stdout.write("".join(f"{column:>14}" for column in COLUMNS))
+        for row in stats:
+            self.stdout.write(
+                "".join(f"{format_value(row[column]):>14}" for column in COLUMNS)
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the profile search index, e.g. after profiles were written "
+        "without signals (bulk_create, update)"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(f"Indexed {Profile.objects.count()} profiles")
@@ -0,0 +1,134 @@
+from collections import Counter
+from typing import Tuple
+
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    get_hashers,
+    identify_hasher,
+)
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.authentication import invalidate_user_state
+from core.hashers import WrappedLegacyPasswordHasher
+
+COST_FIELDS = ("iterations", "work_factor", "time_cost", "memory_cost", "parallelism")
+
+
+def describe(encoded: str) -> Tuple[str, str]:
+    """
+    Returns the algorithm and cost parameters of a stored password
+    """
+    if not encoded or encoded.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return "unusable", ""
+    try:
+        hasher = identify_hasher(encoded)
+        decoded = hasher.decode(encoded)
+    except (ValueError, AssertionError):
+        return "unknown", ""
+    cost = ",".join(f"{f}={decoded[f]}" for f in COST_FIELDS if f in decoded)
+    return hasher.algorithm, cost
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports how stored passwords are hashed and wraps legacy BCrypt/PBKDF2 "
+        "hashes in Argon2, so users who don't log in are upgraded too. Prints "
+        "its progress, to resume an interrupted run with --start-after"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users read and updated per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Only print the algorithm/cost histogram, don't change anything",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Only rehash the users after this id, where an interrupted run got to",
+        )
+
+    def handle(self, *args, **options):
+        self.report_only = options["report"]
+        self.wrappers = {
+            hasher.legacy_hasher.algorithm: hasher
+            for hasher in get_hashers()
+            if isinstance(hasher, WrappedLegacyPasswordHasher)
+        }
+
+        # The report always covers every user; only rehashing resumes
+        last_pk = 0 if self.report_only else options["start_after"]
+        if last_pk:
+            self.stdout.write(f"Starting after user {last_pk}")
+
+        histogram = Counter()
+        wrapped = 0
+        for batch in self.batches(last_pk, options["batch_size"]):
+            histogram.update(describe(password) for _, password in batch)
+            if not self.report_only:
+                wrapped += self.wrap_batch(batch)
+                # Wrapping is idempotent, so resuming from an earlier user
+                # only costs a rescan
+                self.stdout.write(f"Done up to user {batch[-1][0]}")
+
+        self.print_histogram(histogram)
+        if not self.report_only:
+            self.stdout.write(self.style.SUCCESS(f"Wrapped {wrapped} legacy hashes"))
+
+    def batches(self, last_pk: int, batch_size: int):
+        """
+        Streams `(pk, password)` pairs in primary key order, one batch at a time
+        """
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "password")[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1][0]
+
+    def wrap_batch(self, batch: list) -> int:
+        # Hash first so the transaction stays short
+        wrapped = []
+        for pk, password in batch:
+            algorithm, _ = describe(password)
+            wrapper = self.wrappers.get(algorithm)
+            if wrapper is not None:
+                wrapped.append((pk, password, wrapper.wrap(password)))
+
+        updated = []
+        with transaction.atomic():
+            for pk, password, new_password in wrapped:
+                # Skip the row if the user changed their password meanwhile
+                if User.objects.filter(pk=pk, password=password).update(
+                    password=new_password
+                ):
+                    updated.append(pk)
+
+        # `update` doesn't send `post_save`
+        if updated:
+            invalidate_user_state(*updated)
+        return len(updated)
+
+    def print_histogram(self, histogram: Counter) -> None:
+        total = sum(histogram.values())
+        self.stdout.write("Stored password hashes before this run:")
+        self.stdout.write(f"{'algorithm':<24}{'cost':<44}{'users':>10}")
+        for (algorithm, cost), count in sorted(
+            histogram.items(), key=lambda item: -item[1]
+        ):
+            bar = "#" * round(40 * count / total)
+            self.stdout.write(f"{algorithm:<24}{cost:<44}{count:>10}  {bar}")
+        self.stdout.write(f"{'total':<68}{total:>10}")
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from core import dead_letters
+from core.models import DeadLetter
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs failed background tasks (dead letters) again, in parallel batches "
+        "at a limited rate. Tasks that succeed are deleted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--task",
+            help="Only replay this task (dotted path, e.g. core.tasks.send_welcome_email)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Dead letters read and replayed per batch (default: 100)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Tasks running at the same time (default: 4)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=10,
+            help="Most tasks started per second, 0 for no limit (default: 10)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            help="Skip dead letters that already failed this many times",
+        )
+
+    def handle(self, *args, **options):
+        letters = DeadLetter.objects.order_by("pk")
+        if options["task"]:
+            letters = letters.filter(task=options["task"])
+        if options["max_attempts"]:
+            letters = letters.filter(attempts__lt=options["max_attempts"])
+
+        succeeded = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(letters.filter(pk__gt=last_pk)[: options["batch_size"]])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            result = dead_letters.replay(
+                batch, concurrency=options["concurrency"], rate=options["rate"]
+            )
+            succeeded += result.succeeded
+            failed += result.failed
+            self.stdout.write(f"{succeeded} succeeded, {failed} failed")
+
+        self.stdout.write(
+            f"Replayed {succeeded + failed} tasks: {succeeded} succeeded, "
+            f"{failed} failed"
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core import mailing_list
+
+
+class Command(BaseCommand):
+    help = (
+        "Pushes the confirmed users that are new or changed since the last sync "
+        "to the Mailchimp list, using batch operations"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=mailing_list.SYNC_BATCH_SIZE,
+            help="Users read and pushed per batch operation "
+            f"(default: {mailing_list.SYNC_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--refresh-snapshot",
+            action="store_true",
+            help="First rebuild the local snapshot from the members on the list",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=mailing_list.SYNC_TIMEOUT,
+            help="Seconds the sync may take, waiting for Mailchimp to run the "
+            f"batches (default: {mailing_list.SYNC_TIMEOUT})",
+        )
+
+    def handle(self, *args, **options):
+        if options["refresh_snapshot"]:
+            members = mailing_list.refresh_snapshot()
+            self.stdout.write(f"{members} members on the list")
+
+        result = mailing_list.sync(
+            batch_size=options["batch_size"], timeout=options["timeout"]
+        )
+        self.stdout.write(
+            f"{result.users} confirmed users, {result.changed} new or changed, "
+            f"{result.synced} synced, {result.failed} failed"
+        )
@@ -0,0 +1,76 @@
+"""
+Lightweight in-process metrics.
+
+Counters and timing summaries are kept per process (see `snapshot`). When a
+Sentry transaction is active the values are also attached to it as
+measurements, which is where they get aggregated across workers.
+"""
+
+import threading
+from typing import Dict
+
+import sentry_sdk
+
+
+class Summary:
+    """
+    Count, total, min and max of a series of observations
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self) -> dict:
+        mean = self.total / self.count if self.count else None
+        return {
+            "count": self.count,
+            "mean": mean,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_timings: Dict[str, Summary] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def timing(name: str, seconds: float) -> None:
+    """
+    Records a duration, in seconds
+    """
+    with _lock:
+        _timings.setdefault(name, Summary()).observe(seconds)
+
+    sentry_sdk.set_measurement(name, seconds * 1000, "millisecond")
+
+
+def snapshot() -> dict:
+    """
+    Returns every counter and timing summary recorded by this process
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timings": {name: summary.as_dict() for name, summary in _timings.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_auto_20190610_1152'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingSideEffect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=32)),
+                ('email', models.EmailField(max_length=254)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'id'], name='core_pendin_kind_ff5b9b_idx')],
+            },
+        ),
+    ]
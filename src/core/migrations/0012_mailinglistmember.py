@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailingListMember',
+            fields=[
+                ('subscriber_hash', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('digest', models.CharField(max_length=16)),
+                ('synced_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# `auth.User` belongs to another app, so its indexes can't be declared on the
+# model; these are created (and dropped) directly
+USER_INDEXES = [
+    # Exact lookups: signup's duplicate check, the admin profile API
+    models.Index(fields=["email"], name="auth_user_email_idx"),
+    # Case-insensitive lookups (`email__iexact` is `UPPER(email) = UPPER(%s)`
+    # on PostgreSQL)
+    models.Index(Upper("email"), name="auth_user_email_upper_idx"),
+]
+
+
+def add_indexes(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    for index in USER_INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_indexes(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    for index in USER_INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_profile_indexes"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [migrations.RunPython(add_indexes, remove_indexes)]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+# `core.geo.encode` as of this migration
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(latitude, longitude, length=9):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    is_lon = True
+    while len(chars) < length:
+        interval, coordinate = (
+            (lon_range, longitude) if is_lon else (lat_range, latitude)
+        )
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        is_lon = not is_lon
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def fill_geohashes(apps, schema_editor):
+    Profile = apps.get_model("core", "Profile")
+    profiles = Profile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("latitude", "longitude")
+    batch = []
+    for profile in profiles.iterator(chunk_size=2000):
+        profile.geohash = encode(profile.latitude, profile.longitude)
+        batch.append(profile)
+        if len(batch) == 2000:
+            Profile.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    Profile.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_user_email_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='profile',
+            name='profile_mentor_idx',
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('is_mentor', True)), fields=['geohash'], name='profile_mentor_geohash_idx'),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+KINDS = {
+    "programming_languages": "programming_language",
+    "disciplines": "discipline",
+    "interests": "interest",
+}
+# Tag.name's max_length
+NAME_LENGTH = 100
+
+
+# `split` and `tag_name` of `core.tags` as of this migration
+def split(value):
+    labels = {}
+    for label in (value or "").split(","):
+        label = " ".join(label.split())
+        if label:
+            labels.setdefault(tag_name(label), label)
+    return list(labels.values())
+
+
+def tag_name(label):
+    return " ".join(label.split()).lower()[:NAME_LENGTH]
+
+
+def fill_tags(apps, schema_editor):
+    Profile = apps.get_model("core", "Profile")
+    Tag = apps.get_model("core", "Tag")
+    ProfileTag = apps.get_model("core", "ProfileTag")
+    profiles = Profile.objects.values_list("pk", *KINDS)
+
+    tag_ids = {}
+    batch = []
+    for pk, *values in profiles.iterator(chunk_size=2000):
+        names = {
+            (kind, tag_name(label))
+            for kind, value in zip(KINDS.values(), values)
+            for label in split(value)
+        }
+        missing = names - tag_ids.keys()
+        if missing:
+            Tag.objects.bulk_create([Tag(kind=kind, name=name) for kind, name in missing])
+            for tag in Tag.objects.filter(name__in={name for _, name in missing}):
+                tag_ids[tag.kind, tag.name] = tag.pk
+        batch.extend(ProfileTag(profile_id=pk, tag_id=tag_ids[name]) for name in names)
+        if len(batch) >= 2000:
+            ProfileTag.objects.bulk_create(batch)
+            batch = []
+    ProfileTag.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_profile_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('programming_language', 'Programming Language'), ('discipline', 'Discipline'), ('interest', 'Interest')], max_length=32)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'db_table': 'tag',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'name'), name='tag_kind_name_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.profile')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.tag')),
+            ],
+            options={
+                'db_table': 'profile_tag',
+            },
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='profiles', through='core.ProfileTag', to='core.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='profiletag',
+            index=models.Index(fields=['tag', 'profile'], name='profile_tag_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='profiletag',
+            constraint=models.UniqueConstraint(fields=('profile', 'tag'), name='profile_tag_profile_tag_uniq'),
+        ),
+        migrations.RunPython(fill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The index of `core.search` as of this migration
+CREATE_SQL = {
+    "postgresql": "CREATE INDEX profile_search_vector_idx ON profile "
+    "USING gin (search_vector)",
+    "sqlite": "CREATE VIRTUAL TABLE profile_search USING fts5("
+    "name, email, company, mos, bio, tokenize = 'porter unicode61')",
+}
+
+DROP_SQL = {
+    "postgresql": "DROP INDEX IF EXISTS profile_search_vector_idx",
+    "sqlite": "DROP TABLE IF EXISTS profile_search",
+}
+
+INDEX_SQL = {
+    "postgresql": r"""
+UPDATE profile SET search_vector =
+    setweight(to_tsvector('english', concat_ws(' ',
+        auth_user.first_name, auth_user.last_name,
+        regexp_replace(auth_user.email, '[\W_]+', ' ', 'g'))), 'A')
+    || setweight(to_tsvector('english', concat_ws(' ',
+        profile.company_name, profile.company_role,
+        profile.military_occupational_specialty)), 'B')
+    || setweight(to_tsvector('english', coalesce(profile.bio, '')), 'C')
+FROM auth_user
+WHERE auth_user.id = profile.user_id
+""",
+    "sqlite": """
+INSERT INTO profile_search (rowid, name, email, company, mos, bio)
+SELECT
+    profile.id,
+    auth_user.first_name || ' ' || auth_user.last_name,
+    auth_user.email,
+    coalesce(profile.company_name, '') || ' ' || coalesce(profile.company_role, ''),
+    coalesce(profile.military_occupational_specialty, ''),
+    coalesce(profile.bio, '')
+FROM profile JOIN auth_user ON auth_user.id = profile.user_id
+""",
+}
+
+
+def create_search_index(apps, schema_editor):
+    # A GIN index on PostgreSQL, an FTS5 table on SQLite, filled with every
+    # profile
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL[vendor])
+        cursor.execute(INDEX_SQL[vendor])
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(DROP_SQL[schema_editor.connection.vendor])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSearch',
+            fields=[
+                ('profile', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='core.profile')),
+            ],
+            options={
+                'db_table': 'profile_search',
+                'managed': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
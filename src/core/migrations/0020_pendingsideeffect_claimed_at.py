@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_profile_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingsideeffect',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from core import geo
+
 
 class Profile(models.Model):
     """
@@ -15,6 +19,8 @@ class Profile(models.Model):
     zipcode = models.CharField(max_length=512, blank=True, null=True)
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
+    # Of `latitude` and `longitude`, kept up to date by `save`. See `core.geo`
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
     remember_created_at = models.DateTimeField(blank=True, null=True)
     sign_in_count = models.IntegerField(blank=True, null=True)
     is_mentor = models.BooleanField(blank=True, null=True, default=False)
@@ -53,11 +59,46 @@ class Profile(models.Model):
 
     slack_id = models.CharField(max_length=16, blank=True)
 
+    # What the profile is found by, on PostgreSQL. See `core.search`
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Of `programming_languages`, `disciplines` and `interests`. See `core.tags`
+    tags = models.ManyToManyField(
+        "Tag", through="ProfileTag", related_name="profiles", blank=True
+    )
+
     def __str__(self):
         return f"Username: {self.user} Slack ID: {self.slack_id}"
 
+    def save(self, *args, **kwargs):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ""
+        else:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = "profile"
+        # Filtered on by `ProfileAdmin.list_filter` and the profile export
+        indexes = [
+            # Mentors are a small minority, and `is_mentor = true` compiles to
+            # a bare `WHERE is_mentor`, which SQLite only matches to a partial
+            # index. Also serves the nearby mentor search (`core.geo.nearby_mentors`)
+            models.Index(
+                fields=["geohash"],
+                condition=Q(is_mentor=True),
+                name="profile_mentor_geohash_idx",
+            ),
+            models.Index(fields=["state"], name="profile_state_idx"),
+            models.Index(
+                fields=["military_status"], name="profile_military_status_idx"
+            ),
+            models.Index(fields=["created_at"], name="profile_created_at_idx"),
+        ]
 
 
 @receiver(post_save, sender=User)
@@ -72,6 +113,66 @@ def create_profile(instance: User, created: bool, **kwargs: dict) -> None:
             Profile.objects.create(user=instance)
 
 
+class Tag(models.Model):
+    """
+    Programming language, discipline or interest of profiles. Names are
+    lowercase, see `core.tags`
+    """
+
+    class Kind(models.TextChoices):
+        PROGRAMMING_LANGUAGE = "programming_language"
+        DISCIPLINE = "discipline"
+        INTEREST = "interest"
+
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"{self.kind}: {self.name}"
+
+    class Meta:
+        db_table = "tag"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "name"], name="tag_kind_name_uniq")
+        ]
+
+
+class ProfileSearch(models.Model):
+    """
+    Row of `profile_search`, the FTS5 table searched on SQLite, created by
+    migration 0019. See `core.search`
+    """
+
+    profile = models.OneToOneField(
+        Profile,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_entry",
+    )
+
+    class Meta:
+        managed = False
+        db_table = "profile_search"
+
+
+class ProfileTag(models.Model):
+    # Both columns are covered by the composite indexes below
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, db_index=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        db_table = "profile_tag"
+        constraints = [
+            # Also the index of a profile's tags
+            models.UniqueConstraint(
+                fields=["profile", "tag"], name="profile_tag_profile_tag_uniq"
+            )
+        ]
+        # The profiles with a tag, for `core.tags.filter_by_tags`
+        indexes = [models.Index(fields=["tag", "profile"], name="profile_tag_tag_idx")]
+
+
 class OldUserObj(models.Model):
     email = models.CharField(unique=True, max_length=256, blank=True, null=True)
     zip = models.CharField(max_length=256, blank=True, null=True)
@@ -127,3 +228,74 @@ class OldUserObj(models.Model):
     class Meta:
         managed = False
         db_table = "users"
+
+
+class PendingSideEffect(models.Model):
+    """
+    Signup side effect (welcome email, slack invite, mailing list
+    subscription) waiting to be sent in a batch. See `core.batching`
+    """
+
+    kind = models.CharField(max_length=32)
+    email = models.EmailField(max_length=254)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Failed sends; moved to the dead letters after SIDE_EFFECT_MAX_ATTEMPTS
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a flush took it to send, see `core.batching.claim`
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.kind}: {self.email}"
+
+    class Meta:
+        indexes = [models.Index(fields=["kind", "id"])]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Task already queued for an email, so a repeated signal doesn't queue it
+    again before `expires_at`. See `core.idempotency`
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class MailingListMember(models.Model):
+    """
+    Snapshot of a member of the Mailchimp list as last synced, so the sync
+    only pushes what changed. See `core.mailing_list`
+    """
+
+    # Mailchimp's member id: MD5 of the lowercased email
+    subscriber_hash = models.CharField(max_length=32, primary_key=True)
+    # Hash of the synced email and merge fields
+    digest = models.CharField(max_length=16)
+    synced_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.subscriber_hash
+
+
+class DeadLetter(models.Model):
+    """
+    Call of a background task that failed, kept to be replayed from the admin
+    or with `manage.py replay_dead_letters`. See `core.dead_letters`
+    """
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+    # Hash of the task and its arguments; repeated failures of the same call
+    # are counted on the same row
+    fingerprint = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    failed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.task}{tuple(self.args)}"
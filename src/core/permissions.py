@@ -1,15 +1,57 @@
-from django.contrib.auth.models import Group
+from typing import FrozenSet
+
+from django.conf import settings
 from rest_framework import permissions
 
+from core.cache import LRUCache
+
+# Maps user ids -> frozenset of group names. Entries are invalidated by the
+# `m2m_changed`/`Group` receivers in `core.handlers`; the TTL bounds staleness
+# for changes made in other processes.
+group_cache = LRUCache(maxsize=settings.GROUP_CACHE_SIZE, ttl=settings.GROUP_CACHE_TTL)
+
+
+def get_group_names(user) -> FrozenSet[str]:
+    """
+    Returns the names of every group the user belongs to.
+
+    Resolved at most once per request (memoized on the user instance) and
+    shared between requests through `group_cache`.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, "_group_names", None)
+    if names is not None:
+        return names
+
+    names = group_cache.get(user.pk)
+    if names is None:
+        names = frozenset(user.groups.values_list("name", flat=True))
+        group_cache.set(user.pk, names)
+
+    user._group_names = names
+    return names
+
+
+def invalidate_group_cache(*user_ids: int) -> None:
+    """
+    Drops the cached group memberships for the given users, or for every user
+    when no ids are given
+    """
+    if not user_ids:
+        group_cache.clear()
+        return
+
+    for user_id in user_ids:
+        group_cache.delete(user_id)
+
 
 def is_in_group(user, group_name):
     """
     Takes a user and a group name, returns `True` if the user is in that group
     """
-    try:
-        return Group.objects.get(name=group_name).user_set.filter(id=user.id).exists()
-    except Group.DoesNotExist:
-        return None
+    return group_name in get_group_names(user)
 
 
 class HasGroupPermission(permissions.BasePermission):
@@ -0,0 +1,104 @@
+"""
+Named django-q queues.
+
+Each queue is served by its own `qcluster` (`Q_CLUSTER_NAME=<queue> python
+manage.py qcluster`) with the worker count and timeouts set for it in
+`Q_CLUSTER["ALT_CLUSTERS"]`, so a slow Mailchimp sync on the `bulk` queue
+can't hold up the emails and invites on the `critical` one. Tasks queued
+without a queue go to the default cluster (`Q_CLUSTER["name"]`).
+"""
+
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import (
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Q,
+)
+from django.utils import timezone
+from django_q.models import OrmQ, Task
+
+from core import metrics
+
+CRITICAL = "critical"
+BULK = "bulk"
+
+
+def default_queue() -> str:
+    return settings.Q_CLUSTER["name"]
+
+
+def queue_names() -> List[str]:
+    return [default_queue(), *settings.Q_CLUSTER.get("ALT_CLUSTERS", {})]
+
+
+def queue_setting(name: str, key: str):
+    """
+    Returns the `Q_CLUSTER` setting `key` of queue `name`, from its
+    `ALT_CLUSTERS` entry or else the default cluster's
+    """
+    conf = settings.Q_CLUSTER.get("ALT_CLUSTERS", {}).get(name, {})
+    return conf.get(key, settings.Q_CLUSTER.get(key))
+
+
+def queue_workers(name: str) -> Optional[int]:
+    return queue_setting(name, "workers")
+
+
+def record_wait(task: dict) -> None:
+    """
+    Records how long `task` waited in its queue before a worker picked it up
+    (django-q sets `started` when the task is queued)
+    """
+    queue = task.get("cluster") or default_queue()
+    wait = (timezone.now() - task["started"]).total_seconds()
+    metrics.timing(f"queue.{queue}.wait", wait)
+
+
+def queue_stats(since: timedelta = timedelta(hours=1)) -> List[dict]:
+    """
+    Returns the depth and latency of every queue:
+
+    - `queued`: tasks waiting for a worker, and `oldest_wait`, the seconds the
+      oldest of them has been waiting
+    - `running`: tasks picked up by a worker and not acknowledged yet
+    - `done`, `mean_latency` and `max_latency`: tasks finished within
+      `since`, and the seconds from being queued to being done
+    """
+    now = timezone.now()
+    latency = ExpressionWrapper(F("stopped") - F("started"), DurationField())
+
+    stats = []
+    for name in queue_names():
+        pending = OrmQ.objects.filter(key=name)
+        oldest = pending.filter(lock__lte=now).aggregate(oldest=Min("lock"))["oldest"]
+        finished = Task.objects.filter(stopped__gte=now - since)
+        if name == default_queue():
+            # Tasks queued without a cluster are saved without one
+            finished = finished.filter(Q(cluster__isnull=True) | Q(cluster=name))
+        else:
+            finished = finished.filter(cluster=name)
+        done = finished.aggregate(
+            count=Count("id"), mean=Avg(latency), max=Max(latency)
+        )
+
+        stats.append(
+            {
+                "queue": name,
+                "workers": queue_workers(name),
+                "queued": pending.filter(lock__lte=now).count(),
+                "running": pending.filter(lock__gt=now).count(),
+                "oldest_wait": (now - oldest).total_seconds() if oldest else None,
+                "done": done["count"],
+                "mean_latency": done["mean"].total_seconds() if done["mean"] else None,
+                "max_latency": done["max"].total_seconds() if done["max"] else None,
+            }
+        )
+    return stats
@@ -0,0 +1,153 @@
+"""
+Full-text search over profiles: their user's name and email, company, MOS
+and bio.
+
+On PostgreSQL, the searchable text of each profile is kept as a weighted
+`tsvector` in `Profile.search_vector`, behind a GIN index. On SQLite, it's
+kept in `profile_search`, an FTS5 table whose rowids are profile ids
+(`ProfileSearch`). Either way, migration `0019_profile_search` creates it,
+`core.handlers` updates it whenever a profile or its user is saved, and
+`manage.py rebuild_search_index` rebuilds it from scratch.
+
+Searches match every word of the query, as a prefix ("jo smi" finds John
+Smith), best matches first: names and emails weigh the most, then company
+and MOS, then bio.
+"""
+
+import re
+from typing import List
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+# Saving these fields changes what a profile is found by
+USER_FIELDS = {"first_name", "last_name", "email"}
+PROFILE_FIELDS = {
+    "company_name",
+    "company_role",
+    "military_occupational_specialty",
+    "bio",
+}
+
+# Most words of a query used
+MAX_TERMS = 10
+
+# Column weights of `profile_search`, for `bm25`
+SQLITE_WEIGHTS = "10.0, 10.0, 5.0, 5.0, 1.0"
+
+POSTGRES_INDEX_SQL = r"""
+UPDATE profile SET search_vector =
+    setweight(to_tsvector('english', concat_ws(' ',
+        auth_user.first_name, auth_user.last_name,
+        -- Emails are split into words, like on SQLite
+        regexp_replace(auth_user.email, '[\W_]+', ' ', 'g'))), 'A')
+    || setweight(to_tsvector('english', concat_ws(' ',
+        profile.company_name, profile.company_role,
+        profile.military_occupational_specialty)), 'B')
+    || setweight(to_tsvector('english', coalesce(profile.bio, '')), 'C')
+FROM auth_user
+WHERE auth_user.id = profile.user_id
+"""
+
+SQLITE_INDEX_SQL = """
+INSERT INTO profile_search (rowid, name, email, company, mos, bio)
+SELECT
+    profile.id,
+    auth_user.first_name || ' ' || auth_user.last_name,
+    auth_user.email,
+    coalesce(profile.company_name, '') || ' ' || coalesce(profile.company_role, ''),
+    coalesce(profile.military_occupational_specialty, ''),
+    coalesce(profile.bio, '')
+FROM profile JOIN auth_user ON auth_user.id = profile.user_id
+WHERE 1 = 1
+"""
+
+
+def update_index(condition: str = "", params: tuple = ()) -> None:
+    """
+    Indexes the profiles matching `condition` (SQL on the `profile` and
+    `auth_user` tables) as they are now
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(POSTGRES_INDEX_SQL + condition, params)
+        else:
+            cursor.execute(
+                "DELETE FROM profile_search WHERE rowid IN "
+                f"(SELECT profile.id FROM profile JOIN auth_user "
+                f"ON auth_user.id = profile.user_id WHERE 1 = 1 {condition})",
+                params,
+            )
+            cursor.execute(SQLITE_INDEX_SQL + condition, params)
+
+
+def index_profile(profile_id: int) -> None:
+    update_index("AND profile.id = %s", (profile_id,))
+
+
+def index_user(user_id: int) -> None:
+    update_index("AND profile.user_id = %s", (user_id,))
+
+
+def remove_profile(profile_id: int) -> None:
+    """
+    Only needed on SQLite, the `tsvector` goes with the profile's row
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM profile_search WHERE rowid = %s", (profile_id,))
+
+
+def rebuild() -> None:
+    """
+    Indexes every profile, dropping what's indexed now
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM profile_search")
+    update_index()
+
+
+def terms(query: str) -> List[str]:
+    """
+    Returns the words searched for by `query`, ignoring any search syntax
+    """
+    return re.findall(r"[^\W_]+", query.lower())[:MAX_TERMS]
+
+
+def search_profiles(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Narrows `queryset` (of profiles) to the ones matching every word of
+    `query`, annotated with their `rank` (higher is better)
+    """
+    words = terms(query)
+    if not words:
+        return queryset.annotate(rank=Value(0.0)).none()
+
+    if connection.vendor == "postgresql":
+        search_query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            config="english",
+            search_type="raw",
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    # Every word is quoted, so it's never read as FTS5 syntax
+    match = " ".join(f'"{word}"*' for word in words)
+    return (
+        queryset.filter(search_entry__isnull=False)
+        .filter(
+            RawSQL("profile_search MATCH %s", (match,), output_field=BooleanField())
+        )
+        .annotate(
+            rank=RawSQL(
+                f"-bm25(profile_search, {SQLITE_WEIGHTS})",
+                (),
+                output_field=FloatField(),
+            )
+        )
+    )
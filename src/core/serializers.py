@@ -8,7 +8,10 @@ from dj_rest_auth.serializers import (
 from dj_rest_auth.serializers import UserDetailsSerializer as BaseUserDetailsSerializer
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.serializers import raise_errors_on_nested_writes
+from rest_framework.utils import model_meta
 
+from core import search, tags, zipcodes
 from core.models import Profile
 
 
@@ -90,10 +93,181 @@ class RegisterSerializer(BaseRegisterSerializer):
 UserModel = get_user_model()
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ChangedFieldsUpdateMixin:
+    """
+    `ModelSerializer.update` that writes back only the fields whose values
+    actually changed (via `save(update_fields=...)`), and skips the write
+    entirely when nothing did
+    """
+
+    def update(self, instance, validated_data: dict):
+        raise_errors_on_nested_writes("update", self, validated_data)
+        info = model_meta.get_field_info(instance)
+
+        changed = []
+        m2m_fields = []
+        for attr, value in validated_data.items():
+            relation = info.relations.get(attr)
+            if relation and relation.to_many:
+                m2m_fields.append((attr, value))
+                continue
+
+            if relation:
+                # Compare the raw foreign key to avoid fetching the related row
+                current = instance.serializable_value(attr)
+                new = value.pk if value is not None else None
+            else:
+                current, new = getattr(instance, attr), value
+
+            if current != new:
+                setattr(instance, attr, value)
+                changed.append(attr)
+
+        if changed:
+            instance.save(update_fields=changed)
+
+        for attr, value in m2m_fields:
+            getattr(instance, attr).set(value)
+
+        return instance
+
+
+class ProfileSerializer(ChangedFieldsUpdateMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Profile
+        exclude = ("tags", "search_vector")
+
+    def validate(self, data):
+        for field in tags.TAG_FIELDS.keys() & data.keys():
+            data[field] = tags.normalize(data[field])
+        return data
+
+    def create(self, validated_data: dict):
+        profile = super().create(validated_data)
+        tags.sync_tags(profile)
+        return profile
+
+    def update(self, instance: Profile, validated_data: dict):
+        changed_tags = [
+            field
+            for field in tags.TAG_FIELDS.keys() & validated_data.keys()
+            if validated_data[field] != getattr(instance, field)
+        ]
+        # The coordinates follow the zip code, unless they're set with it
+        zipcode = validated_data.get("zipcode", instance.zipcode)
+        if zipcode != instance.zipcode and not (
+            {"latitude", "longitude"} & validated_data.keys()
+        ):
+            coordinates = zipcodes.locate(zipcode)
+            if coordinates is not None:
+                validated_data["latitude"], validated_data["longitude"] = coordinates
+        instance = super().update(instance, validated_data)
+        tags.sync_tags(instance, changed_tags)
+        return instance
+
+
+class ProfileExportSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(source="user.email", read_only=True)
+    first_name = serializers.CharField(source="user.first_name", read_only=True)
+    last_name = serializers.CharField(source="user.last_name", read_only=True)
+
     class Meta:
         model = Profile
-        fields = "__all__"
+        exclude = ("tags", "search_vector")
+
+
+# noinspection PyAbstractClass
+class TagFilterSerializer(serializers.Serializer):
+    """
+    Comma separated tags, every one of them required. See `core.tags`
+    """
+
+    programming_languages = serializers.CharField(required=False)
+    disciplines = serializers.CharField(required=False)
+    interests = serializers.CharField(required=False)
+
+
+# noinspection PyAbstractClass
+class ProfileExportFilterSerializer(TagFilterSerializer):
+    """
+    Validates the query params filtering a profile export
+    """
+
+    is_mentor = serializers.BooleanField(required=False)
+    military_status = serializers.CharField(required=False)
+    branch_of_service = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class ProfileSearchResultSerializer(ProfileExportSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+
+# noinspection PyAbstractClass
+class ProfileSearchQuerySerializer(serializers.Serializer):
+    """
+    Validates the query params of a profile search
+    """
+
+    q = serializers.CharField()
+
+    def validate_q(self, value: str) -> str:
+        if not search.terms(value):
+            raise serializers.ValidationError("Search for at least one word")
+        return value
+
+
+class MentorSerializer(serializers.ModelSerializer):
+    first_name = serializers.CharField(source="user.first_name", read_only=True)
+    last_name = serializers.CharField(source="user.last_name", read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = (
+            "id",
+            "first_name",
+            "last_name",
+            "city",
+            "state",
+            "zipcode",
+            "bio",
+            "slack_id",
+            "branch_of_service",
+            "programming_languages",
+            "disciplines",
+            "interests",
+        )
+
+
+class NearbyMentorSerializer(MentorSerializer):
+    distance = serializers.SerializerMethodField()
+
+    class Meta(MentorSerializer.Meta):
+        fields = (*MentorSerializer.Meta.fields, "distance")
+
+    def get_distance(self, profile: Profile) -> float:
+        return round(profile.distance, 1)
+
+
+# noinspection PyAbstractClass
+class NearbyMentorsQuerySerializer(TagFilterSerializer):
+    """
+    Validates the query params of a nearby mentor search. Distances are in
+    miles
+    """
+
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    radius = serializers.FloatField(min_value=0, max_value=500, default=25)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, data):
+        if ("latitude" in data) != ("longitude" in data):
+            raise serializers.ValidationError(
+                "Both latitude and longitude are required"
+            )
+        return data
 
 
 class UserDetailsSerializer(BaseUserDetailsSerializer):
@@ -116,7 +290,7 @@ class UserDetailsSerializer(BaseUserDetailsSerializer):
         return representation
 
 
-class UserSerializer(BaseUserDetailsSerializer):
+class UserSerializer(ChangedFieldsUpdateMixin, BaseUserDetailsSerializer):
     profile = ProfileSerializer()
 
     class Meta:
@@ -0,0 +1,128 @@
+"""
+Tags: the programming languages, disciplines and interests of profiles.
+
+The API still reads and writes them as comma separated strings
+(`Profile.programming_languages`, ...). `ProfileSerializer` normalizes those
+strings when they're written (trimmed, deduplicated regardless of case) and
+mirrors them as `Tag` rows linked to the profile by `ProfileTag`, so
+filtering on a tag reads the `(tag, profile)` index of the join table instead
+of scanning every profile with `LIKE '%python%'`.
+"""
+
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Q, QuerySet
+
+from core.models import Profile, ProfileTag, Tag
+
+# Profile field -> kind of its tags
+TAG_FIELDS = {
+    "programming_languages": Tag.Kind.PROGRAMMING_LANGUAGE,
+    "disciplines": Tag.Kind.DISCIPLINE,
+    "interests": Tag.Kind.INTEREST,
+}
+
+
+def split(value: Optional[str]) -> List[str]:
+    """
+    Returns the distinct labels of a comma separated string, in order.
+    Labels differing only by case count as the same, the first one wins
+    """
+    labels = {}
+    for label in (value or "").split(","):
+        label = " ".join(label.split())
+        if label:
+            labels.setdefault(tag_name(label), label)
+    return list(labels.values())
+
+
+def tag_name(label: str) -> str:
+    """
+    Returns the name of the tag for `label`
+    """
+    return " ".join(label.split()).lower()[: Tag._meta.get_field("name").max_length]
+
+
+def normalize(value: Optional[str]) -> Optional[str]:
+    """
+    Returns `value` as it's stored: its distinct labels, joined by ", "
+    """
+    if value is None:
+        return None
+    return ", ".join(split(value))
+
+
+def profile_tag_names(profile: Profile, fields: Iterable[str]) -> Set[Tuple[str, str]]:
+    return {
+        (TAG_FIELDS[field], tag_name(label))
+        for field in fields
+        for label in split(getattr(profile, field))
+    }
+
+
+def get_or_create_tags(names: Set[Tuple[str, str]]) -> List[int]:
+    """
+    Returns the ids of the tags with `(kind, name)` in `names`, creating the
+    missing ones
+    """
+    if not names:
+        return []
+    Tag.objects.bulk_create(
+        [Tag(kind=kind, name=name) for kind, name in names], ignore_conflicts=True
+    )
+    return list(Tag.objects.filter(tag_lookup(names)).values_list("pk", flat=True))
+
+
+def tag_lookup(names: Set[Tuple[str, str]]) -> Q:
+    return reduce(or_, (Q(kind=kind, name=name) for kind, name in names))
+
+
+def sync_tags(profile: Profile, fields: Iterable[str] = TAG_FIELDS) -> None:
+    """
+    Links `profile` to the tags of its `fields`, and only those
+    """
+    fields = list(fields)
+    if not fields:
+        return
+    tag_ids = get_or_create_tags(profile_tag_names(profile, fields))
+
+    ProfileTag.objects.filter(
+        profile=profile, tag__kind__in=[TAG_FIELDS[field] for field in fields]
+    ).exclude(tag_id__in=tag_ids).delete()
+    ProfileTag.objects.bulk_create(
+        [ProfileTag(profile=profile, tag_id=tag_id) for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+
+
+def selected_tags(params: dict) -> Dict[str, str]:
+    """
+    Returns the tag filters of validated query `params`
+    """
+    return {field: params[field] for field in TAG_FIELDS if field in params}
+
+
+def filter_by_tags(queryset: QuerySet, selected: Dict[str, str]) -> QuerySet:
+    """
+    Narrows `queryset` (of profiles) to the ones with every tag of `selected`,
+    `{field: comma separated labels}`
+    """
+    names = {
+        (TAG_FIELDS[field], tag_name(label))
+        for field, value in selected.items()
+        for label in split(value)
+    }
+    if not names:
+        return queryset
+
+    tag_ids = list(Tag.objects.filter(tag_lookup(names)).values_list("pk", flat=True))
+    if len(tag_ids) < len(names):
+        # Nobody has a tag that doesn't exist
+        return queryset.none()
+    for tag_id in tag_ids:
+        queryset = queryset.filter(
+            pk__in=ProfileTag.objects.filter(tag_id=tag_id).values("profile_id")
+        )
+    return queryset
@@ -1,35 +1,43 @@
 import logging
+from typing import List
 
 import requests
+from anymail.message import AnymailMessage
 from django.conf import settings
 from django.contrib.auth.models import User as AuthUser
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from mailchimp3 import MailChimp
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from mailchimp3.mailchimpclient import MailChimpError
+
+from core import mailing_list
+from core.batching import BatchFailed
+from core.dead_letters import capture_failures
+from core.integrations import get_mailchimp, get_session
+from core.mail import render_static
 
 logger = logging.getLogger(__name__)
 
+# Anymail recipient statuses of emails that weren't sent
+REJECTED_STATUSES = {"invalid", "rejected", "failed"}
+
 
+@capture_failures
 def send_welcome_email(email: str) -> None:
     logger.info(f"Sending welcome email to: {email}")
 
-    email_string = render_to_string("registration/welcome.html")
-    text_string = render_to_string("registration/welcome.txt")
-    try:
-        response = send_mail(
-            "Welcome to Operation Code!",
-            text_string,
-            "staff@operationcode.org",
-            [email],
-            html_message=email_string,
-            fail_silently=False,
-        )
-        logger.info(f"Email to {email} response", response)
-
-    except Exception as e:  # pragma: no cover
-        logger.exception("Exception trying to send welcome email to user", e)
+    email_string = render_static("registration/welcome.html")
+    text_string = render_static("registration/welcome.txt")
+    response = send_mail(
+        "Welcome to Operation Code!",
+        text_string,
+        "staff@operationcode.org",
+        [email],
+        html_message=email_string,
+        fail_silently=False,
+    )
+    logger.info(f"Email to {email} response", response)
 
 
+@capture_failures
 def send_slack_invite_job(email: str) -> None:
     """
     Background task that sends pybot a request triggering an invite for
@@ -37,29 +45,25 @@ def send_slack_invite_job(email: str) -> None:
 
     :param email: Email the user signed up with
     """
-    try:
-        logger.info(f"Sending slack invite for email: {email}")
-        url = f"{settings.PYBOT_URL}/pybot/api/v1/slack/invite"
-        headers = {"Authorization": f"Bearer {settings.PYBOT_AUTH_TOKEN}"}
-        res = requests.post(url, json={"email": email}, headers=headers)
-
-        logger.info("Slack invite response:", res)
-    except Exception as e:  # pragma: no cover
-        logger.exception(
-            f"Exception while trying to send slack invite for email {email}", e
-        )
+    logger.info(f"Sending slack invite for email: {email}")
+    url = f"{settings.PYBOT_URL}/pybot/api/v1/slack/invite"
+    headers = {"Authorization": f"Bearer {settings.PYBOT_AUTH_TOKEN}"}
+    res = get_session("pybot").post(url, json={"email": email}, headers=headers)
+    res.raise_for_status()
+
+    logger.info("Slack invite response:", res)
 
 
+@capture_failures
 def add_user_to_mailing_list(email: str) -> None:
     """
     Adds the new user's email to our mailchimp list (which should trigger a
     welcome email)
     """
-    try:
-        user = AuthUser.objects.get(email=email)
+    user = AuthUser.objects.get(email=email)
 
-        client = MailChimp(settings.MAILCHIMP_API_KEY)
-        res = client.lists.members.create(
+    try:
+        res = get_mailchimp().lists.members.create(
             settings.MAILCHIMP_LIST_ID,
             {
                 "email_address": email,
@@ -67,7 +71,142 @@ def add_user_to_mailing_list(email: str) -> None:
                 "merge_fields": {"FNAME": user.first_name, "LNAME": user.last_name},
             },
         )
+    except MailChimpError as e:
+        error = e.args[0] if e.args and isinstance(e.args[0], dict) else {}
+        if error.get("title") == "Member Exists":
+            logger.info(f"{email} is already on the email list")
+            return
+        raise
+
+    logger.info("Added user to email list.  Response: ", res)
+
+
+# Batch versions of the tasks above, sent by `core.batching.flush`. Unlike the
+# single tasks they raise on failure (`BatchFailed` with the emails that
+# failed, when the others went through), so what failed stays queued and is
+# retried (and becomes dead letters after `SIDE_EFFECT_MAX_ATTEMPTS`)
+
+
+def send_welcome_emails(emails: List[str]) -> None:
+    """
+    Sends the welcome email to every address in `emails`. With Mandrill
+    (anymail) this is a single batch send API call; other backends send one
+    message per user over a single connection
+    """
+    logger.info(f"Sending {len(emails)} welcome emails")
+
+    email_string = render_static("registration/welcome.html")
+    text_string = render_static("registration/welcome.txt")
 
-        logger.info("Added user to email list.  Response: ", res)
-    except Exception as e:  # pragma: no cover
-        logger.exception(f"Exception while adding email {email} to mailing list.", e)
+    if settings.EMAIL_BACKEND.startswith("anymail."):
+        message = AnymailMessage(
+            "Welcome to Operation Code!",
+            text_string,
+            "staff@operationcode.org",
+            emails,
+        )
+        message.attach_alternative(email_string, "text/html")
+        # Setting merge data makes it a batch send: every recipient gets
+        # their own copy and doesn't see the others
+        message.merge_data = {email: {} for email in emails}
+        message.send()
+        failed = {
+            email: status.status
+            for email, status in message.anymail_status.recipients.items()
+            if status.status in REJECTED_STATUSES
+        }
+    else:
+        failed = {}
+        with get_connection() as connection:
+            for email in emails:
+                message = EmailMultiAlternatives(
+                    "Welcome to Operation Code!",
+                    text_string,
+                    "staff@operationcode.org",
+                    [email],
+                    connection=connection,
+                )
+                message.attach_alternative(email_string, "text/html")
+                try:
+                    message.send()
+                except Exception as e:
+                    logger.warning(f"Welcome email to {email} failed: {e}")
+                    failed[email] = str(e)
+    if failed:
+        raise BatchFailed(failed)
+
+
+def send_slack_invites(emails: List[str]) -> None:
+    """
+    Asks pybot to send a slack invite to every address in `emails`, over
+    the pooled pybot connection (pybot has no batch endpoint)
+    """
+    logger.info(f"Sending {len(emails)} slack invites")
+    url = f"{settings.PYBOT_URL}/pybot/api/v1/slack/invite"
+    headers = {"Authorization": f"Bearer {settings.PYBOT_AUTH_TOKEN}"}
+
+    session = get_session("pybot")
+    failed = {}
+    for email in emails:
+        try:
+            res = session.post(url, json={"email": email}, headers=headers)
+            res.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Slack invite for {email} failed: {e}")
+            failed[email] = str(e)
+    if failed:
+        raise BatchFailed(failed)
+
+
+def add_users_to_mailing_list(emails: List[str]) -> None:
+    """
+    Subscribes every address in `emails` to our mailchimp list with one
+    batch call (mailchimp accepts up to 500 members per call)
+    """
+    names = {
+        email: (first_name, last_name)
+        for email, first_name, last_name in AuthUser.objects.filter(
+            email__in=emails
+        ).values_list("email", "first_name", "last_name")
+    }
+    members = [
+        {
+            "email_address": email,
+            "status": "subscribed",
+            "merge_fields": {"FNAME": first_name, "LNAME": last_name},
+        }
+        for email, (first_name, last_name) in names.items()
+    ]
+
+    client = get_mailchimp()
+    failed = {}
+    for start in range(0, len(members), 500):
+        chunk = members[start : start + 500]
+        try:
+            res = client.lists.update_members(
+                settings.MAILCHIMP_LIST_ID,
+                {"members": chunk, "update_existing": False},
+            )
+        except (MailChimpError, requests.RequestException) as e:
+            logger.warning(f"Adding {len(chunk)} users to the email list failed: {e}")
+            failed.update(dict.fromkeys((m["email_address"] for m in chunk), str(e)))
+            continue
+
+        logger.info(
+            f"Added {res.get('total_created')} users to email list, "
+            f"{res.get('error_count')} errors"
+        )
+        for error in res.get("errors", []):
+            # Already subscribed is as good as added
+            if error.get("error_code") != "ERROR_CONTACT_EXISTS":
+                failed[error["email_address"]] = error.get("error", "")
+    if failed:
+        raise BatchFailed(failed)
+
+
+def sync_mailing_list() -> None:
+    """
+    Scheduled task pushing the confirmed users missing from (or outdated on)
+    the mailchimp list, see `core.mailing_list`
+    """
+    mailing_list.sync()
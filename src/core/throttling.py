@@ -0,0 +1,112 @@
+"""
+Rate limits for the authentication endpoints.
+"""
+
+import hashlib
+import math
+from typing import Optional
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+from core import metrics
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Approximate sliding-window limiter that keeps two integers per key: the
+    request counts of the current and the previous fixed window. The count
+    over the last `duration` seconds is estimated as
+
+        previous * (share of the previous window still in range) + current
+
+    Unlike DRF's `SimpleRateThrottle` (which stores every request timestamp)
+    each check is constant time and space no matter the rate. The counters
+    live in the `shared` cache directly; the in-process L1 in front of
+    `default` would hide other workers' increments.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches["shared"]
+
+    def allow_request(self, request, view) -> bool:
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f"{self.key}:{window}"
+        counts = self.cache.get_many([f"{self.key}:{window - 1}", current_key])
+        self.previous = counts.get(f"{self.key}:{window - 1}", 0)
+        self.current = counts.get(current_key, 0)
+        self.elapsed = self.now - window * self.duration
+
+        if self.estimate() >= self.num_requests:
+            metrics.increment(f"throttle.{self.scope}.rejected")
+            return False
+
+        # Both windows must be around for the whole next window
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            # Expired between `add` and `incr`
+            self.cache.set(current_key, 1, timeout=2 * self.duration)
+        return True
+
+    def estimate(self) -> float:
+        overlap = (self.duration - self.elapsed) / self.duration
+        return self.previous * overlap + self.current
+
+    def wait(self) -> Optional[float]:
+        """
+        Seconds until the estimate drops below the limit
+        """
+        until_next_window = self.duration - self.elapsed
+        if self.current >= self.num_requests or not self.previous:
+            return max(1, math.ceil(until_next_window))
+
+        # Solve previous * (until_next_window - t) / duration + current < limit
+        wait = (
+            until_next_window
+            - (self.num_requests - self.current) * self.duration / self.previous
+        )
+        return max(1, math.ceil(wait))
+
+
+class LoginRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limits login attempts per client IP and email, so one account can't be
+    guessed at quickly
+    """
+
+    scope = "login"
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        data = request.data if isinstance(request.data, dict) else {}
+        email = data.get("email") or data.get("username") or ""
+        digest = hashlib.sha256(str(email).strip().lower().encode()).hexdigest()[:32]
+        ident = f"{self.get_ident(request)}:{digest}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limits login attempts per client IP across all emails, which is what a
+    credential stuffing run from one host looks like
+    """
+
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view) -> Optional[str]:
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
@@ -1,11 +1,12 @@
 from dj_rest_auth.registration.views import VerifyEmailView
 from dj_rest_auth.views import PasswordChangeView
 from dj_rest_auth.views import PasswordResetConfirmView as RestPasswordResetConfirmView
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
 from . import views
+from .async_views import async_view
 
 urlpatterns = [
     # Custom password reset confirm view that handles allauth's UID encoding
@@ -32,16 +33,33 @@ urlpatterns = [
         name="rest_password_change",
     ),
     path("auth/verify-email/", VerifyEmailView.as_view(), name="rest_verify_email"),
-    path("auth/token/refresh", TokenRefreshView.as_view(), name="refresh_jwt"),
+    path(
+        "auth/token/refresh",
+        async_view(TokenRefreshView.as_view()),
+        name="refresh_jwt",
+    ),
     path("auth/token/verify", TokenVerifyView.as_view(), name="verify_jwt"),
     path("auth/registration/", views.RegisterView.as_view(), name="rest_register"),
-    path("auth/profile/", views.UpdateProfile.as_view(), name="update_profile"),
+    path(
+        "auth/profile/",
+        async_view(views.UpdateProfile.as_view()),
+        name="update_profile",
+    ),
     path(
         "auth/profile/admin/",
         views.AdminUpdateProfile.as_view(),
         name="admin_update_profile",
     ),
-    path("auth/user/", views.UserView.as_view(), name="view_user"),
+    path("auth/profiles/", views.ProfileExport.as_view(), name="export_profiles"),
+    path("profiles/nearby", views.NearbyMentors.as_view(), name="nearby_mentors"),
+    path("profiles/mentors", views.Mentors.as_view(), name="mentors"),
+    path("profiles/search", views.ProfileSearch.as_view(), name="search_profiles"),
+    path("auth/user/", async_view(views.UserView.as_view()), name="view_user"),
+    # Shadows dj_rest_auth's login route so it can be throttled and served
+    # asynchronously
+    re_path(
+        r"^auth/login/?$", async_view(views.LoginView.as_view()), name="rest_login"
+    ),
     # Used by allauth to send the "verification email sent" response to client
     path(
         "auth/account-email-verification-sent",
@@ -1,25 +1,58 @@
 from allauth.account import app_settings as allauth_settings
 from allauth.account.utils import url_str_to_user_pk
 from dj_rest_auth.registration.views import RegisterView as BaseRegisterView
+from dj_rest_auth.views import LoginView as BaseLoginView
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.contrib.auth.views import (
     PasswordResetConfirmView as DjangoPasswordResetConfirmView,
 )
+from django.core.cache import cache
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from django.views.decorators.debug import sensitive_post_parameters
-from drf_yasg.openapi import IN_QUERY, TYPE_STRING, Parameter
+from drf_yasg.openapi import (
+    FORMAT_DATETIME,
+    IN_QUERY,
+    TYPE_BOOLEAN,
+    TYPE_INTEGER,
+    TYPE_NUMBER,
+    TYPE_STRING,
+    Parameter,
+)
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.exceptions import NotFound, ValidationError
-from rest_framework.generics import RetrieveUpdateAPIView
+from rest_framework.generics import ListAPIView, RetrieveUpdateAPIView
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from core import geo, search, tags
+from core.cache import make_etag, response_cache_key
+from core.exports import (
+    CSVRenderer,
+    NDJSONRenderer,
+    ProfileCursorPagination,
+    filter_profiles,
+    stream_profiles,
+)
 from core.models import Profile
 from core.permissions import HasGroupPermission
 from core.serializers import (
+    MentorSerializer,
+    NearbyMentorSerializer,
+    NearbyMentorsQuerySerializer,
+    ProfileExportFilterSerializer,
+    ProfileExportSerializer,
+    ProfileSearchQuerySerializer,
+    ProfileSearchResultSerializer,
     ProfileSerializer,
+    TagFilterSerializer,
     UserSerializer,
 )
+from core.throttling import LoginIPRateThrottle, LoginRateThrottle
 
 sensitive_param = method_decorator(
     sensitive_post_parameters("password"), name="dispatch"
@@ -33,8 +66,106 @@ email_param = Parameter(
     type=TYPE_STRING,
 )
 
+tag_params = [
+    Parameter(
+        field,
+        IN_QUERY,
+        "Comma separated, only profiles with all of them",
+        type=TYPE_STRING,
+    )
+    for field in tags.TAG_FIELDS
+]
+
+export_params = [
+    Parameter("is_mentor", IN_QUERY, "Only mentors, or non-mentors", type=TYPE_BOOLEAN),
+    Parameter("military_status", IN_QUERY, "Exact match", type=TYPE_STRING),
+    Parameter("branch_of_service", IN_QUERY, "Exact match", type=TYPE_STRING),
+    Parameter(
+        "created_after",
+        IN_QUERY,
+        "Profiles created at or after",
+        type=TYPE_STRING,
+        format=FORMAT_DATETIME,
+    ),
+    Parameter(
+        "created_before",
+        IN_QUERY,
+        "Profiles created before",
+        type=TYPE_STRING,
+        format=FORMAT_DATETIME,
+    ),
+    Parameter(
+        "format",
+        IN_QUERY,
+        "`ndjson` or `csv` streams every matching profile in one response",
+        type=TYPE_STRING,
+        enum=["json", NDJSONRenderer.format, CSVRenderer.format],
+    ),
+    *tag_params,
+]
+
+nearby_params = [
+    Parameter(
+        "latitude", IN_QUERY, "Defaults to the user's location", type=TYPE_NUMBER
+    ),
+    Parameter(
+        "longitude", IN_QUERY, "Defaults to the user's location", type=TYPE_NUMBER
+    ),
+    Parameter("radius", IN_QUERY, "In miles, 25 by default", type=TYPE_NUMBER),
+    Parameter("limit", IN_QUERY, "20 by default, at most 100", type=TYPE_INTEGER),
+    *tag_params,
+]
+
+search_params = [
+    Parameter(
+        "q",
+        IN_QUERY,
+        "Words of names, emails, companies, MOS or bios, all of them matched "
+        "as prefixes",
+        required=True,
+        type=TYPE_STRING,
+    ),
+    Parameter("page", IN_QUERY, "Page number", type=TYPE_INTEGER),
+    Parameter("limit", IN_QUERY, "20 by default, at most 100", type=TYPE_INTEGER),
+]
+
+mentor_params = [
+    *tag_params,
+    Parameter("limit", IN_QUERY, "20 by default, at most 100", type=TYPE_INTEGER),
+]
+
+
+class CachedRetrieveMixin:
+    """
+    Serves `GET` from a per-user response cache keyed on the user's profile
+    version stamp (bumped by the `post_save` receivers in `core.handlers`).
 
-class UpdateProfile(RetrieveUpdateAPIView):
+    Responses carry a strong `ETag`; a matching `If-None-Match` gets a
+    `304 Not Modified` without fetching or serializing the object.
+    """
+
+    cache_namespace = None
+
+    def get_cache_user_id(self) -> int:
+        return self.request.user.pk
+
+    def retrieve(self, request, *args, **kwargs):
+        key = response_cache_key(self.cache_namespace, self.get_cache_user_id())
+        cached = cache.get(key)
+        if cached is None:
+            data = dict(self.get_serializer(self.get_object()).data)
+            cached = (make_etag(data), data)
+            cache.set(key, cached, settings.RESPONSE_CACHE_TTL)
+
+        etag, data = cached
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status=304, headers={"ETag": etag})
+
+        return Response(data, headers={"ETag": etag})
+
+
+class UpdateProfile(CachedRetrieveMixin, RetrieveUpdateAPIView):
     """
     API View for retrieving and updating the logged in user's profile info like
     military service details, current employment, etc
@@ -43,6 +174,7 @@ class UpdateProfile(RetrieveUpdateAPIView):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = (IsAuthenticated,)
+    cache_namespace = "profile"
 
     def get_object(self):
         """
@@ -54,7 +186,7 @@ class UpdateProfile(RetrieveUpdateAPIView):
         return obj
 
 
-class AdminUpdateProfile(RetrieveUpdateAPIView):
+class AdminUpdateProfile(CachedRetrieveMixin, RetrieveUpdateAPIView):
     """
     Read or update user profiles
     """
@@ -67,19 +199,32 @@ class AdminUpdateProfile(RetrieveUpdateAPIView):
         "PUT": ["ProfileAdmin"],
         "PATCH": ["ProfileAdmin"],
     }
+    cache_namespace = "profile"
 
-    def get_object(self):
+    def get_email(self) -> str:
         email = self.request.query_params.get("email")
-        if email:
-            try:
-                profile = Profile.objects.get(user__email=email)
-            except Profile.DoesNotExist:
-                raise NotFound
+        if not email:
+            raise ValidationError({"error": "Missing email query param"})
+        return email
 
-            self.check_permissions(self.request)
-            return profile
+    def get_cache_user_id(self) -> int:
+        user_id = (
+            Profile.objects.filter(user__email=self.get_email())
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is None:
+            raise NotFound
+        return user_id
 
-        raise ValidationError({"error": "Missing email query param"})
+    def get_object(self):
+        try:
+            profile = Profile.objects.get(user__email=self.get_email())
+        except Profile.DoesNotExist:
+            raise NotFound
+
+        self.check_permissions(self.request)
+        return profile
 
     @swagger_auto_schema(manual_parameters=[email_param])
     def get(self, request, *args, **kwargs):
@@ -94,10 +239,139 @@ class AdminUpdateProfile(RetrieveUpdateAPIView):
         return super().put(request, *args, **kwargs)
 
 
-class UserView(RetrieveUpdateAPIView):
+class ProfileExport(ListAPIView):
+    """
+    Export user profiles in bulk, a page at a time (following the `next`
+    cursor) or streamed as NDJSON or CSV
+    """
+
+    serializer_class = ProfileExportSerializer
+    permission_classes = (HasGroupPermission,)
+    required_groups = {"GET": ["ProfileAdmin"]}
+    pagination_class = ProfileCursorPagination
+    renderer_classes = (
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        NDJSONRenderer,
+        CSVRenderer,
+    )
+
+    def get_queryset(self):
+        filters = ProfileExportFilterSerializer(data=self.request.query_params.dict())
+        filters.is_valid(raise_exception=True)
+        return filter_profiles(filters.validated_data)
+
+    @swagger_auto_schema(manual_parameters=export_params)
+    def get(self, request, *args, **kwargs):
+        if isinstance(request.accepted_renderer, (NDJSONRenderer, CSVRenderer)):
+            return stream_profiles(self.get_queryset(), request.accepted_renderer)
+        return super().get(request, *args, **kwargs)
+
+
+class ProfileSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+class ProfileSearch(ListAPIView):
+    """
+    Search user profiles by name, email, company, MOS and bio, best matches
+    first
+    """
+
+    serializer_class = ProfileSearchResultSerializer
+    permission_classes = (HasGroupPermission,)
+    required_groups = {"GET": ["ProfileAdmin"]}
+    pagination_class = ProfileSearchPagination
+
+    def get_queryset(self):
+        params = ProfileSearchQuerySerializer(data=self.request.query_params.dict())
+        params.is_valid(raise_exception=True)
+        profiles = Profile.objects.select_related("user")
+        return search.search_profiles(profiles, params.validated_data["q"]).order_by(
+            "-rank", "pk"
+        )
+
+    @swagger_auto_schema(manual_parameters=search_params)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class NearbyMentors(ListAPIView):
+    """
+    List the mentors within a radius of a point (the user's own location by
+    default), closest first
+    """
+
+    serializer_class = NearbyMentorSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        params = NearbyMentorsQuerySerializer(data=self.request.query_params.dict())
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+
+        if "latitude" in query:
+            latitude, longitude = query["latitude"], query["longitude"]
+        else:
+            profile = self.request.user.profile
+            if profile.latitude is None or profile.longitude is None:
+                raise ValidationError(
+                    {"error": "Missing latitude and longitude query params"}
+                )
+            latitude, longitude = profile.latitude, profile.longitude
+
+        profiles = (
+            Profile.objects.filter(user__is_active=True)
+            .exclude(user=self.request.user)
+            .select_related("user")
+        )
+        profiles = tags.filter_by_tags(profiles, tags.selected_tags(query))
+        return geo.nearby_mentors(profiles, latitude, longitude, query["radius"])[
+            : query["limit"]
+        ]
+
+    @swagger_auto_schema(manual_parameters=nearby_params)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class MentorCursorPagination(ProfileCursorPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class Mentors(ListAPIView):
+    """
+    List the mentors with the given programming languages, disciplines and
+    interests, a page at a time (following the `next` cursor)
+    """
+
+    serializer_class = MentorSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = MentorCursorPagination
+
+    def get_queryset(self):
+        params = TagFilterSerializer(data=self.request.query_params.dict())
+        params.is_valid(raise_exception=True)
+
+        profiles = (
+            Profile.objects.filter(is_mentor=True, user__is_active=True)
+            .exclude(user=self.request.user)
+            .select_related("user")
+        )
+        return tags.filter_by_tags(profiles, tags.selected_tags(params.validated_data))
+
+    @swagger_auto_schema(manual_parameters=mentor_params)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class UserView(CachedRetrieveMixin, RetrieveUpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
+    cache_namespace = "user"
 
     def get_object(self):
         """
@@ -114,6 +388,15 @@ class RegisterView(BaseRegisterView):
     pass
 
 
+class LoginView(BaseLoginView):
+    """
+    Throttled before the request reaches the serializer, so rejected attempts
+    cost neither a password hash nor a database query
+    """
+
+    throttle_classes = (LoginRateThrottle, LoginIPRateThrottle)
+
+
 class PasswordResetConfirmView(DjangoPasswordResetConfirmView):
     """
     Custom password reset confirm view that handles allauth's UID encoding format.
@@ -0,0 +1,162 @@
+"""
+Offline zip code geocoding, from the centroids of the Census Bureau's ZIP
+Code Tabulation Areas.
+
+The centroids ship as a compact binary file (`ZIP_CENTROIDS_PATH`, built by
+`scripts/build_zip_centroids.py`): a header, then three arrays of the same
+length, little-endian: the sorted zip codes (uint32), their latitudes and
+their longitudes (int32, in millionths of a degree). It is memory-mapped the first time it's needed,
+once per process, and shared by every thread (and forked worker); a lookup is
+a binary search over the mapped zip codes.
+
+Without the file, nothing is geocoded.
+"""
+
+import bisect
+import logging
+import mmap
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ZIPC"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, count
+# Coordinates are stored in millionths of a degree
+SCALE = 1_000_000
+
+
+class ZipIndex:
+    """
+    Zip code centroids, read from a file written by `write_index`
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is not a version {VERSION} zip centroid index")
+        magic, version, count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} zip centroid index")
+        if len(self._mmap) != HEADER.size + 12 * count:
+            raise ValueError(f"{path} is truncated")
+
+        data = memoryview(self._mmap)[HEADER.size :]
+        size = 4 * count
+        self._zipcodes = self._array(data[:size], "I")
+        self._latitudes = self._array(data[size : 2 * size], "i")
+        self._longitudes = self._array(data[2 * size : 3 * size], "i")
+
+    @staticmethod
+    def _array(data: memoryview, typecode: str):
+        if sys.byteorder == "little":
+            return data.cast(typecode)
+        values = array(typecode, data)
+        values.byteswap()
+        return values
+
+    def __len__(self) -> int:
+        return len(self._zipcodes)
+
+    def get(self, zipcode: int) -> Optional[Tuple[float, float]]:
+        i = bisect.bisect_left(self._zipcodes, zipcode)
+        if i == len(self._zipcodes) or self._zipcodes[i] != zipcode:
+            return None
+        return self._latitudes[i] / SCALE, self._longitudes[i] / SCALE
+
+
+_index: Optional[ZipIndex] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def get_index() -> Optional[ZipIndex]:
+    """
+    Loads the index the first time it's called. None if there's no index, or
+    it can't be read
+    """
+    global _index, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                path = Path(settings.ZIP_CENTROIDS_PATH)
+                if path.exists():
+                    try:
+                        _index = ZipIndex(path)
+                    except ValueError:
+                        logger.exception(
+                            f"Invalid zip centroids at {path}, not geocoding"
+                        )
+                else:
+                    logger.warning(f"No zip centroids at {path}, not geocoding")
+                _loaded = True
+    return _index
+
+
+def reset_index() -> None:
+    """
+    Makes the next lookup load the index again, e.g. after replacing it
+    """
+    global _index, _loaded
+    with _lock:
+        _index, _loaded = None, False
+
+
+def parse(zipcode: Optional[str]) -> Optional[int]:
+    """
+    Returns the 5-digit zip code of "12345" or "12345-6789", None otherwise
+    """
+    zipcode = (zipcode or "").strip()[:5]
+    if len(zipcode) != 5 or not zipcode.isdigit():
+        return None
+    return int(zipcode)
+
+
+def centroid(zipcode: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Returns the latitude and longitude of the center of `zipcode`
+    """
+    index = get_index()
+    number = parse(zipcode)
+    if index is None or number is None:
+        return None
+    return index.get(number)
+
+
+def locate(zipcode: Optional[str]) -> Optional[Tuple[Optional[float], ...]]:
+    """
+    Returns the coordinates to store for `zipcode`: its centroid, or
+    `(None, None)` if it isn't a known zip code. None without an index
+    """
+    if get_index() is None:
+        return None
+    return centroid(zipcode) or (None, None)
+
+
+def write_index(path: Path, centroids: Iterable[Tuple[int, float, float]]) -> int:
+    """
+    Writes `(zip code, latitude, longitude)` centroids as an index. Returns
+    how many there are
+    """
+    centroids = sorted(centroids)
+    zipcodes = array("I", (zipcode for zipcode, _, _ in centroids))
+    latitudes = array("i", (round(lat * SCALE) for _, lat, _ in centroids))
+    longitudes = array("i", (round(lon * SCALE) for _, _, lon in centroids))
+    if sys.byteorder != "little":
+        for values in (zipcodes, latitudes, longitudes):
+            values.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(centroids)))
+        for values in (zipcodes, latitudes, longitudes):
+            values.tofile(f)
+    return len(centroids)
@@ -0,0 +1,19 @@
+# Gunicorn profile for serving the ASGI application with uvicorn workers.
+# The workers come from the `uvicorn-worker` package.
+#
+#   gunicorn operationcode_backend.asgi -c gunicorn_asgi_config.py
+#
+# Everything not overridden here comes from `gunicorn_config.py`.
+
+from gunicorn_config import *  # noqa: F401, F403
+
+#
+#   worker_class - uvicorn runs an event loop per worker; the auth views are
+#       offloaded to a bounded thread pool (`ASYNC_VIEW_THREADS`) so slow
+#       password hashing never blocks it.
+#
+#   threads - Unused by uvicorn workers.
+#
+
+worker_class = "uvicorn_worker.UvicornWorker"
+threads = 1
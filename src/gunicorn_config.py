@@ -186,6 +186,12 @@ proc_name = None
 #       A callable that takes a server and worker instance
 #       as arguments.
 #
+#   worker_exit - Called just after a worker has been exited, in the
+#       worker process.
+#
+#       A callable that takes a server and worker instance
+#       as arguments.
+#
 #   pre_fork - Called just prior to forking the worker subprocess.
 #
 #       A callable that accepts the same arguments as after_fork
@@ -200,6 +206,25 @@ proc_name = None
 def post_fork(server, worker):
     server.log.info("Worker spawned (pid: %s)", worker.pid)
 
+    # Each worker gets its own password hashing pool; never create it in the
+    # (preloaded) master process
+    from core.hashers import start_hashing_pool
+
+    start_hashing_pool()
+
+    # Runs queued tasks in this worker when TASKS_IN_PROCESS is on
+    from core.executor import start_task_executor
+
+    start_task_executor()
+
+
+def worker_exit(server, worker):
+    from core.executor import stop_task_executor
+    from core.hashers import hashing_pool
+
+    stop_task_executor()
+    hashing_pool.shutdown()
+
 
 def pre_fork(server, worker):
     pass
@@ -216,6 +241,11 @@ def when_ready(server):
 def worker_int(worker):
     worker.log.info("worker received INT or QUIT signal")
 
+    # Let the background tasks that are running finish
+    from core.executor import stop_task_executor
+
+    stop_task_executor()
+
     # get traceback info
     import sys
     import threading
@@ -234,3 +264,7 @@ def worker_int(worker):
 
 def worker_abort(worker):
     worker.log.info("worker received SIGABRT signal")
+
+    from core.executor import stop_task_executor
+
+    stop_task_executor()
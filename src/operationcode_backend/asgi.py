@@ -0,0 +1,18 @@
+"""
+ASGI config for operationcode_backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through it also enables the async auth views in `core.async_views`.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+os.environ.setdefault("ASYNC_VIEWS", "True")
+
+application = get_asgi_application()
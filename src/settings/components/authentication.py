@@ -34,11 +34,33 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Size of the per-worker process pool Argon2 hashes run in (0 hashes on the
+# request thread). See `core.hashers.PooledArgon2PasswordHasher`
+PASSWORD_HASH_PROCESSES = config("PASSWORD_HASH_PROCESSES", default=0, cast=int)
+# Hashes allowed to wait for a free process before requests get a 503
+PASSWORD_HASH_MAX_QUEUE = config("PASSWORD_HASH_MAX_QUEUE", default=4, cast=int)
+PASSWORD_HASH_TIMEOUT = config("PASSWORD_HASH_TIMEOUT", default=10, cast=int)
+PASSWORD_HASH_RETRY_AFTER = config("PASSWORD_HASH_RETRY_AFTER", default=1, cast=int)
+
+# Argon2 parameters of `core.hashers.TunedArgon2PasswordHasher`. Run
+# `manage.py calibrate_hasher` to pick values for the machine the app runs on;
+# existing hashes are upgraded on login when these change
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=19456, cast=int)  # KiB
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=1, cast=int)
+
 PASSWORD_HASHERS = [
     # Primary hasher for new passwords - Argon2 with tuned params (~200-300ms)
     # Uses memory_cost=19456 (19 MB, vs Django default 100 MB) for better performance
     # while maintaining OWASP-recommended security. Configured in core/hashers.py
-    "core.hashers.TunedArgon2PasswordHasher",
+    "core.hashers.PooledArgon2PasswordHasher"
+    if PASSWORD_HASH_PROCESSES
+    else "core.hashers.TunedArgon2PasswordHasher",
+    # Legacy hashes wrapped in Argon2 by `manage.py rehash_passwords`
+    "core.hashers.Argon2WrappedBCryptSHA256PasswordHasher",
+    "core.hashers.Argon2WrappedBCryptPasswordHasher",
+    "core.hashers.Argon2WrappedPBKDF2PasswordHasher",
+    "core.hashers.Argon2WrappedPBKDF2SHA1PasswordHasher",
     # Legacy hashers - kept to verify existing passwords (auto-upgrade on login)
     "django.contrib.auth.hashers.BCryptPasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
@@ -111,3 +133,7 @@ SIMPLE_JWT = {
 }
 
 CORS_ORIGIN_ALLOW_ALL = True
+
+# Per-user group membership cache used by `core.permissions.HasGroupPermission`
+GROUP_CACHE_SIZE = config("GROUP_CACHE_SIZE", default=1024, cast=int)
+GROUP_CACHE_TTL = config("GROUP_CACHE_TTL", default=60, cast=int)
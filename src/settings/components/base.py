@@ -73,6 +73,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "operationcode_backend.wsgi.application"
+ASGI_APPLICATION = "operationcode_backend.asgi.application"
+
+# Serve the auth views through `core.async_views` (enabled by the ASGI entry
+# point) and cap how many of them run at once per worker
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+ASYNC_VIEW_THREADS = config("ASYNC_VIEW_THREADS", default=4, cast=int)
 
 DATABASES = {
     "default": {
@@ -89,6 +95,9 @@ DATABASES = {
 # NOTE: qcluster worker is currently DISABLED in Dockerfile (not needed for current operations)
 # Background tasks (welcome emails, Slack invites, Mailchimp sync) will queue but not process
 # To re-enable: uncomment qcluster in Dockerfile CMD line
+# Time-sensitive tasks (welcome emails, slack invites) go to the `critical`
+# queue and mailing list syncs to `bulk`, each served by its own cluster:
+# `Q_CLUSTER_NAME=critical python manage.py qcluster`. See `core.queues`
 Q_CLUSTER = {
     "name": "operationcode",
     "workers": config("DJANGO_Q_WORKERS", default=1, cast=int),
@@ -97,8 +106,61 @@ Q_CLUSTER = {
     "queue_limit": 50,
     "bulk": 10,
     "orm": "default",  # Use database as broker
+    # ORM broker dequeuing with SKIP LOCKED and LISTEN/NOTIFY on PostgreSQL
+    "broker_class": "core.brokers.PostgresBroker",
+    "ALT_CLUSTERS": {
+        "critical": {
+            "workers": config("DJANGO_Q_CRITICAL_WORKERS", default=2, cast=int),
+            "timeout": 30,
+            "retry": 60,
+        },
+        "bulk": {
+            "workers": config("DJANGO_Q_BULK_WORKERS", default=1, cast=int),
+            "timeout": 300,
+            "retry": 360,
+            "bulk": 1,
+        },
+    },
 }
 
+# Run queued tasks inside the gunicorn workers instead of a qcluster, on at
+# most TASKS_IN_PROCESS_WORKERS threads per worker (see `core.executor`).
+# TASKS_IN_PROCESS_QUEUES is a comma separated list, all queues by default
+TASKS_IN_PROCESS = config("TASKS_IN_PROCESS", default=False, cast=bool)
+TASKS_IN_PROCESS_WORKERS = config("TASKS_IN_PROCESS_WORKERS", default=2, cast=int)
+TASKS_IN_PROCESS_QUEUES = [
+    queue.strip()
+    for queue in config("TASKS_IN_PROCESS_QUEUES", default="").split(",")
+    if queue.strip()
+]
+TASKS_IN_PROCESS_DRAIN_TIMEOUT = config(
+    "TASKS_IN_PROCESS_DRAIN_TIMEOUT", default=10, cast=float
+)
+
+# Signup side effects (welcome email, slack invite, mailing list) are sent in
+# batches of up to SIDE_EFFECT_BATCH_SIZE, at most SIDE_EFFECT_BATCH_DELAY
+# seconds after being queued. See `core.batching`
+SIDE_EFFECT_BATCH_SIZE = config("SIDE_EFFECT_BATCH_SIZE", default=50, cast=int)
+SIDE_EFFECT_BATCH_DELAY = config("SIDE_EFFECT_BATCH_DELAY", default=30, cast=int)
+# A side effect already queued for an email in the last SIDE_EFFECT_DEDUP_TTL
+# seconds isn't queued again. See `core.idempotency`
+SIDE_EFFECT_DEDUP_TTL = config("SIDE_EFFECT_DEDUP_TTL", default=86400, cast=int)
+# Failed sends of a side effect before it's moved to the dead letters
+SIDE_EFFECT_MAX_ATTEMPTS = config("SIDE_EFFECT_MAX_ATTEMPTS", default=5, cast=int)
+# A batch claimed by a flush more than SIDE_EFFECT_CLAIM_TIMEOUT seconds ago is
+# claimed again (longer than any task queue's timeout)
+SIDE_EFFECT_CLAIM_TIMEOUT = config("SIDE_EFFECT_CLAIM_TIMEOUT", default=600, cast=int)
+
+# How long (seconds) `GET` responses of the user/profile endpoints are cached
+# See `core.views.CachedRetrieveMixin`
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=300, cast=int)
+
+# Zip code centroids used to fill in profile coordinates, built by
+# `scripts/build_zip_centroids.py`. See `core.zipcodes`
+ZIP_CENTROIDS_PATH = config(
+    "ZIP_CENTROIDS_PATH", default=str(BASE_DIR.joinpath("core/data/zip_centroids.bin"))
+)
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 LANGUAGE_CODE = "en-us"
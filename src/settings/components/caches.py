@@ -0,0 +1,49 @@
+from pathlib import Path
+from tempfile import gettempdir
+
+from settings.components import config
+
+# Django cache framework
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# `default` is a two-tier cache (see `core.cache_backends.TieredCache`): an
+# in-process LRU in front of the cache configured as `shared`, which every
+# gunicorn worker (and, with Redis, every container) sees. Environments pick
+# the shared backend with `tiered_caches(...)`.
+
+REDIS_URL = config("REDIS_URL", default="")
+
+REDIS_CACHE = {
+    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    "LOCATION": REDIS_URL,
+}
+
+# Needs no outside services; shared between the workers of one host
+FILE_CACHE = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": config(
+        "CACHE_DIR", default=str(Path(gettempdir()).joinpath("operationcode-cache"))
+    ),
+}
+
+
+def tiered_caches(shared: dict) -> dict:
+    """
+    Builds the `CACHES` setting with `shared` as the L2 behind an in-process L1
+    """
+    return {
+        "default": {
+            "BACKEND": "core.cache_backends.TieredCache",
+            "OPTIONS": {
+                "SHARED": "shared",
+                "L1_MAX_ENTRIES": config(
+                    "CACHE_L1_MAX_ENTRIES", default=1024, cast=int
+                ),
+                "L1_TIMEOUT": config("CACHE_L1_TIMEOUT", default=5, cast=int),
+            },
+        },
+        "shared": shared,
+    }
+
+
+CACHES = tiered_caches(REDIS_CACHE if REDIS_URL else FILE_CACHE)
@@ -1,5 +1,17 @@
 from settings.components import config
 
+# HTTP clients of the integrations below. See `core.integrations`
+INTEGRATION_CONNECT_TIMEOUT = config(
+    "INTEGRATION_CONNECT_TIMEOUT", default=3.05, cast=float
+)
+INTEGRATION_READ_TIMEOUT = config("INTEGRATION_READ_TIMEOUT", default=10, cast=float)
+# Retries of connection errors, 429s and 5xx responses, with jittered
+# exponential backoff starting at INTEGRATION_BACKOFF seconds
+INTEGRATION_RETRIES = config("INTEGRATION_RETRIES", default=3, cast=int)
+INTEGRATION_BACKOFF = config("INTEGRATION_BACKOFF", default=0.5, cast=float)
+# Keep-alive connections kept per service and process
+INTEGRATION_POOL_SIZE = config("INTEGRATION_POOL_SIZE", default=10, cast=int)
+
 # OperationCode Slackbot
 # https://github.com/OperationCode/operationcode-pybot
 PYBOT_AUTH_TOKEN = config("PYBOT_AUTH_TOKEN", default="")
@@ -10,6 +22,8 @@ PYBOT_URL = config("PYBOT_URL", default="http://localhost:5000")
 MAILCHIMP_API_KEY = config("MAILCHIMP_API_KEY", default="")
 MAILCHIMP_USERNAME = config("MAILCHIMP_USERNAME", default="")
 MAILCHIMP_LIST_ID = config("MAILCHIMP_LIST_ID", default="")
+# Overrides the API URL derived from the key's datacenter (e.g. for a fake server)
+MAILCHIMP_API_URL = config("MAILCHIMP_API_URL", default="")
 
 # Mandrill anymail configs
 MANDRILL_API_KEY = config("MANDRILL_API_KEY", default="")
@@ -1,3 +1,24 @@
+from settings.components import config
+
+# Opt-in: authenticate requests from the JWT claims instead of loading the User
+# row on every request. See `core.authentication.ClaimsJWTAuthentication`
+JWT_CLAIMS_AUTHENTICATION = config(
+    "JWT_CLAIMS_AUTHENTICATION", default=False, cast=bool
+)
+# How long (seconds) a user's active/staff status and password revision are
+# cached by the claims authentication before being re-read from the database
+JWT_USER_STATE_TTL = config("JWT_USER_STATE_TTL", default=30, cast=int)
+JWT_USER_STATE_CACHE_SIZE = config("JWT_USER_STATE_CACHE_SIZE", default=4096, cast=int)
+
+# Login attempts allowed per client IP and email, and per client IP overall.
+# See `core.throttling`
+LOGIN_THROTTLE_RATE = config("LOGIN_THROTTLE_RATE", default="10/min")
+LOGIN_IP_THROTTLE_RATE = config("LOGIN_IP_THROTTLE_RATE", default="60/min")
+# Number of proxies (e.g. the load balancer) in front of the app, used to find
+# the client IP in X-Forwarded-For. 0 uses REMOTE_ADDR and ignores the header,
+# which clients can set to anything
+NUM_PROXIES = config("NUM_PROXIES", default=0, cast=int)
+
 # Django REST Framework (DRF)
 # https://www.django-rest-framework.org/
 REST_FRAMEWORK = {
@@ -13,9 +34,16 @@ REST_FRAMEWORK = {
         "djangorestframework_camel_case.parser.CamelCaseJSONParser",
     ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.ClaimsJWTAuthentication"
+        if JWT_CLAIMS_AUTHENTICATION
+        else "core.authentication.ProfileJWTAuthentication",
         # "rest_framework.authentication.SessionAuthentication",
     ),
     "JSON_UNDERSCOREIZE": {"no_underscore_before_number": True},
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
+    "NUM_PROXIES": NUM_PROXIES,
+    "DEFAULT_THROTTLE_RATES": {
+        "login": LOGIN_THROTTLE_RATE,
+        "login_ip": LOGIN_IP_THROTTLE_RATE,
+    },
 }
@@ -5,6 +5,7 @@ SECURITY WARNING: don't run with debug turned on in production!
 
 from settings.components.authentication import MIDDLEWARE
 from settings.components.base import INSTALLED_APPS
+from settings.components.caches import FILE_CACHE, tiered_caches
 
 DEBUG = True
 
@@ -18,6 +19,9 @@ CSRF_TRUSTED_ORIGINS = [
     "https://*.ngrok-free.app",
 ]
 
+# Survives `runserver` reloads; set REDIS_URL in production-like setups instead
+CACHES = tiered_caches(FILE_CACHE)
+
 if "debug_toolbar" not in INSTALLED_APPS:
     INSTALLED_APPS += ("debug_toolbar",)
 if "debug_toolbar.middleware.DebugToolbarMiddleware" not in MIDDLEWARE:
@@ -2,6 +2,7 @@ import os
 
 from settings.components import config
 from settings.components.base import DATABASES
+from settings.components.caches import REDIS_CACHE, tiered_caches
 
 ALLOWED_HOSTS = ["api.staging.operationcode.org"]
 DEBUG = False
@@ -24,6 +25,11 @@ DATABASES = {
     }
 }
 
+# The throttles count in the shared cache, which needs the atomic `incr` of
+# Redis (the file-based cache loses concurrent increments), so REDIS_URL is
+# required here
+CACHES = tiered_caches({**REDIS_CACHE, "LOCATION": config("REDIS_URL")})
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.1/howto/static-files/
 AWS_S3_OBJECT_PARAMETERS = {"CacheControl": "max-age=86400"}
@@ -1,4 +1,7 @@
-from settings.components.base import INSTALLED_APPS
+from decouple import config
+
+from settings.components.base import DATABASES, INSTALLED_APPS
+from settings.components.caches import tiered_caches
 from settings.components.rest import REST_FRAMEWORK
 
 # noinspection PyUnresolvedReferences
@@ -10,4 +13,16 @@ REST_FRAMEWORK = {**REST_FRAMEWORK, "TEST_REQUEST_DEFAULT_FORMAT": "json"}
 
 INSTALLED_APPS += ["tests"]
 
-DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3"}}
+# SQLite unless TEST_DB_ENGINE is set, e.g. to `django.db.backends.postgresql`
+# (connecting with the DB_* settings) for the PostgreSQL-only tests
+DATABASES = {
+    "default": {
+        **DATABASES["default"],
+        "ENGINE": config("TEST_DB_ENGINE", default="django.db.backends.sqlite3"),
+    }
+}
+
+# Keep retries of the integrations' HTTP calls quick
+INTEGRATION_BACKOFF = 0.01
+
+CACHES = tiered_caches({"BACKEND": "tests.fake_cache.FakeCache"})
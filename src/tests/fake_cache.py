@@ -0,0 +1,33 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.cache import CacheStats
+
+
+class FakeCache(LocMemCache):
+    """
+    In-memory stand-in for the shared (L2) cache used by the test suite.
+
+    Counts hits and misses so tests can assert on caching behavior, and
+    exposes the stored keys.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.stats = CacheStats()
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version=version)
+        if value is missing:
+            self.stats.record("misses")
+            return default
+
+        self.stats.record("hits")
+        return value
+
+    def keys(self) -> list:
+        return list(self._cache.keys())
+
+    def clear(self):
+        super().clear()
+        self.stats.reset()
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, NamedTuple, Optional
+
+
+class RecordedRequest(NamedTuple):
+    method: str
+    path: str
+    headers: dict
+    json: Any
+    client_port: int
+
+
+class FakeResponse(NamedTuple):
+    status: int
+    json: Any
+    headers: dict
+    delay: float
+    body: Optional[bytes] = None
+
+
+class FakeHTTPServer:
+    """
+    Local HTTP/1.1 server standing in for the external services (PyBot,
+    Mailchimp) in tests.
+
+    Answers with the responses queued by `respond` in order, then with
+    `default`. Every request is recorded, including the client port, so tests
+    can tell how many connections were used.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = deque()
+        self.default = FakeResponse(200, {}, {}, 0)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        # Clients hanging up on a delayed response (timeouts) isn't an error
+        self._server.handle_error = lambda request, client_address: None
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        return len({request.client_port for request in self.requests})
+
+    def respond(
+        self,
+        status: int = 200,
+        json: Any = None,
+        headers: Optional[dict] = None,
+        delay: float = 0,
+        times: int = 1,
+    ) -> None:
+        """
+        Queues the response to the next `times` requests
+        """
+        response = FakeResponse(status, json or {}, headers or {}, delay)
+        self.responses.extend([response] * times)
+
+    def handle(self, request: RecordedRequest) -> FakeResponse:
+        """
+        Returns the response to `request`; subclasses can answer per path
+        """
+        return self.responses.popleft() if self.responses else self.default
+
+    def start(self) -> "FakeHTTPServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                request = RecordedRequest(
+                    self.command,
+                    self.path,
+                    dict(self.headers),
+                    json.loads(body) if body else None,
+                    self.client_address[1],
+                )
+                server.requests.append(request)
+                response = server.handle(request)
+                time.sleep(response.delay)
+
+                if response.body is not None:
+                    payload, content_type = response.body, "application/octet-stream"
+                else:
+                    payload = json.dumps(response.json).encode()
+                    content_type = "application/json"
+                self.send_response(response.status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,104 @@
+import io
+import json
+import tarfile
+from itertools import count
+from typing import Dict, Set
+from urllib.parse import parse_qs, urlsplit
+
+from tests.fake_http import FakeHTTPServer, FakeResponse, RecordedRequest
+
+
+class FakeMailchimpServer(FakeHTTPServer):
+    """
+    Stateful stand-in for the parts of the Mailchimp API the mailing list
+    sync uses: list members (read and upsert) and batch operations.
+
+    Batches finish immediately. Members whose email is in `rejected` fail
+    with a 400 inside the batch, like addresses Mailchimp considers fake.
+    Responses queued with `respond` still take precedence.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.members: Dict[str, dict] = {}
+        self.rejected: Set[str] = set()
+        self.batches: Dict[str, dict] = {}
+        self._results: Dict[str, bytes] = {}
+        self._ids = count(1)
+
+    def handle(self, request: RecordedRequest) -> FakeResponse:
+        if self.responses:
+            return self.responses.popleft()
+
+        url = urlsplit(request.path)
+        parts = url.path.strip("/").split("/")
+        if request.method == "POST" and parts == ["3.0", "batches"]:
+            return self.json(self.create_batch(request.json["operations"]))
+        if request.method == "GET" and parts[:2] == ["3.0", "batches"]:
+            return self.json(self.batches[parts[2]])
+        if request.method == "GET" and parts[0] == "batch-results":
+            return FakeResponse(200, None, {}, 0, self._results[parts[1]])
+        if request.method == "GET" and parts[-1] == "members":
+            return self.json(self.list_members(parse_qs(url.query)))
+        return self.default
+
+    @staticmethod
+    def json(data: dict, status: int = 200) -> FakeResponse:
+        return FakeResponse(status, data, {}, 0)
+
+    def upsert_member(self, subscriber_hash: str, body: dict) -> int:
+        if body["email_address"] in self.rejected:
+            return 400
+        member = self.members.setdefault(
+            subscriber_hash,
+            {
+                "email_address": body["email_address"],
+                "status": body.get("status_if_new", "subscribed"),
+                "merge_fields": {},
+            },
+        )
+        member["merge_fields"].update(body.get("merge_fields", {}))
+        return 200
+
+    def create_batch(self, operations: list) -> dict:
+        batch_id = f"batch{next(self._ids)}"
+        results = []
+        for operation in operations:
+            subscriber_hash = operation["path"].rstrip("/").split("/")[-1]
+            body = json.loads(operation["body"])
+            status = self.upsert_member(subscriber_hash, body)
+            results.append(
+                {
+                    "status_code": status,
+                    "operation_id": operation["operation_id"],
+                    "response": json.dumps(self.members.get(subscriber_hash, {})),
+                }
+            )
+
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+            content = json.dumps(results).encode()
+            info = tarfile.TarInfo(f"{batch_id}.json")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        self._results[f"{batch_id}.tar.gz"] = archive.getvalue()
+
+        errored = sum(result["status_code"] >= 400 for result in results)
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "status": "finished",
+            "total_operations": len(results),
+            "finished_operations": len(results),
+            "errored_operations": errored,
+            "response_body_url": f"{self.url}/batch-results/{batch_id}.tar.gz",
+        }
+        return {"id": batch_id, "status": "pending", "total_operations": len(results)}
+
+    def list_members(self, query: dict) -> dict:
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("count", ["10"])[0])
+        members = list(self.members.values())
+        return {
+            "members": members[offset : offset + limit],
+            "total_items": len(members),
+        }
@@ -3,11 +3,19 @@ from typing import Dict
 import factory
 import pytest
 from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from core import zipcodes
+from core.authentication import invalidate_user_state
+from core.integrations import close_sessions
+from core.permissions import invalidate_group_cache
 from tests import factories as f
 from tests import test_data as data
+from tests.fake_http import FakeHTTPServer
+from tests.fake_mailchimp import FakeMailchimpServer
 
 
 def get_tokens_for_user(user: User) -> str:
@@ -16,6 +24,77 @@ def get_tokens_for_user(user: User) -> str:
     return str(refresh.access_token)
 
 
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """
+    Process-local caches outlive the per-test transaction rollback, and
+    sqlite happily reuses primary keys, so start every test cold
+    """
+    invalidate_group_cache()
+    invalidate_user_state()
+    cache.clear()
+    yield
+    invalidate_group_cache()
+    invalidate_user_state()
+    cache.clear()
+    close_sessions()
+
+
+@pytest.fixture
+def fake_server() -> FakeHTTPServer:
+    """
+    Local HTTP server standing in for PyBot and Mailchimp
+    """
+    server = FakeHTTPServer().start()
+    with override_settings(
+        PYBOT_URL=server.url,
+        MAILCHIMP_API_KEY="0" * 32 + "-us1",
+        MAILCHIMP_API_URL=f"{server.url}/3.0/",
+        MAILCHIMP_LIST_ID="test-list",
+    ):
+        yield server
+    server.stop()
+
+
+@pytest.fixture
+def fake_mailchimp() -> FakeMailchimpServer:
+    """
+    Local fake of the Mailchimp API, keeping the list members in memory
+    """
+    server = FakeMailchimpServer().start()
+    with override_settings(
+        MAILCHIMP_API_KEY="0" * 32 + "-us1",
+        MAILCHIMP_API_URL=f"{server.url}/3.0/",
+        MAILCHIMP_LIST_ID="test-list",
+    ):
+        yield server
+    server.stop()
+
+
+# Zip code -> centroid
+ZIP_CENTROIDS = {
+    "00501": (40.81322, -73.04632),
+    "10001": (40.75064, -73.99728),
+    "90210": (34.10093, -118.41463),
+    "99950": (55.54217, -131.43261),
+}
+
+
+@pytest.fixture
+def zip_centroids(tmp_path) -> Dict[str, tuple]:
+    """
+    A small zip code centroid index, in place of the bundled one
+    """
+    path = tmp_path / "zip_centroids.bin"
+    zipcodes.write_index(
+        path, ((int(zipcode), *c) for zipcode, c in ZIP_CENTROIDS.items())
+    )
+    zipcodes.reset_index()
+    with override_settings(ZIP_CENTROIDS_PATH=str(path)):
+        yield ZIP_CENTROIDS
+    zipcodes.reset_index()
+
+
 @pytest.fixture
 def client() -> APIClient:
     return APIClient()
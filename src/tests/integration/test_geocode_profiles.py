@@ -0,0 +1,95 @@
+from io import StringIO
+
+import humps
+import pytest
+from django import test
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import geo
+from core.models import Profile
+from tests.factories import ProfileFactory
+
+
+@pytest.mark.django_db
+def test_registration_fills_coordinates(
+    client: APIClient, register_form: dict, zip_centroids: dict
+):
+    register_form["zipcode"] = "90210"
+
+    res = client.post(reverse("rest_register"), register_form)
+
+    assert res.status_code == 201
+    profile = Profile.objects.get(user__email=register_form["email"])
+    assert (profile.latitude, profile.longitude) == zip_centroids["90210"]
+    assert profile.geohash == geo.encode(*zip_centroids["90210"])
+
+
+def test_zipcode_update_moves_coordinates(
+    authed_client: test.Client, user: User, zip_centroids: dict
+):
+    res = authed_client.patch(reverse("update_profile"), {"zipcode": "10001"})
+
+    assert res.status_code == 200
+    profile = Profile.objects.get(user=user)
+    assert (profile.latitude, profile.longitude) == zip_centroids["10001"]
+    assert res.json()["latitude"] == zip_centroids["10001"][0]
+
+    # Unknown zip codes clear the old coordinates
+    authed_client.patch(reverse("update_profile"), {"zipcode": "12345"})
+    profile.refresh_from_db()
+    assert (profile.latitude, profile.longitude, profile.geohash) == (None, None, "")
+
+
+def test_explicit_coordinates_are_kept(
+    authed_client: test.Client, user: User, zip_centroids: dict
+):
+    data = {"zipcode": "10001", "latitude": 40.0, "longitude": -74.0}
+
+    authed_client.patch(reverse("update_profile"), humps.camelize(data))
+
+    profile = Profile.objects.get(user=user)
+    assert (profile.latitude, profile.longitude) == (40.0, -74.0)
+
+
+def test_no_coordinates_without_centroids(authed_client: test.Client, user: User):
+    Profile.objects.filter(user=user).update(latitude=1, longitude=2)
+
+    authed_client.patch(reverse("update_profile"), {"zipcode": "10001"})
+
+    profile = Profile.objects.get(user=user)
+    assert (profile.latitude, profile.longitude) == (1, 2)
+
+
+@pytest.mark.django_db
+def test_backfill(zip_centroids: dict):
+    known = ProfileFactory.create_batch(3, zipcode="99950")
+    unknown = ProfileFactory(zipcode="12345")
+    located = ProfileFactory(zipcode="10001", latitude=1.0, longitude=2.0)
+    out = StringIO()
+
+    call_command("geocode_profiles", "--batch-size", "2", stdout=out)
+
+    assert "Geocoded 3 profiles, 1 unknown zip codes" in out.getvalue()
+    for profile in known:
+        profile.refresh_from_db()
+        assert (profile.latitude, profile.longitude) == zip_centroids["99950"]
+        assert profile.geohash == geo.encode(*zip_centroids["99950"])
+    unknown.refresh_from_db()
+    assert unknown.latitude is None
+    located.refresh_from_db()
+    assert located.latitude == 1.0
+
+    call_command("geocode_profiles", "--all", stdout=StringIO())
+    located.refresh_from_db()
+    assert (located.latitude, located.longitude) == zip_centroids["10001"]
+
+
+@pytest.mark.django_db
+def test_backfill_needs_centroids(tmp_path, settings):
+    settings.ZIP_CENTROIDS_PATH = str(tmp_path / "missing.bin")
+
+    with pytest.raises(CommandError):
+        call_command("geocode_profiles", stdout=StringIO())
@@ -0,0 +1,86 @@
+import pytest
+from django import test
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from core import geo
+from core.models import Profile
+from tests.factories import ProfileFactory
+
+url = reverse("nearby_mentors")
+
+# Around New York
+BROOKLYN = (40.6782, -73.9442)
+NEWARK = (40.7357, -74.1724)
+PHILADELPHIA = (39.9526, -75.1652)
+
+
+@pytest.fixture
+def mentors(user: User):
+    Profile.objects.filter(user=user).update(
+        latitude=40.7128, longitude=-74.0060, is_mentor=True
+    )
+    return {
+        name: ProfileFactory(is_mentor=True, latitude=lat, longitude=lon)
+        for name, (lat, lon) in {
+            "brooklyn": BROOKLYN,
+            "newark": NEWARK,
+            "philadelphia": PHILADELPHIA,
+        }.items()
+    }
+
+
+def ids(res) -> list:
+    assert res.status_code == 200
+    return [mentor["id"] for mentor in res.json()]
+
+
+def test_nearest_first(authed_client: test.Client, mentors):
+    ProfileFactory(is_mentor=False, latitude=40.7, longitude=-74.0)
+    res = authed_client.get(f"{url}?latitude=40.7128&longitude=-74.0060")
+
+    # Within 25 miles, without the user themself or non-mentors
+    assert ids(res) == [mentors["brooklyn"].pk, mentors["newark"].pk]
+    brooklyn = res.json()[0]
+    assert brooklyn["firstName"] == mentors["brooklyn"].user.first_name
+    assert brooklyn["distance"] == round(geo.distance(40.7128, -74.0060, *BROOKLYN), 1)
+    assert "email" not in brooklyn
+
+
+def test_radius_and_limit(authed_client: test.Client, mentors):
+    res = authed_client.get(f"{url}?latitude=40.7128&longitude=-74.0060&radius=100")
+    assert ids(res)[-1] == mentors["philadelphia"].pk
+
+    res = authed_client.get(
+        f"{url}?latitude=40.7128&longitude=-74.0060&radius=100&limit=1"
+    )
+    assert ids(res) == [mentors["brooklyn"].pk]
+
+
+def test_defaults_to_the_users_location(authed_client: test.Client, mentors):
+    assert ids(authed_client.get(url)) == [
+        mentors["brooklyn"].pk,
+        mentors["newark"].pk,
+    ]
+
+
+def test_inactive_mentors_are_hidden(authed_client: test.Client, mentors):
+    User.objects.filter(profile=mentors["brooklyn"]).update(is_active=False)
+
+    assert ids(authed_client.get(url)) == [mentors["newark"].pk]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "latitude=40", "latitude=91&longitude=0", "radius=-1", "radius=1000"],
+)
+def test_invalid_query(authed_client: test.Client, query: str):
+    res = authed_client.get(f"{url}?{query}")
+
+    assert res.status_code == 400
+
+
+def test_requires_authentication(client: test.Client):
+    res = client.get(f"{url}?latitude=40.7128&longitude=-74.0060")
+
+    assert res.status_code == 401
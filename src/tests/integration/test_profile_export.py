@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django import test
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.exports import CSVRenderer, profile_batches, stream_profiles
+from core.models import Profile
+from tests.factories import ProfileFactory
+
+url = reverse("export_profiles")
+
+
+@pytest.fixture
+def profiles(profile_admin: User):
+    Profile.objects.filter(user=profile_admin).update(branch_of_service="marines")
+    return ProfileFactory.create_batch(5, is_mentor=False, branch_of_service="army")
+
+
+def streamed(res) -> str:
+    return b"".join(res.streaming_content).decode()
+
+
+def test_pages_follow_the_cursor(profile_admin_client: test.Client, profiles):
+    ids = []
+    next_url = f"{url}?limit=2"
+    while next_url:
+        res = profile_admin_client.get(next_url)
+        assert res.status_code == 200
+        ids += [profile["id"] for profile in res.data["results"]]
+        next_url = res.data["next"]
+
+    assert ids == sorted(Profile.objects.values_list("pk", flat=True))
+
+
+def test_includes_user_fields(profile_admin_client: test.Client, profile_admin: User):
+    res = profile_admin_client.get(url)
+
+    [profile] = res.json()["results"]
+    assert profile["email"] == profile_admin.email
+    assert profile["firstName"] == profile_admin.first_name
+    assert profile["isMentor"] == profile_admin.profile.is_mentor
+
+
+def test_filters(profile_admin_client: test.Client, profiles):
+    mentor = ProfileFactory(is_mentor=True, branch_of_service="navy")
+    Profile.objects.filter(pk=profiles[0].pk).update(
+        created_at=timezone.now() - timedelta(days=10)
+    )
+
+    def export(query: str) -> list:
+        res = profile_admin_client.get(f"{url}?{query}")
+        assert res.status_code == 200
+        return [profile["id"] for profile in res.data["results"]]
+
+    assert export("is_mentor=true&branch_of_service=navy") == [mentor.pk]
+    assert export("branch_of_service=army&is_mentor=false") == [p.pk for p in profiles]
+    before = (timezone.now() - timedelta(days=1)).isoformat()
+    assert export(f"created_before={before.replace('+', '%2B')}") == [profiles[0].pk]
+
+
+def test_invalid_filter(profile_admin_client: test.Client):
+    res = profile_admin_client.get(f"{url}?created_after=yesterday")
+
+    assert res.status_code == 400
+    assert "createdAfter" in res.json()
+
+
+def test_streams_ndjson(profile_admin_client: test.Client, profiles):
+    res = profile_admin_client.get(f"{url}?format=ndjson&branch_of_service=army")
+
+    assert res.status_code == 200
+    assert res["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in streamed(res).splitlines()]
+    assert [row["id"] for row in rows] == [p.pk for p in profiles]
+    assert rows[0]["branchOfService"] == "army"
+
+
+def test_streams_csv(profile_admin_client: test.Client, profiles):
+    res = profile_admin_client.get(url, HTTP_ACCEPT="text/csv")
+
+    assert res.status_code == 200
+    assert res["Content-Type"] == "text/csv"
+    assert 'filename="profiles.csv"' in res["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(streamed(res))))
+    assert len(rows) == 6
+    assert rows[1]["email"] == profiles[0].user.email
+    assert rows[1]["isMentor"] == "False"
+
+
+@override_settings(ASYNC_VIEWS=True)
+def test_streams_asynchronously_under_asgi(profiles):
+    res = stream_profiles(Profile.objects.all(), CSVRenderer(), batch_size=2)
+
+    async def read() -> list:
+        return [chunk async for chunk in res.streaming_content]
+
+    assert res.is_async
+    chunks = async_to_sync(read)()
+    # Header + 6 rows, 2 lines at a time
+    assert len(chunks) == 4
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [int(row["id"]) for row in rows] == sorted(
+        Profile.objects.values_list("pk", flat=True)
+    )
+
+
+def test_empty_csv_has_header(profile_admin_client: test.Client):
+    res = profile_admin_client.get(f"{url}?format=csv&military_status=none")
+
+    header, *rows = streamed(res).splitlines()
+    assert "email" in header.split(",")
+    assert rows == []
+
+
+def test_batches_query_once_each(db):
+    ProfileFactory.create_batch(5)
+
+    with CaptureQueriesContext(connection) as queries:
+        batches = list(profile_batches(Profile.objects.select_related("user"), 2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    # One per batch, plus the empty one ending the export
+    assert len(queries) == 4
+
+
+def test_staff_user_has_access(authed_admin_client: test.Client):
+    assert authed_admin_client.get(url).status_code == 200
+
+
+def test_requires_profile_admin_group(authed_client: test.Client):
+    assert authed_client.get(url).status_code == 403
+    assert authed_client.get(f"{url}?format=csv").status_code == 403
@@ -0,0 +1,141 @@
+import pytest
+from django import test
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+
+from core import search
+from core.models import Profile
+from tests.factories import ProfileFactory
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("search_profiles")
+
+
+@pytest.fixture
+def profiles(profile_admin: User):
+    profiles = {
+        "smith": ProfileFactory(
+            user__first_name="Jane",
+            user__last_name="Smith",
+            user__email="jane@example.com",
+            company_name="Acme",
+            bio="Backend developer",
+        ),
+        "backend": ProfileFactory(
+            user__first_name="Ann",
+            user__last_name="Lee",
+            user__email="ann@example.com",
+            company_role="Backend engineer",
+            bio="Likes Smithsonian museums",
+        ),
+        "mos": ProfileFactory(
+            user__first_name="Bob",
+            user__last_name="Jones",
+            user__email="bob@example.com",
+            military_occupational_specialty="Cyber Operations Specialist",
+        ),
+    }
+    # Random names could match the searches
+    User.objects.filter(pk=profile_admin.pk).update(
+        first_name="Admin", last_name="User", email="admin@example.com"
+    )
+    # Factories don't send signals
+    search.rebuild()
+    return profiles
+
+
+def found(query: str) -> list:
+    profiles = search.search_profiles(Profile.objects.all(), query)
+    return list(profiles.order_by("-rank", "pk").values_list("pk", flat=True))
+
+
+def test_matches_every_word_as_a_prefix(profiles):
+    assert found("jane smith") == [profiles["smith"].pk]
+    assert found("ja smi") == [profiles["smith"].pk]
+    assert found("cyber") == [profiles["mos"].pk]
+    assert found(profiles["mos"].user.email) == [profiles["mos"].pk]
+    assert found("jane jones") == []
+
+
+def test_ranks_names_above_bios(profiles):
+    assert found("smith") == [profiles["smith"].pk, profiles["backend"].pk]
+    assert found("backend") == [profiles["backend"].pk, profiles["smith"].pk]
+
+
+def test_ignores_search_syntax(profiles):
+    assert found('"smith" OR (NEAR*') == []
+    assert found("  ") == []
+
+
+def test_follows_saves(profiles):
+    profile = profiles["mos"]
+    profile.bio = "Kubernetes enthusiast"
+    profile.save()
+    assert found("kubernetes") == [profile.pk]
+
+    profile.user.last_name = "Johnson"
+    profile.user.save()
+    assert found("bob johnson") == [profile.pk]
+    assert found("bob jones") == []
+
+    profile.user.delete()
+    assert found("kubernetes") == []
+
+
+def test_skips_saves_of_other_fields(profiles, mocker):
+    index_profile = mocker.patch("core.search.index_profile")
+    index_user = mocker.patch("core.search.index_user")
+    profile = profiles["smith"]
+
+    profile.save(update_fields=["zipcode"])
+    profile.user.save(update_fields=["last_login"])
+    assert not index_profile.called and not index_user.called
+
+    profile.save(update_fields=["bio"])
+    index_profile.assert_called_once_with(profile.pk)
+
+
+def test_rebuild_command(profiles, capsys):
+    new = ProfileFactory(user__first_name="Zelda")
+    assert found("zelda") == []
+
+    call_command("rebuild_search_index")
+
+    assert found("zelda") == [new.pk]
+    assert "Indexed 5 profiles" in capsys.readouterr().out
+
+
+def test_api(profile_admin_client: test.Client, profiles):
+    res = profile_admin_client.get(url, {"q": "smith", "limit": 1})
+
+    assert res.status_code == 200
+    assert res.data["count"] == 2
+    assert [profile["id"] for profile in res.data["results"]] == [profiles["smith"].pk]
+    assert res.data["results"][0]["email"] == profiles["smith"].user.email
+    assert res.data["results"][0]["rank"] > 0
+    assert "search_vector" not in res.data["results"][0]
+
+    res = profile_admin_client.get(res.data["next"])
+    assert [profile["id"] for profile in res.data["results"]] == [
+        profiles["backend"].pk
+    ]
+
+
+@pytest.mark.parametrize("params", [{}, {"q": "  ?! "}])
+def test_api_requires_a_query(profile_admin_client: test.Client, params):
+    res = profile_admin_client.get(url, params)
+    assert res.status_code == 400
+
+
+def test_api_requires_profile_admins(authed_client: test.Client):
+    res = authed_client.get(url, {"q": "smith"})
+    assert res.status_code == 403
+
+
+def test_admin_changelist(admin_client, profiles):
+    res = admin_client.get(reverse("admin:core_profile_changelist"), {"q": "ja smi"})
+
+    assert res.status_code == 200
+    assert list(res.context["cl"].result_list) == [profiles["smith"]]
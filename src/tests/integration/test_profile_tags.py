@@ -0,0 +1,133 @@
+import importlib
+
+import humps
+import pytest
+from django import test
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from core import tags
+from core.models import Profile, ProfileTag, Tag
+from tests.factories import ProfileFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def tag_names(profile: Profile) -> set:
+    return set(profile.tags.values_list("kind", "name"))
+
+
+@pytest.fixture
+def mentors(user: User):
+    Profile.objects.filter(user=user).update(
+        is_mentor=True, programming_languages="Python"
+    )
+    mentors = {
+        "python": ProfileFactory(
+            is_mentor=True, programming_languages="Python, Go", disciplines="Backend"
+        ),
+        "js": ProfileFactory(
+            is_mentor=True, programming_languages="JavaScript", disciplines="Frontend"
+        ),
+        "python_backend": ProfileFactory(
+            is_mentor=True, programming_languages="python", disciplines="backend"
+        ),
+    }
+    ProfileFactory(is_mentor=False, programming_languages="Python")
+    for profile in Profile.objects.all():
+        tags.sync_tags(profile)
+    return mentors
+
+
+def test_update_normalizes_and_tags(authed_client: test.Client, user: User):
+    res = authed_client.patch(
+        reverse("update_profile"),
+        humps.camelize(
+            {"programming_languages": "Python, go,python ", "interests": "React"}
+        ),
+    )
+
+    assert res.status_code == 200
+    assert res.data["programming_languages"] == "Python, go"
+    assert "tags" not in res.data
+
+    user.profile.refresh_from_db()
+    assert user.profile.programming_languages == "Python, go"
+    assert tag_names(user.profile) == {
+        (Tag.Kind.PROGRAMMING_LANGUAGE, "python"),
+        (Tag.Kind.PROGRAMMING_LANGUAGE, "go"),
+        (Tag.Kind.INTEREST, "react"),
+    }
+
+
+def test_update_only_syncs_changed_fields(authed_client: test.Client, user: User):
+    authed_client.patch(
+        reverse("update_profile"),
+        humps.camelize({"programming_languages": "Python", "interests": "React"}),
+    )
+    res = authed_client.patch(
+        reverse("update_profile"), humps.camelize({"programming_languages": "Go"})
+    )
+
+    assert res.status_code == 200
+    assert tag_names(user.profile) == {
+        (Tag.Kind.PROGRAMMING_LANGUAGE, "go"),
+        (Tag.Kind.INTEREST, "react"),
+    }
+    # Tags are shared between profiles, and kept when unused
+    assert Tag.objects.filter(name="python").exists()
+
+
+def test_mentors_with_tags(authed_client: test.Client, mentors):
+    res = authed_client.get(reverse("mentors"), {"programming_languages": "PYTHON"})
+
+    assert res.status_code == 200
+    # Without the user themself or non-mentors
+    assert [mentor["id"] for mentor in res.data["results"]] == [
+        mentors["python"].pk,
+        mentors["python_backend"].pk,
+    ]
+    assert res.data["results"][0]["programming_languages"] == "Python, Go"
+
+    res = authed_client.get(
+        reverse("mentors"),
+        {"programming_languages": "python, go", "disciplines": "backend"},
+    )
+    assert [mentor["id"] for mentor in res.data["results"]] == [mentors["python"].pk]
+
+
+def test_mentors_with_unknown_tags(authed_client: test.Client, mentors):
+    res = authed_client.get(
+        reverse("mentors"), {"programming_languages": "Python,Cobol"}
+    )
+
+    assert res.status_code == 200
+    assert res.data["results"] == []
+
+
+def test_export_filters_on_tags(profile_admin_client: test.Client, mentors):
+    res = profile_admin_client.get(
+        reverse("export_profiles"), {"disciplines": "Frontend"}
+    )
+
+    assert res.status_code == 200
+    assert [profile["id"] for profile in res.data["results"]] == [mentors["js"].pk]
+    assert "tags" not in res.data["results"][0]
+
+
+def test_backfill():
+    profile = ProfileFactory(
+        programming_languages="Python, python", disciplines="", interests=None
+    )
+    other = ProfileFactory(programming_languages="PYTHON", interests="Go")
+    migration = importlib.import_module("core.migrations.0018_tags")
+
+    migration.fill_tags(apps, None)
+
+    assert tag_names(profile) == {(Tag.Kind.PROGRAMMING_LANGUAGE, "python")}
+    assert tag_names(other) == {
+        (Tag.Kind.PROGRAMMING_LANGUAGE, "python"),
+        (Tag.Kind.INTEREST, "go"),
+    }
+    assert ProfileTag.objects.count() == 3
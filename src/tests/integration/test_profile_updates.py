@@ -60,3 +60,37 @@ def test_update_requires_correct_format(
     )
 
     assert res.status_code == status
+
+
+def test_get_profile_is_a_single_query(
+    authed_client: test.Client, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        res = authed_client.get(reverse("update_profile"))
+
+    assert res.status_code == 200
+
+
+def test_update_profile_writes_only_changed_fields(
+    authed_client: test.Client, user: User, django_assert_num_queries
+):
+    with django_assert_num_queries(2) as ctx:
+        res = authed_client.patch(
+            reverse("update_profile"), {"city": "Norfolk", "state": user.profile.state}
+        )
+
+    assert res.status_code == 200
+    update_sql = ctx.captured_queries[-1]["sql"]
+    assert update_sql.startswith('UPDATE "profile" SET "city"')
+    assert '"state"' not in update_sql
+
+
+def test_unchanged_profile_update_skips_write(
+    authed_client: test.Client, user: User, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        res = authed_client.patch(
+            reverse("update_profile"), {"city": user.profile.city}
+        )
+
+    assert res.status_code == 200
@@ -0,0 +1,125 @@
+"""
+Guards the indexes behind hot queries: each query is `EXPLAIN`ed and fails if
+the database would read a whole table to answer it.
+
+PostgreSQL prefers sequential scans of small tables, so sequential scans are
+disabled for the duration; it still picks one when no index applies. Run the
+suite with `TEST_DB_ENGINE=django.db.backends.postgresql` to check its plans.
+"""
+
+import re
+from datetime import datetime, timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import QuerySet, Value
+from django.db.models.functions import Upper
+from django.db.models.lookups import Exact
+
+from core import geo, search, tags
+from core.models import Profile, Tag
+
+pytestmark = pytest.mark.django_db
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Needs PostgreSQL"
+)
+
+EMAIL = "Someone@Example.com"
+
+
+def explain(queryset: QuerySet) -> str:
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+def table_scans(queryset: QuerySet) -> list:
+    """
+    Returns the tables `queryset` reads in full. Reading a whole (partial)
+    index doesn't count
+    """
+    if connection.vendor == "postgresql":
+        pattern = r"Seq Scan on (\w+)"
+    else:
+        pattern = r"\bSCAN (?:TABLE )?(\w+)\b(?! USING)"
+    return re.findall(pattern, explain(queryset))
+
+
+@pytest.mark.parametrize(
+    "queryset",
+    [
+        pytest.param(
+            lambda: Profile.objects.filter(user__email=EMAIL), id="admin profile"
+        ),
+        pytest.param(lambda: User.objects.filter(email=EMAIL), id="signup"),
+        pytest.param(
+            lambda: User.objects.filter(Exact(Upper("email"), Upper(Value(EMAIL)))),
+            id="email upper",
+        ),
+        pytest.param(
+            lambda: User.objects.filter(email__iexact=EMAIL),
+            id="email iexact",
+            # SQLite compiles `iexact` to `LIKE`, which can't use the index
+            marks=postgres_only,
+        ),
+        pytest.param(
+            lambda: Profile.objects.filter(is_mentor=True), id="filter is_mentor"
+        ),
+        pytest.param(lambda: Profile.objects.filter(state="CA"), id="filter state"),
+        pytest.param(
+            lambda: Profile.objects.filter(military_status="veteran"),
+            id="filter military_status",
+        ),
+        pytest.param(
+            lambda: Profile.objects.filter(
+                created_at__gte=datetime(2024, 1, 1, tzinfo=timezone.utc)
+            ),
+            id="filter created_at",
+        ),
+    ],
+)
+def test_uses_indexes(queryset):
+    assert table_scans(queryset()) == []
+
+
+def test_nearby_mentors_reads_geohash_ranges():
+    plan = explain(geo.nearby_mentors(Profile.objects.all(), 40.7128, -74.0060, 25))
+
+    # Not the whole (mentors only) index
+    if connection.vendor == "postgresql":
+        assert re.search(r"Index Scan (on|using) profile_mentor_geohash_idx", plan)
+        assert re.search(r"Index Cond: .*geohash", plan)
+    else:
+        assert (
+            "SEARCH profile USING INDEX profile_mentor_geohash_idx "
+            "(geohash>? AND geohash<?)"
+        ) in plan
+        assert "SCAN profile" not in plan
+
+
+def test_tag_filters_read_the_join_index():
+    Tag.objects.create(kind=Tag.Kind.PROGRAMMING_LANGUAGE, name="python")
+    profiles = tags.filter_by_tags(
+        Profile.objects.all(), {"programming_languages": "Python"}
+    )
+
+    assert table_scans(profiles) == []
+    assert table_scans(Tag.objects.filter(kind="interest", name="react")) == []
+
+
+def test_search_reads_the_full_text_index():
+    plan = explain(search.search_profiles(Profile.objects.all(), "jane smi"))
+
+    if connection.vendor == "postgresql":
+        assert "Index Scan on profile_search_vector_idx" in plan
+    else:
+        # The FTS5 table first, then profiles by primary key
+        assert re.search(r"SCAN profile_search VIRTUAL TABLE INDEX \d+:M", plan)
+        assert "SEARCH profile USING INTEGER PRIMARY KEY" in plan
+
+
+def test_detects_table_scans():
+    assert table_scans(Profile.objects.filter(bio="")) == [Profile._meta.db_table]
@@ -0,0 +1,96 @@
+from io import StringIO
+
+import bcrypt
+import pytest
+from django.contrib.auth.hashers import (
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    check_password,
+)
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tests import factories as f
+from tests.test_data import DEFAULT_PASSWORD
+
+
+def set_legacy_password(user: User, encoded: str) -> None:
+    User.objects.filter(pk=user.pk).update(password=encoded)
+
+
+@pytest.fixture
+def users(db):
+    pbkdf2, bcrypt_sha256, argon2 = f.UserFactory.create_batch(3)
+    set_legacy_password(
+        pbkdf2, PBKDF2PasswordHasher().encode(DEFAULT_PASSWORD, "salt", 1000)
+    )
+    set_legacy_password(
+        bcrypt_sha256,
+        BCryptSHA256PasswordHasher().encode(DEFAULT_PASSWORD, bcrypt.gensalt(4)),
+    )
+    return pbkdf2, bcrypt_sha256, argon2
+
+
+def rehash(*args) -> str:
+    out = StringIO()
+    call_command("rehash_passwords", *args, stdout=out)
+    return out.getvalue()
+
+
+def passwords() -> dict:
+    return dict(User.objects.values_list("email", "password"))
+
+
+def test_wraps_legacy_hashes(users):
+    pbkdf2, bcrypt_sha256, argon2 = users
+    before = passwords()
+
+    out = rehash("--batch-size", "2")
+
+    after = passwords()
+    assert after[pbkdf2.email].startswith("argon2_pbkdf2_sha256$1000$salt$argon2id$")
+    assert after[bcrypt_sha256.email].startswith("argon2_bcrypt_sha256$$2b$04$")
+    assert after[argon2.email] == before[argon2.email]
+    assert all(check_password(DEFAULT_PASSWORD, encoded) for encoded in after.values())
+
+    assert "pbkdf2_sha256" in out and "iterations=1000" in out
+    assert "bcrypt_sha256" in out and "work_factor=4" in out
+    assert "Wrapped 2 legacy hashes" in out
+    assert f"Done up to user {bcrypt_sha256.pk}" in out
+
+
+def test_report_changes_nothing(users):
+    before = passwords()
+
+    out = rehash("--report")
+
+    assert passwords() == before
+    assert "total" in out and "3" in out
+    assert "Wrapped" not in out
+
+
+def test_starts_after_the_given_user(users):
+    pbkdf2, bcrypt_sha256, _ = users
+    before = passwords()
+
+    out = rehash("--start-after", str(pbkdf2.pk))
+
+    after = passwords()
+    assert f"Starting after user {pbkdf2.pk}" in out
+    assert after[pbkdf2.email] == before[pbkdf2.email]
+    assert after[bcrypt_sha256.email].startswith("argon2_bcrypt_sha256$")
+
+
+def test_login_upgrades_wrapped_hash(users, client: APIClient):
+    pbkdf2, *_ = users
+    rehash()
+
+    res = client.post(
+        reverse("rest_login"), {"email": pbkdf2.email, "password": DEFAULT_PASSWORD}
+    )
+
+    assert res.status_code == 200
+    pbkdf2.refresh_from_db()
+    assert pbkdf2.password.startswith("argon2$argon2id$")
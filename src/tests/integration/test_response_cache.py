@@ -0,0 +1,87 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.serializers import ProfileSerializer, UserSerializer
+
+
+@pytest.fixture(
+    params=[
+        ("view_user", UserSerializer, "authed_client"),
+        ("update_profile", ProfileSerializer, "authed_client"),
+        ("admin_update_profile", ProfileSerializer, "profile_admin_client"),
+    ]
+)
+def endpoint(request, user: User):
+    url_name, serializer, client_fixture = request.param
+    url = reverse(url_name)
+    if url_name == "admin_update_profile":
+        url = f"{url}?email={user.email}"
+    return url, serializer, request.getfixturevalue(client_fixture)
+
+
+def test_get_returns_strong_etag(endpoint):
+    url, _, client = endpoint
+    res = client.get(url)
+
+    assert res.status_code == 200
+    assert res["ETag"].startswith('"')
+
+
+def test_matching_etag_returns_304_without_serializing(endpoint, mocker):
+    url, serializer, client = endpoint
+    etag = client.get(url)["ETag"]
+
+    spy = mocker.spy(serializer, "to_representation")
+    res = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == 304
+    assert res["ETag"] == etag
+    assert not spy.called
+
+
+def test_stale_etag_returns_full_response(endpoint):
+    url, _, client = endpoint
+    etag = client.get(url)["ETag"]
+
+    res = client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+
+    assert res.status_code == 200
+    assert res["ETag"] == etag
+
+
+def test_profile_save_invalidates_cached_response(endpoint, user: User):
+    url, _, client = endpoint
+    etag = client.get(url)["ETag"]
+
+    user.profile.city = "Norfolk"
+    user.profile.save()
+    res = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == 200
+    assert res["ETag"] != etag
+    assert res.data["city"] == "Norfolk"
+
+
+def test_user_save_invalidates_cached_user_response(
+    authed_client: APIClient, user: User
+):
+    etag = authed_client.get(reverse("view_user"))["ETag"]
+
+    user.first_name = "Changed"
+    user.save()
+    res = authed_client.get(reverse("view_user"), HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == 200
+    assert res.data["first_name"] == "Changed"
+
+
+def test_patch_invalidates_cached_profile(authed_client: APIClient):
+    etag = authed_client.get(reverse("update_profile"))["ETag"]
+
+    authed_client.patch(reverse("update_profile"), {"city": "Norfolk"})
+    res = authed_client.get(reverse("update_profile"), HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == 200
+    assert res.data["city"] == "Norfolk"
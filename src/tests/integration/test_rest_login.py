@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 
+from core.exceptions import ServiceUnavailable
+from core.throttling import LoginRateThrottle
 from tests.test_data import DEFAULT_PASSWORD
 
 
@@ -52,3 +56,49 @@ def test_invalid_username_rest_login(client: APIClient, user: User):
 
     assert res.status_code == 400
     assert res.data["error"] == "The email or password you entered is incorrect!"
+
+
+def test_busy_hashing_pool_rest_login(client: APIClient, user: User, mocker):
+    mocker.patch(
+        "core.hashers.hashing_pool.run", side_effect=ServiceUnavailable(wait=3)
+    )
+    hashers = [
+        "core.hashers.PooledArgon2PasswordHasher",
+        *settings.PASSWORD_HASHERS[1:],
+    ]
+
+    with override_settings(PASSWORD_HASHERS=hashers):
+        res = client.post(
+            reverse("rest_login"), {"email": user.email, "password": DEFAULT_PASSWORD}
+        )
+
+    assert res.status_code == 503
+    assert res["Retry-After"] == "3"
+
+
+def test_rest_login_rehashes_outdated_password(client: APIClient, user: User):
+    with override_settings(ARGON2_TIME_COST=3):
+        res = client.post(
+            reverse("rest_login"), {"email": user.email, "password": DEFAULT_PASSWORD}
+        )
+
+    assert res.status_code == 200
+    user.refresh_from_db()
+    assert "t=3," in user.password
+
+
+def test_throttled_rest_login(
+    client: APIClient, user: User, mocker, django_assert_num_queries
+):
+    mocker.patch.dict(LoginRateThrottle.THROTTLE_RATES, {"login": "2/min"})
+    data = {"email": user.email, "password": "wrongPass"}
+    for _ in range(2):
+        client.post(reverse("rest_login"), data)
+
+    check_password = mocker.patch("django.contrib.auth.hashers.check_password")
+    with django_assert_num_queries(0):
+        res = client.post(reverse("rest_login"), data)
+
+    assert res.status_code == 429
+    assert int(res["Retry-After"]) > 0
+    check_password.assert_not_called()
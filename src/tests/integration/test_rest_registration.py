@@ -3,13 +3,16 @@ from typing import Dict, List
 
 import pytest
 from allauth.account.models import EmailAddress
+from allauth.account.signals import email_confirmed
 from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives
 from django.http import HttpResponseNotFound
 from django.urls import reverse
-from django_q.models import OrmQ
 from rest_framework.test import APIClient
 
+from core import batching
+from core.models import PendingSideEffect
+
 key_pattern = re.compile(r"http.+/confirm_email\?key=(?P<key>.+)")
 
 
@@ -66,10 +69,12 @@ def test_slack_invite_task_created(
 
     assert res.status_code == 201
 
-    # Check that tasks were queued in django-q
-    tasks = OrmQ.objects.all()
-    # Tasks should be queued (slack invite + welcome email)
-    assert tasks.count() >= 1
+    # Slack invite + welcome email are queued for the next batch
+    pending = PendingSideEffect.objects.filter(email=register_form["email"])
+    assert set(pending.values_list("kind", flat=True)) == {
+        batching.SLACK_INVITE,
+        batching.WELCOME_EMAIL,
+    }
 
 
 @pytest.mark.django_db
@@ -124,9 +129,6 @@ def test_mailing_list_task_created(
     register_form: Dict[str, str],
     mailoutbox: List[EmailMultiAlternatives],
 ):
-    # Clear any existing queued tasks
-    OrmQ.objects.all().delete()
-
     client.post(reverse("rest_register"), register_form)
 
     body = mailoutbox[0].body
@@ -136,6 +138,27 @@ def test_mailing_list_task_created(
 
     assert res.status_code == 200
 
-    # Check that mailing list task was queued in django-q
-    tasks = OrmQ.objects.all()
-    assert tasks.count() >= 1
+    # Mailing list subscription is queued for the next batch
+    assert PendingSideEffect.objects.filter(
+        kind=batching.MAILING_LIST, email=register_form["email"]
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_repeated_email_confirmation_queues_one_subscription(
+    client: APIClient,
+    register_form: Dict[str, str],
+    mailoutbox: List[EmailMultiAlternatives],
+):
+    client.post(reverse("rest_register"), register_form)
+    email_address = EmailAddress.objects.get(email=register_form["email"])
+
+    email_confirmed.send(sender=EmailAddress, request=None, email_address=email_address)
+    email_confirmed.send(sender=EmailAddress, request=None, email_address=email_address)
+
+    assert (
+        PendingSideEffect.objects.filter(
+            kind=batching.MAILING_LIST, email=register_form["email"]
+        ).count()
+        == 1
+    )
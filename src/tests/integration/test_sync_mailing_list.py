@@ -0,0 +1,176 @@
+from io import StringIO
+
+import pytest
+from allauth.account.models import EmailAddress
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django_q.models import Schedule
+
+from core import mailing_list
+from core.mailing_list import subscriber_hash
+from core.models import MailingListMember
+from core.tasks import sync_mailing_list
+from tests import factories as f
+from tests.fake_mailchimp import FakeMailchimpServer
+
+pytestmark = pytest.mark.django_db
+
+
+def batch_requests(fake_mailchimp: FakeMailchimpServer) -> list:
+    return [
+        request
+        for request in fake_mailchimp.requests
+        if request.method == "POST" and request.path == "/3.0/batches"
+    ]
+
+
+def test_pushes_confirmed_users_in_batches(fake_mailchimp: FakeMailchimpServer):
+    users = f.UserFactory.create_batch(5)
+    unconfirmed = f.UserFactory()
+    EmailAddress.objects.filter(user=unconfirmed).update(verified=False)
+    f.UserFactory(is_active=False)
+
+    result = mailing_list.sync(batch_size=2, poll_interval=0)
+
+    assert result == mailing_list.SyncResult(users=5, changed=5, synced=5, failed=0)
+    assert len(batch_requests(fake_mailchimp)) == 3
+    assert {member["email_address"] for member in fake_mailchimp.members.values()} == {
+        user.email for user in users
+    }
+    member = fake_mailchimp.members[subscriber_hash(users[0].email)]
+    assert member["status"] == "subscribed"
+    assert member["merge_fields"] == {
+        "FNAME": users[0].first_name,
+        "LNAME": users[0].last_name,
+    }
+    assert MailingListMember.objects.count() == 5
+
+
+def test_only_pushes_changes(fake_mailchimp: FakeMailchimpServer):
+    renamed, _, _ = f.UserFactory.create_batch(3)
+    mailing_list.sync(poll_interval=0)
+    fake_mailchimp.requests.clear()
+
+    User.objects.filter(pk=renamed.pk).update(first_name="Renamed")
+    new = f.UserFactory()
+    result = mailing_list.sync(poll_interval=0)
+
+    assert result == mailing_list.SyncResult(users=4, changed=2, synced=2, failed=0)
+    (request,) = batch_requests(fake_mailchimp)
+    assert {operation["operation_id"] for operation in request.json["operations"]} == {
+        subscriber_hash(renamed.email),
+        subscriber_hash(new.email),
+    }
+    assert (
+        fake_mailchimp.members[subscriber_hash(renamed.email)]["merge_fields"]["FNAME"]
+        == "Renamed"
+    )
+
+
+def test_nothing_to_push(fake_mailchimp: FakeMailchimpServer):
+    f.UserFactory()
+    mailing_list.sync(poll_interval=0)
+    fake_mailchimp.requests.clear()
+
+    assert mailing_list.sync(poll_interval=0).changed == 0
+    assert not fake_mailchimp.requests
+
+
+def test_failed_members_are_retried(fake_mailchimp: FakeMailchimpServer):
+    good, bad = f.UserFactory.create_batch(2)
+    fake_mailchimp.rejected.add(bad.email)
+
+    result = mailing_list.sync(poll_interval=0)
+
+    assert result == mailing_list.SyncResult(users=2, changed=2, synced=1, failed=1)
+    assert list(
+        MailingListMember.objects.values_list("subscriber_hash", flat=True)
+    ) == [subscriber_hash(good.email)]
+
+    fake_mailchimp.rejected.clear()
+    assert mailing_list.sync(poll_interval=0).synced == 1
+
+
+def test_finished_batches_are_saved_before_timing_out(
+    fake_mailchimp: FakeMailchimpServer, mocker
+):
+    running, done = f.UserFactory.create_batch(2)
+    create_batch = fake_mailchimp.create_batch
+
+    def never_finish_first(operations: list) -> dict:
+        batch = create_batch(operations)
+        if len(fake_mailchimp.batches) == 1:
+            fake_mailchimp.batches[batch["id"]]["status"] = "started"
+        return batch
+
+    mocker.patch.object(fake_mailchimp, "create_batch", never_finish_first)
+
+    with pytest.raises(TimeoutError):
+        mailing_list.sync(batch_size=1, timeout=0, poll_interval=0)
+
+    assert list(
+        MailingListMember.objects.values_list("subscriber_hash", flat=True)
+    ) == [subscriber_hash(done.email)]
+
+
+def test_unsubscribed_members_stay_unsubscribed(fake_mailchimp: FakeMailchimpServer):
+    user = f.UserFactory()
+    fake_mailchimp.members[subscriber_hash(user.email)] = {
+        "email_address": user.email,
+        "status": "unsubscribed",
+        "merge_fields": {},
+    }
+
+    mailing_list.sync(poll_interval=0)
+
+    assert fake_mailchimp.members[subscriber_hash(user.email)]["status"] == (
+        "unsubscribed"
+    )
+
+
+def test_refresh_snapshot(fake_mailchimp: FakeMailchimpServer, mocker):
+    mocker.patch.object(mailing_list, "MEMBERS_PAGE_SIZE", 2)
+    on_list, outdated, missing = f.UserFactory.create_batch(3)
+    for user, first_name in [(on_list, on_list.first_name), (outdated, "Old")]:
+        fake_mailchimp.members[subscriber_hash(user.email)] = {
+            "email_address": user.email,
+            "status": "subscribed",
+            "merge_fields": {"FNAME": first_name, "LNAME": user.last_name},
+        }
+    fake_mailchimp.members["gone"] = {
+        "email_address": "gone@example.com",
+        "status": "subscribed",
+        "merge_fields": {},
+    }
+    assert mailing_list.refresh_snapshot() == 3
+    result = mailing_list.sync(poll_interval=0)
+
+    assert result.changed == 2
+    (request,) = batch_requests(fake_mailchimp)
+    assert {operation["operation_id"] for operation in request.json["operations"]} == {
+        subscriber_hash(outdated.email),
+        subscriber_hash(missing.email),
+    }
+
+
+def test_command(fake_mailchimp: FakeMailchimpServer):
+    f.UserFactory.create_batch(2)
+    out = StringIO()
+
+    call_command("sync_mailing_list", "--refresh-snapshot", stdout=out)
+
+    assert out.getvalue().splitlines() == [
+        "0 members on the list",
+        "2 confirmed users, 2 new or changed, 2 synced, 0 failed",
+    ]
+
+
+def test_scheduled_task(fake_mailchimp: FakeMailchimpServer):
+    f.UserFactory()
+
+    sync_mailing_list()
+
+    assert len(fake_mailchimp.members) == 1
+    assert Schedule.objects.filter(
+        func="core.tasks.sync_mailing_list", schedule_type=Schedule.DAILY
+    ).exists()
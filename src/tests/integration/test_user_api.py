@@ -44,3 +44,28 @@ def test_user_api_requires_get_or_patch(
     func = getattr(authed_client, method)
     res = func(reverse("view_user"))
     assert res.status_code == status
+
+
+def test_user_api_loads_user_and_profile_in_one_query(
+    authed_client: APIClient, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        res = authed_client.get(reverse("view_user"))
+
+    assert res.status_code == 200
+
+
+def test_user_api_patch_updates_only_changed_fields(
+    authed_client: APIClient, user: User, django_assert_num_queries
+):
+    # The user, its update, then reindexing its profile for search
+    with django_assert_num_queries(4) as ctx:
+        res = authed_client.patch(reverse("view_user"), {"firstName": "Changed"})
+
+    assert res.status_code == 200
+    update_sql = ctx.captured_queries[1]["sql"]
+    assert update_sql.startswith('UPDATE "auth_user" SET "first_name"')
+    assert "last_name" not in update_sql
+
+    user.refresh_from_db()
+    assert user.first_name == "Changed"
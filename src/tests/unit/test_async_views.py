@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory, override_settings
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.async_views import async_view, offload
+
+
+class ThreadNameView(APIView):
+    authentication_classes = ()
+    permission_classes = ()
+
+    def get(self, request):
+        return Response({"thread": threading.current_thread().name})
+
+
+def test_offloaded_view_is_async_and_runs_on_executor():
+    view = offload(ThreadNameView.as_view())
+    request = RequestFactory().get("/")
+
+    assert asyncio.iscoroutinefunction(view)
+
+    response = async_to_sync(view)(request)
+
+    assert response.status_code == 200
+    assert response.is_rendered
+    assert response.data["thread"].startswith("async-view")
+
+
+def test_offloaded_view_keeps_view_attributes():
+    sync_view = ThreadNameView.as_view()
+
+    assert offload(sync_view).csrf_exempt
+    assert offload(sync_view).view_class is ThreadNameView
+
+
+def test_async_view_only_wraps_when_enabled():
+    sync_view = ThreadNameView.as_view()
+
+    with override_settings(ASYNC_VIEWS=False):
+        assert async_view(sync_view) is sync_view
+
+    with override_settings(ASYNC_VIEWS=True):
+        assert asyncio.iscoroutinefunction(async_view(sync_view))
@@ -0,0 +1,122 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from core.authentication import (
+    ClaimsJWTAuthentication,
+    ClaimsUser,
+    ProfileJWTAuthentication,
+)
+from core.handlers import CustomTokenObtainPairSerializer
+from core.views import UpdateProfile, UserView
+
+factory = APIRequestFactory()
+
+
+def authenticate(user: User) -> ClaimsUser:
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    claims_user, _ = ClaimsJWTAuthentication().authenticate(request)
+    return claims_user
+
+
+def test_claims_are_read_without_queries(user: User):
+    authenticate(user)  # warm the user state cache
+
+    with CaptureQueriesContext(connection) as queries:
+        claims_user = authenticate(user)
+        assert claims_user.pk == user.pk
+        assert claims_user.email == user.email
+        assert claims_user.first_name == user.first_name
+        assert claims_user.is_authenticated
+        assert not claims_user.is_staff
+        assert claims_user.profile.zipcode == user.profile.zipcode
+        assert claims_user.profile.is_mentor == user.profile.is_mentor
+
+    assert len(queries) == 0
+
+
+def test_profile_is_loaded_with_the_user(user: User):
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    with CaptureQueriesContext(connection) as queries:
+        authed_user, _ = ProfileJWTAuthentication().authenticate(request)
+        assert authed_user.profile.zipcode == user.profile.zipcode
+
+    assert isinstance(authed_user, User)
+    assert len(queries) == 1
+
+
+def test_profile_authentication_rejects_deleted_users(user: User):
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    user.delete()
+
+    with pytest.raises(AuthenticationFailed):
+        ProfileJWTAuthentication().authenticate(request)
+
+
+def test_unknown_attributes_load_user_once(user: User):
+    claims_user = authenticate(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert claims_user.username == user.username
+        assert claims_user.date_joined == user.date_joined
+        assert claims_user.profile.city == user.profile.city
+
+    assert len(queries) == 1
+
+
+def test_writes_go_to_the_real_user(user: User):
+    claims_user = authenticate(user)
+
+    claims_user.first_name = "Updated"
+    claims_user.save()
+
+    assert claims_user.first_name == "Updated"
+    user.refresh_from_db()
+    assert user.first_name == "Updated"
+
+
+def test_inactive_user_is_rejected_immediately(user: User):
+    authenticate(user)
+
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(user)
+
+
+def test_deleted_user_is_rejected(user: User):
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    user.delete()
+
+    request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+    with pytest.raises(AuthenticationFailed):
+        ClaimsJWTAuthentication().authenticate(request)
+
+
+@pytest.fixture
+def claims_authentication(mocker):
+    for view in (UserView, UpdateProfile):
+        mocker.patch.object(view, "authentication_classes", (ClaimsJWTAuthentication,))
+
+
+@pytest.mark.usefixtures("claims_authentication")
+def test_views_work_with_claims_user(authed_client, user: User):
+    res = authed_client.get(reverse("view_user"))
+    assert res.status_code == 200
+    assert res.data["email"] == user.email
+    assert res.data["city"] == user.profile.city
+
+    res = authed_client.patch(reverse("update_profile"), {"city": "Norfolk"})
+    assert res.status_code == 200
+
+    user.profile.refresh_from_db()
+    assert user.profile.city == "Norfolk"
@@ -0,0 +1,221 @@
+from datetime import timedelta
+from typing import List
+
+import pytest
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from django_q.models import Schedule
+from pytest_mock import MockFixture
+
+from core import batching, idempotency
+from core.models import IdempotencyKey, PendingSideEffect
+from core.queues import CRITICAL
+from core.tasks import send_welcome_emails
+
+pytestmark = pytest.mark.django_db
+
+
+def enqueue(kind: str, *emails: str, capture) -> None:
+    with capture(execute=True):
+        for email in emails:
+            batching.enqueue(kind, email)
+
+
+@override_settings(SIDE_EFFECT_BATCH_SIZE=3)
+def test_partial_batch_schedules_one_flush(
+    mocker: MockFixture, django_capture_on_commit_callbacks
+):
+    async_task = mocker.patch("core.batching.async_task")
+
+    enqueue(
+        batching.SLACK_INVITE,
+        "a@b.com",
+        "c@d.com",
+        capture=django_capture_on_commit_callbacks,
+    )
+
+    assert PendingSideEffect.objects.count() == 2
+    assert Schedule.objects.filter(func="core.batching.flush").count() == 1
+    async_task.assert_not_called()
+
+
+@override_settings(SIDE_EFFECT_BATCH_SIZE=2)
+def test_full_batch_flushes_right_away(
+    mocker: MockFixture, django_capture_on_commit_callbacks
+):
+    async_task = mocker.patch("core.batching.async_task")
+
+    enqueue(
+        batching.SLACK_INVITE,
+        "a@b.com",
+        "c@d.com",
+        capture=django_capture_on_commit_callbacks,
+    )
+
+    async_task.assert_called_once_with(
+        "core.batching.flush", batching.SLACK_INVITE, cluster=CRITICAL
+    )
+
+
+@override_settings(SIDE_EFFECT_BATCH_SIZE=2)
+def test_flush_sends_batches(mocker: MockFixture):
+    send = mocker.patch("core.tasks.send_slack_invites")
+    for email in ["a@b.com", "c@d.com", "e@f.com"]:
+        PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email=email)
+    PendingSideEffect.objects.create(kind=batching.WELCOME_EMAIL, email="a@b.com")
+
+    assert batching.flush(batching.SLACK_INVITE) == 3
+
+    assert [call.args[0] for call in send.call_args_list] == [
+        ["a@b.com", "c@d.com"],
+        ["e@f.com"],
+    ]
+    assert list(PendingSideEffect.objects.values_list("kind", flat=True)) == [
+        batching.WELCOME_EMAIL
+    ]
+
+
+def test_failed_batch_is_kept_and_retried(mocker: MockFixture):
+    mocker.patch("core.tasks.send_slack_invites", side_effect=ConnectionError)
+    PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email="a@b.com")
+
+    assert batching.flush(batching.SLACK_INVITE) == 0
+
+    assert PendingSideEffect.objects.count() == 1
+    assert Schedule.objects.filter(func="core.batching.flush").count() == 1
+
+
+def test_only_failed_side_effects_are_kept(mocker: MockFixture):
+    mocker.patch(
+        "core.tasks.send_slack_invites",
+        side_effect=batching.BatchFailed({"c@d.com": "400 Bad Request"}),
+    )
+    for email in ["a@b.com", "c@d.com", "e@f.com"]:
+        PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email=email)
+
+    assert batching.flush(batching.SLACK_INVITE) == 2
+
+    side_effect = PendingSideEffect.objects.get()
+    assert side_effect.email == "c@d.com"
+    assert side_effect.attempts == 1
+    # Released to be retried
+    assert side_effect.claimed_at is None
+
+
+def test_batches_are_sent_after_claiming_them(mocker: MockFixture):
+    def send(emails):
+        # Claimed and committed: other flushes skip them, without waiting
+        assert PendingSideEffect.objects.filter(claimed_at=None).count() == 0
+        assert batching.claim(batching.SLACK_INVITE) == []
+
+    mocker.patch("core.tasks.send_slack_invites", side_effect=send)
+    PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email="a@b.com")
+
+    assert batching.flush(batching.SLACK_INVITE) == 1
+    assert not PendingSideEffect.objects.exists()
+
+
+def test_abandoned_claims_are_claimed_again():
+    claimed = PendingSideEffect.objects.create(
+        kind=batching.SLACK_INVITE, email="a@b.com", claimed_at=timezone.now()
+    )
+    abandoned = PendingSideEffect.objects.create(
+        kind=batching.SLACK_INVITE,
+        email="c@d.com",
+        claimed_at=timezone.now() - timedelta(hours=1),
+    )
+
+    assert batching.claim(batching.SLACK_INVITE) == [abandoned]
+    assert claimed.pk not in [s.pk for s in batching.claim(batching.SLACK_INVITE)]
+
+
+def test_duplicate_side_effects_are_dropped(django_capture_on_commit_callbacks):
+    enqueue(
+        batching.SLACK_INVITE,
+        "a@b.com",
+        " A@B.com",
+        "c@d.com",
+        capture=django_capture_on_commit_callbacks,
+    )
+    enqueue(
+        batching.WELCOME_EMAIL, "a@b.com", capture=django_capture_on_commit_callbacks
+    )
+
+    assert sorted(PendingSideEffect.objects.values_list("kind", "email")) == [
+        (batching.SLACK_INVITE, "a@b.com"),
+        (batching.SLACK_INVITE, "c@d.com"),
+        (batching.WELCOME_EMAIL, "a@b.com"),
+    ]
+
+
+def test_duplicates_are_dropped_until_the_key_expires(mocker: MockFixture):
+    mocker.patch("core.batching.schedule_flush")
+    assert batching.enqueue(batching.MAILING_LIST, "a@b.com")
+    assert not batching.enqueue(batching.MAILING_LIST, "a@b.com")
+
+    IdempotencyKey.objects.update(expires_at=timezone.now())
+    assert batching.enqueue(batching.MAILING_LIST, "a@b.com")
+    assert PendingSideEffect.objects.count() == 2
+
+
+def test_rolled_back_side_effects_are_not_duplicates(mocker: MockFixture):
+    mocker.patch("core.batching.schedule_flush")
+    with pytest.raises(RuntimeError), transaction.atomic():
+        batching.enqueue(batching.SLACK_INVITE, "a@b.com")
+        raise RuntimeError
+
+    assert batching.enqueue(batching.SLACK_INVITE, "a@b.com")
+
+
+def test_flush_purges_expired_keys(mocker: MockFixture):
+    mocker.patch("core.batching.schedule_flush")
+    batching.enqueue(batching.SLACK_INVITE, "a@b.com")
+    batching.enqueue(batching.SLACK_INVITE, "c@d.com")
+    IdempotencyKey.objects.filter(
+        key=idempotency.make_key(batching.BATCH_TASKS[batching.SLACK_INVITE], "a@b.com")
+    ).update(expires_at=timezone.now())
+    mocker.patch("core.tasks.send_slack_invites")
+
+    batching.flush(batching.SLACK_INVITE)
+
+    assert IdempotencyKey.objects.count() == 1
+
+
+def test_send_welcome_emails_one_message_per_user(
+    mailoutbox: List[EmailMultiAlternatives],
+):
+    send_welcome_emails(["a@b.com", "c@d.com"])
+
+    assert [message.to for message in mailoutbox] == [["a@b.com"], ["c@d.com"]]
+
+
+def test_send_welcome_emails_raises_the_failed_emails(
+    mocker: MockFixture, mailoutbox: List[EmailMultiAlternatives]
+):
+    send = EmailMultiAlternatives.send
+
+    def fail_for_c(message, *args, **kwargs):
+        if message.to == ["c@d.com"]:
+            raise OSError("Connection reset")
+        return send(message, *args, **kwargs)
+
+    mocker.patch.object(EmailMultiAlternatives, "send", fail_for_c)
+
+    with pytest.raises(batching.BatchFailed) as e:
+        send_welcome_emails(["a@b.com", "c@d.com", "e@f.com"])
+
+    assert e.value.failed == {"c@d.com": "Connection reset"}
+    assert [message.to for message in mailoutbox] == [["a@b.com"], ["e@f.com"]]
+
+
+@override_settings(EMAIL_BACKEND="anymail.backends.test.EmailBackend")
+def test_send_welcome_emails_as_one_mandrill_batch(
+    mailoutbox: List[EmailMultiAlternatives],
+):
+    send_welcome_emails(["a@b.com", "c@d.com"])
+
+    assert len(mailoutbox) == 1
+    assert mailoutbox[0].to == ["a@b.com", "c@d.com"]
+    assert mailoutbox[0].merge_data == {"a@b.com": {}, "c@d.com": {}}
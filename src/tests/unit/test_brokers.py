@@ -0,0 +1,94 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.conf import Conf
+from django_q.models import OrmQ
+from pytest_mock import MockFixture
+
+from core.brokers import PostgresBroker
+from core.queues import BULK, CRITICAL
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Needs PostgreSQL"
+)
+
+
+@pytest.mark.django_db
+def test_configured_broker():
+    assert isinstance(get_broker(CRITICAL), PostgresBroker)
+
+
+@pytest.mark.django_db
+def test_queue_roundtrip():
+    broker = PostgresBroker(list_key=BULK)
+    task_id = broker.enqueue("payload")
+
+    assert broker.queue_size() == 1
+    assert broker.dequeue() == [(task_id, "payload")]
+    assert broker.queue_size() == 0
+    assert broker.lock_size() == 1
+
+    broker.acknowledge(task_id)
+    assert not OrmQ.objects.exists()
+
+
+@pytest.mark.django_db
+def test_queues_are_separate():
+    PostgresBroker(list_key=BULK).enqueue("bulk payload")
+
+    assert PostgresBroker(list_key=CRITICAL).queue_size() == 0
+
+
+@pytest.mark.django_db
+def test_claim_count_and_retry():
+    broker = PostgresBroker(list_key=BULK)
+    for i in range(3):
+        broker.enqueue(f"payload {i}")
+
+    claimed = broker.claim(count=2, retry=600)
+
+    assert [payload for _, payload in claimed] == ["payload 0", "payload 1"]
+    assert broker.lock_size() == 2
+    lock = OrmQ.objects.get(pk=claimed[0][0]).lock
+    assert lock > timezone.now() + timedelta(seconds=Conf.RETRY)
+
+
+@postgres_only
+@pytest.mark.django_db
+def test_concurrent_clusters_claim_different_tasks(mocker: MockFixture):
+    mocker.patch.object(Conf, "BULK", 2)
+    broker = PostgresBroker(list_key=BULK)
+    for i in range(4):
+        broker.enqueue(f"payload {i}")
+
+    first = broker.claim()
+    second = PostgresBroker(list_key=BULK).claim()
+
+    assert len(first) == len(second) == 2
+    assert not {pk for pk, _ in first} & {pk for pk, _ in second}
+
+
+@postgres_only
+@pytest.mark.django_db(transaction=True)
+def test_idle_cluster_wakes_up_on_enqueue():
+    broker = PostgresBroker(list_key=CRITICAL)
+    broker.LISTEN_TIMEOUT = 30
+    broker._listen()
+
+    woken = threading.Event()
+
+    def wait():
+        broker.wait()
+        woken.set()
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    PostgresBroker(list_key=CRITICAL).enqueue("payload")
+    thread.join(5)
+
+    assert woken.is_set()
+    broker._close_listener()
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from django.core.cache import caches
+
+from core.cache import (
+    LRUCache,
+    bump_profile_version,
+    get_profile_version,
+    profile_version_key,
+    response_cache_key,
+)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("c") == 3
+
+
+def test_lru_entries_expire(mocker):
+    clock = mocker.patch("core.cache.time.monotonic", return_value=100.0)
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+
+    clock.return_value = 109.0
+    assert cache.get("a") == 1
+
+    clock.return_value = 110.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def tiered():
+    cache = caches["default"]
+    cache.clear()
+    cache.stats.reset()
+    yield cache
+    cache.clear()
+
+
+def test_tiered_cache_serves_repeat_reads_from_l1(tiered):
+    tiered.set("key", {"a": 1})
+
+    assert tiered.get("key") == {"a": 1}
+    assert tiered.get("key") == {"a": 1}
+    assert tiered.get_stats() == {"l1_hits": 2, "l2_hits": 0, "misses": 0}
+    assert tiered.l2.stats.as_dict() == {}
+
+
+def test_tiered_cache_falls_back_to_l2(tiered):
+    tiered.l2.set("key", "shared")
+
+    assert tiered.get("key") == "shared"
+    assert tiered.get("key") == "shared"
+    assert tiered.get("missing", "default") == "default"
+    assert tiered.get_stats() == {"l1_hits": 1, "l2_hits": 1, "misses": 1}
+
+
+def test_tiered_cache_l1_returns_copies(tiered):
+    tiered.set("key", {"a": 1})
+    tiered.get("key")["a"] = 2
+
+    assert tiered.get("key") == {"a": 1}
+
+
+def test_tiered_cache_delete_clears_both_tiers(tiered):
+    tiered.set("key", "value")
+    tiered.delete("key")
+
+    assert tiered.get("key") is None
+    assert tiered.l2.keys() == []
+
+
+def test_tiered_cache_zero_timeout_skips_l1(tiered):
+    tiered.set("key", "value", timeout=0)
+
+    assert tiered.get("key") is None
+    assert len(tiered.l1) == 0
+
+
+def test_tiered_cache_l1_entries_are_short_lived(tiered, mocker):
+    tiered.set("key", "value")
+    tiered.l2.set("key", "changed elsewhere")
+
+    assert tiered.get("key") == "value"
+
+    later = time.monotonic() + tiered.l1_timeout + 1
+    mocker.patch("core.cache.time.monotonic", return_value=later)
+    assert tiered.get("key") == "changed elsewhere"
+
+
+def test_tiered_cache_add_and_incr(tiered):
+    assert tiered.add("counter", 1)
+    assert not tiered.add("counter", 5)
+    assert tiered.incr("counter") == 2
+    assert tiered.get("counter") == 2
+
+
+def test_profile_versions_skip_l1(tiered):
+    version = get_profile_version(1)
+    # Bumped by another worker
+    caches["shared"].set(profile_version_key(1), "bumped", timeout=None)
+
+    assert get_profile_version(1) == "bumped"
+    assert response_cache_key("profile", 1) == "response:profile:1:bumped"
+    bump_profile_version(1)
+    assert get_profile_version(1) not in (version, "bumped")
+    assert len(tiered.l1) == 0
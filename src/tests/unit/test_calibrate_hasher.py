@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.management.commands.calibrate_hasher import Command
+
+
+def fake_measure(self, params, samples):
+    """
+    Pretends a hash costs 10ms per MiB-iteration
+    """
+    time_cost, memory_cost, _ = params
+    return time_cost * memory_cost / 1024 * 0.01
+
+
+@pytest.fixture(autouse=True)
+def measure(mocker):
+    mocker.patch.object(Command, "measure", fake_measure)
+
+
+def calibrate(*args) -> str:
+    out = StringIO()
+    call_command("calibrate_hasher", *args, stdout=out, stderr=StringIO())
+    return out.getvalue()
+
+
+def test_spends_budget_on_memory_first():
+    out = calibrate("--target-ms", "800")
+
+    assert "ARGON2_TIME_COST=2\n" in out
+    assert "ARGON2_MEMORY_COST=40960\n" in out
+    assert "ARGON2_PARALLELISM=1\n" in out
+
+
+def test_adds_iterations_once_memory_is_capped():
+    out = calibrate("--target-ms", "2560", "--max-memory", "32768")
+
+    assert "ARGON2_TIME_COST=8\n" in out
+    assert "ARGON2_MEMORY_COST=32768\n" in out
+
+
+def test_never_goes_below_owasp_minimum():
+    out = calibrate("--target-ms", "10")
+
+    assert "ARGON2_TIME_COST=2\n" in out
+    assert "ARGON2_MEMORY_COST=19456\n" in out
+
+
+def test_rejects_max_memory_below_minimum():
+    with pytest.raises(CommandError):
+        calibrate("--max-memory", "1024")
+
+
+def test_writes_env_file(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("DEBUG=True\nARGON2_TIME_COST=4")
+
+    calibrate("--target-ms", "800", "--write", str(env_file))
+
+    assert env_file.read_text() == (
+        "DEBUG=True\n"
+        "ARGON2_TIME_COST=2\n"
+        "ARGON2_MEMORY_COST=40960\n"
+        "ARGON2_PARALLELISM=1\n"
+    )
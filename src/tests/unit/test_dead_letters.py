@@ -0,0 +1,194 @@
+import threading
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from pytest_mock import MockFixture
+
+from core import batching, dead_letters
+from core.dead_letters import capture_failures
+from core.models import DeadLetter, PendingSideEffect
+from core.tasks import send_slack_invite_job
+from tests.fake_http import FakeHTTPServer
+
+pytestmark = pytest.mark.django_db
+
+calls = []
+failing = set()
+running = 0
+most_running = 0
+counter_lock = threading.Lock()
+
+
+@capture_failures
+def flaky_task(name: str, delay: float = 0) -> None:
+    global running, most_running
+    with counter_lock:
+        running += 1
+        most_running = max(most_running, running)
+    time.sleep(delay)
+    with counter_lock:
+        running -= 1
+        calls.append(name)
+    if name in failing:
+        raise ConnectionError(f"{name} failed")
+
+
+@pytest.fixture(autouse=True)
+def reset_task():
+    global running, most_running
+    calls.clear()
+    failing.clear()
+    running = most_running = 0
+
+
+def record_failures(*names: str) -> None:
+    failing.update(names)
+    for name in names:
+        flaky_task(name)
+    failing.clear()
+    calls.clear()
+
+
+def test_failures_are_recorded():
+    failing.add("a")
+
+    flaky_task("a")
+    flaky_task("a")
+    flaky_task("b")
+
+    letter = DeadLetter.objects.get()
+    assert letter.task == "tests.unit.test_dead_letters.flaky_task"
+    assert letter.args == ["a"]
+    assert letter.attempts == 2
+    assert "ConnectionError: a failed" in letter.error
+
+
+def test_failed_slack_invite_is_recorded(fake_server: FakeHTTPServer):
+    fake_server.respond(status=400)
+
+    send_slack_invite_job("a@b.com")
+
+    letter = DeadLetter.objects.get()
+    assert letter.task == "core.tasks.send_slack_invite_job"
+    assert letter.args == ["a@b.com"]
+    assert "400" in letter.error
+
+
+def test_replay():
+    record_failures("a", "b", "c")
+    failing.add("b")
+
+    result = dead_letters.replay(DeadLetter.objects.order_by("pk"))
+
+    assert result == dead_letters.ReplayResult(succeeded=2, failed=1)
+    assert sorted(calls) == ["a", "b", "c"]
+    letter = DeadLetter.objects.get()
+    assert letter.args == ["b"]
+    assert letter.attempts == 2
+
+
+def test_replay_is_throttled():
+    record_failures(*"abcdef")
+    DeadLetter.objects.update(kwargs={"delay": 0.1})
+
+    started = time.monotonic()
+    dead_letters.replay(DeadLetter.objects.all(), concurrency=2, rate=20)
+
+    assert most_running == 2
+    # 6 tasks started at most 20 per second
+    assert time.monotonic() - started >= 0.25
+    assert not DeadLetter.objects.exists()
+
+
+@override_settings(SIDE_EFFECT_MAX_ATTEMPTS=2)
+def test_side_effects_become_dead_letters(mocker: MockFixture):
+    mocker.patch("core.tasks.send_slack_invites", side_effect=ConnectionError)
+    PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email="a@b.com")
+
+    batching.flush(batching.SLACK_INVITE)
+    assert PendingSideEffect.objects.get().attempts == 1
+    assert not DeadLetter.objects.exists()
+
+    batching.flush(batching.SLACK_INVITE)
+    assert not PendingSideEffect.objects.exists()
+    letter = DeadLetter.objects.get()
+    assert letter.task == "core.tasks.send_slack_invites"
+    assert letter.args == [["a@b.com"]]
+
+
+@override_settings(SIDE_EFFECT_MAX_ATTEMPTS=2)
+def test_only_failed_emails_become_dead_letters(fake_server: FakeHTTPServer):
+    def invite(request):
+        status = 400 if request.json["email"] == "bad@b.com" else 200
+        return fake_server.default._replace(status=status)
+
+    fake_server.handle = invite
+    for email in ["a@b.com", "bad@b.com", "c@d.com"]:
+        PendingSideEffect.objects.create(kind=batching.SLACK_INVITE, email=email)
+
+    batching.flush(batching.SLACK_INVITE)
+    batching.flush(batching.SLACK_INVITE)
+
+    assert not PendingSideEffect.objects.exists()
+    letter = DeadLetter.objects.get()
+    assert letter.args == [["bad@b.com"]]
+    assert "a@b.com" not in letter.error
+    # The two good addresses were invited once, the bad one twice
+    invited = [request.json["email"] for request in fake_server.requests]
+    assert sorted(invited) == ["a@b.com", "bad@b.com", "bad@b.com", "c@d.com"]
+
+    # Replaying it fails again, rather than passing for a delivered batch
+    assert dead_letters.replay([letter], rate=0) == (0, 1)
+
+
+def test_replay_command():
+    record_failures("a", "b", "c")
+    failing.add("c")
+    out = StringIO()
+
+    call_command("replay_dead_letters", "--batch-size", "2", "--rate", "0", stdout=out)
+
+    assert out.getvalue().splitlines() == [
+        "2 succeeded, 0 failed",
+        "2 succeeded, 1 failed",
+        "Replayed 3 tasks: 2 succeeded, 1 failed",
+    ]
+    assert DeadLetter.objects.get().attempts == 2
+
+
+def test_replay_command_filters():
+    record_failures("a", "b")
+    DeadLetter.objects.filter(args=["b"]).update(attempts=5)
+
+    call_command(
+        "replay_dead_letters",
+        "--task",
+        "tests.unit.test_dead_letters.flaky_task",
+        "--max-attempts",
+        "5",
+        stdout=StringIO(),
+    )
+
+    assert calls == ["a"]
+
+
+def test_admin_action(admin_client):
+    record_failures("a", "b")
+    failing.add("b")
+
+    res = admin_client.post(
+        reverse("admin:core_deadletter_changelist"),
+        {
+            "action": "replay",
+            "_selected_action": list(DeadLetter.objects.values_list("pk", flat=True)),
+        },
+        follow=True,
+    )
+
+    assert res.status_code == 200
+    assert "1 tasks succeeded, 1 failed again" in res.content.decode()
+    assert sorted(calls) == ["a", "b"]
@@ -0,0 +1,197 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from django_q.models import Failure, OrmQ, Schedule, Success
+from django_q.tasks import async_task, schedule
+from pytest_mock import MockFixture
+
+from core.brokers import PostgresBroker
+from core.executor import TaskExecutor, enqueue_due_schedules
+from core.queues import BULK, CRITICAL, default_queue
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+running = 0
+most_running = 0
+counter_lock = threading.Lock()
+
+
+def slow_task(seconds: float) -> float:
+    global running, most_running
+    with counter_lock:
+        running += 1
+        most_running = max(most_running, running)
+    time.sleep(seconds)
+    with counter_lock:
+        running -= 1
+    return seconds
+
+
+@pytest.fixture
+def executor():
+    global running, most_running
+    running = most_running = 0
+    executor = TaskExecutor()
+    yield executor
+    executor.shutdown(timeout=5)
+
+
+def wait_for(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_runs_queued_tasks(executor: TaskExecutor):
+    async_task("math.floor", 1.5, cluster=CRITICAL)
+    async_task("math.floor", 2.5, cluster=CRITICAL)
+
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: Success.objects.count() == 2)
+
+    assert sorted(Success.objects.values_list("result", flat=True)) == [1, 2]
+    assert set(Success.objects.values_list("cluster", flat=True)) == {CRITICAL}
+    assert not OrmQ.objects.exists()
+
+
+def test_only_runs_its_queues(executor: TaskExecutor):
+    async_task("math.floor", 1.5, cluster=BULK)
+    async_task("math.floor", 2.5, cluster=CRITICAL)
+
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: Success.objects.exists())
+    time.sleep(0.3)
+
+    assert list(OrmQ.objects.values_list("key", flat=True)) == [BULK]
+
+
+@override_settings(TASKS_IN_PROCESS_WORKERS=2)
+def test_max_concurrency(executor: TaskExecutor):
+    for _ in range(5):
+        async_task("tests.unit.test_executor.slow_task", 0.2, cluster=CRITICAL)
+
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: Success.objects.count() == 5)
+
+    assert most_running == 2
+
+
+@override_settings(TASKS_IN_PROCESS_WORKERS=2)
+def test_only_claims_tasks_it_can_run(executor: TaskExecutor):
+    for _ in range(5):
+        async_task("tests.unit.test_executor.slow_task", 0.5, cluster=CRITICAL)
+
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: running == 2)
+
+    # The others are left for other workers
+    assert OrmQ.objects.filter(lock__gt=timezone.now()).count() == 2
+
+
+@override_settings(TASKS_IN_PROCESS_WORKERS=2)
+def test_waits_for_tasks_without_holding_threads(
+    executor: TaskExecutor, mocker: MockFixture
+):
+    free = []
+
+    def wait(broker):
+        free.append(executor._slots._value)
+        time.sleep(0.05)
+
+    mocker.patch.object(PostgresBroker, "wait", autospec=True, side_effect=wait)
+
+    executor.start(queues=[BULK])
+    wait_for(lambda: len(free) >= 3)
+
+    assert set(free) == {2}
+
+
+def test_locks_tasks_for_their_queue_retry(executor: TaskExecutor):
+    async_task("tests.unit.test_executor.slow_task", 0.5, cluster=BULK)
+    retry = settings.Q_CLUSTER["ALT_CLUSTERS"][BULK]["retry"]
+
+    executor.start(queues=[BULK])
+    wait_for(lambda: running == 1)
+
+    lock = OrmQ.objects.get().lock
+    assert lock > timezone.now() + timedelta(seconds=retry - 5)
+
+
+def test_skips_queues_that_could_run_twice(executor: TaskExecutor):
+    q_cluster = {
+        **settings.Q_CLUSTER,
+        "ALT_CLUSTERS": {CRITICAL: {"timeout": 60, "retry": 60}},
+    }
+    with override_settings(Q_CLUSTER=q_cluster):
+        executor.start(queues=[CRITICAL])
+
+    assert not executor.running
+
+
+def test_shutdown_drains_running_tasks(executor: TaskExecutor):
+    async_task("tests.unit.test_executor.slow_task", 0.5, cluster=CRITICAL)
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: running == 1)
+
+    assert executor.shutdown(timeout=5)
+
+    assert Success.objects.count() == 1
+    assert not executor.running
+
+
+def test_shutdown_gives_up_after_timeout(executor: TaskExecutor):
+    async_task("tests.unit.test_executor.slow_task", 1, cluster=CRITICAL)
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: running == 1)
+
+    assert not executor.shutdown(timeout=0.1)
+    # Still finishes
+    wait_for(lambda: Success.objects.count() == 1)
+
+
+def test_failed_tasks_are_saved(executor: TaskExecutor):
+    async_task("math.floor", "not a number", cluster=CRITICAL)
+
+    executor.start(queues=[CRITICAL])
+    wait_for(lambda: Failure.objects.exists())
+
+    # Left for the broker to retry
+    assert OrmQ.objects.filter(key=CRITICAL).exists()
+
+
+def test_enqueue_due_schedules():
+    past = timezone.now() - timedelta(seconds=1)
+    schedule("math.floor", 1.5, cluster=CRITICAL, next_run=past)
+    schedule("math.floor", 2.5, cluster=BULK, next_run=past)
+    schedule("math.floor", 3.5, next_run=past)
+    schedule(
+        "math.floor",
+        4.5,
+        cluster=CRITICAL,
+        next_run=timezone.now() + timedelta(hours=1),
+    )
+    hourly = schedule(
+        "math.floor",
+        5.5,
+        cluster=CRITICAL,
+        schedule_type=Schedule.HOURLY,
+        next_run=past,
+    )
+
+    assert enqueue_due_schedules([default_queue(), CRITICAL]) == 3
+
+    assert sorted(OrmQ.objects.values_list("key", flat=True)) == [
+        CRITICAL,
+        CRITICAL,
+        default_queue(),
+    ]
+    # ONCE schedules are done, the others move to their next run
+    assert Schedule.objects.count() == 3
+    hourly.refresh_from_db()
+    assert hourly.next_run > timezone.now()
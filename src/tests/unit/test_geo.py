@@ -0,0 +1,151 @@
+import random
+
+import pytest
+from django.db import connection
+
+from core import geo
+from core.models import Profile
+from tests.factories import ProfileFactory
+
+
+def test_encode():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geo.encode(40.7128, -74.0060) == "dr5regw3p"
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius",
+    [
+        (40.7, -74.0, 5),
+        (40.7, -74.0, 100),
+        (64.8, -147.7, 300),
+        (-33.9, 151.2, 25),
+        # Across the antimeridian and around a pole
+        (52.0, 179.9, 50),
+        (89.9, 0, 50),
+    ],
+)
+def test_cells_cover_the_search_circle(latitude, longitude, radius):
+    box = geo.bounding_box(latitude, longitude, radius)
+    cells = geo.covering_cells(box)
+    assert 0 < len(cells) <= geo.MAX_CELLS
+
+    rng = random.Random(0)
+    for _ in range(500):
+        lat = rng.uniform(box.min_lat, box.max_lat)
+        lon = (rng.uniform(box.min_lon, box.max_lon) + 180) % 360 - 180
+        if geo.distance(latitude, longitude, lat, lon) <= radius:
+            assert geo.encode(lat, lon).startswith(tuple(cells))
+
+
+def test_huge_radius_covers_everything():
+    assert geo.covering_cells(geo.bounding_box(0, 0, 12000)) == [""]
+
+
+def test_distance():
+    # New York to Los Angeles
+    assert geo.distance(40.7128, -74.0060, 34.0522, -118.2437) == pytest.approx(
+        2445, abs=5
+    )
+
+
+@pytest.mark.parametrize(
+    "cell, expected",
+    [("dr5", "dr6"), ("dr5r", "dr5s"), ("dr9", "drb"), ("drz", "ds"), ("zz", None)],
+)
+def test_next_cell(cell, expected):
+    assert geo.next_cell(cell) == expected
+
+
+def test_cell_ranges_hold_every_hash_of_the_cell():
+    rng = random.Random(2)
+    hashes = [
+        geo.encode(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)
+    ]
+    for cell in ["dr5", "9z", "z", "b"]:
+        upper = geo.next_cell(cell)
+        assert {h for h in hashes if h.startswith(cell)} == {
+            h for h in hashes if cell <= h and (upper is None or h < upper)
+        }
+
+
+@pytest.fixture
+def locale_collation():
+    """
+    Compares the geohash column like a non-C collation would: ICU on
+    PostgreSQL, which sorts punctuation before letters and digits; on SQLite,
+    a stand-in ignoring punctuation like glibc's en_US. Schema changes are
+    rolled back with the test's transaction
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER TABLE profile ALTER COLUMN geohash "
+                'TYPE varchar(12) COLLATE "und-x-icu"'
+            )
+        yield
+        return
+
+    def compare(a: str, b: str) -> int:
+        a, b = ["".join(char for char in value if char.isalnum()) for value in (a, b)]
+        return (a > b) - (a < b)
+
+    connection.ensure_connection()
+    connection.connection.create_collation("BINARY", compare)
+    with connection.cursor() as cursor:
+        # SQLite seeks indexes with its own BINARY, so scan the column instead
+        cursor.execute("DROP INDEX profile_mentor_geohash_idx")
+    yield
+    connection.connection.create_collation("BINARY", None)
+
+
+@pytest.mark.django_db
+def test_nearby_mentors_under_a_locale_collation(locale_collation):
+    near = ProfileFactory(is_mentor=True, latitude=40.7128, longitude=-74.0060)
+    ProfileFactory(is_mentor=True, latitude=34.0522, longitude=-118.2437)
+
+    found = geo.nearby_mentors(Profile.objects.all(), 40.7, -74.0, 10)
+
+    assert [p.pk for p in found] == [near.pk]
+
+
+@pytest.mark.django_db
+def test_nearby_matches_a_full_scan():
+    rng = random.Random(1)
+    for _ in range(40):
+        ProfileFactory(
+            is_mentor=True,
+            latitude=rng.uniform(39, 42),
+            longitude=rng.uniform(-76, -72),
+        )
+    ProfileFactory(is_mentor=True)  # No coordinates
+    latitude, longitude, radius = 40.7, -74.0, 80
+
+    found = geo.nearby_mentors(Profile.objects.all(), latitude, longitude, radius)
+
+    expected = sorted(
+        (geo.distance(latitude, longitude, p.latitude, p.longitude), p.pk)
+        for p in Profile.objects.exclude(latitude=None)
+    )
+    expected = [pk for d, pk in expected if d <= radius]
+    assert 0 < len(expected) < 40
+    assert [p.pk for p in found] == expected
+    assert [p.distance for p in found] == pytest.approx(
+        [geo.distance(latitude, longitude, p.latitude, p.longitude) for p in found]
+    )
+
+
+@pytest.mark.django_db
+def test_geohash_follows_coordinates():
+    profile = ProfileFactory(latitude=40.7128, longitude=-74.0060)
+    assert profile.geohash == "dr5regw3p"
+
+    profile.latitude, profile.longitude = 34.0522, -118.2437
+    profile.save(update_fields=["latitude", "longitude"])
+    profile.refresh_from_db()
+    assert profile.geohash == geo.encode(34.0522, -118.2437)
+
+    profile.latitude = None
+    profile.save()
+    profile.refresh_from_db()
+    assert profile.geohash == ""
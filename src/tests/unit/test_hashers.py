@@ -0,0 +1,237 @@
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+import pytest
+from django.contrib.auth.hashers import (
+    BCryptPasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    PBKDF2SHA1PasswordHasher,
+    check_password,
+    identify_hasher,
+    make_password,
+)
+from django.test import override_settings
+from rest_framework.exceptions import APIException
+
+from core import metrics
+from core.exceptions import ServiceUnavailable
+from core.hashers import (
+    Argon2WrappedPBKDF2PasswordHasher,
+    HashingPool,
+    PooledArgon2PasswordHasher,
+    TunedArgon2PasswordHasher,
+    WrappedLegacyPasswordHasher,
+)
+
+PASSWORD = "correct horse battery staple"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with override_settings(PASSWORD_HASH_PROCESSES=1, PASSWORD_HASH_MAX_QUEUE=1):
+        pool = HashingPool()
+        pool.start()
+        yield pool
+        pool.shutdown()
+
+
+@pytest.fixture
+def pooled_hasher(pool, mocker):
+    mocker.patch("core.hashers.hashing_pool", pool)
+    return PooledArgon2PasswordHasher()
+
+
+def test_pooled_hasher_matches_tuned_hasher(pooled_hasher):
+    salt = pooled_hasher.salt()
+    encoded = pooled_hasher.encode(PASSWORD, salt)
+
+    assert encoded == TunedArgon2PasswordHasher().encode(PASSWORD, salt)
+    assert pooled_hasher.verify(PASSWORD, encoded)
+    assert not pooled_hasher.verify("wrong", encoded)
+
+
+def test_pooled_hasher_records_metrics(pooled_hasher):
+    metrics.reset()
+    pooled_hasher.verify(PASSWORD, make_password(PASSWORD))
+
+    timings = metrics.snapshot()["timings"]
+    assert timings["password_hash.queue_wait"]["count"] == 1
+    assert timings["password_hash.hash_time"]["count"] == 1
+
+
+def test_full_queue_is_rejected_with_retry_after(pooled_hasher, pool):
+    encoded = make_password(PASSWORD)
+    # One process + one queued hash
+    pool._slots.acquire()
+    pool._slots.acquire()
+    try:
+        with pytest.raises(ServiceUnavailable) as exc:
+            pooled_hasher.verify(PASSWORD, encoded)
+    finally:
+        pool._slots.release()
+        pool._slots.release()
+
+    assert exc.value.status_code == 503
+    assert exc.value.wait == 1
+    assert metrics.snapshot()["counters"]["password_hash.rejected"] >= 1
+
+
+@override_settings(PASSWORD_HASH_PROCESSES=1)
+def test_pool_is_recreated_after_fork(mocker):
+    pool = HashingPool()
+    executor, _ = pool.start()
+    try:
+        mocker.patch("core.hashers.os.getpid", return_value=-1)
+        assert pool.start()[0] is not executor
+        pool.shutdown()
+    finally:
+        executor.shutdown()
+
+
+@override_settings(PASSWORD_HASH_PROCESSES=1, PASSWORD_HASH_MAX_QUEUE=0)
+def test_slot_is_released_to_the_pool_it_was_taken_from(mocker):
+    pool = HashingPool()
+    executor, slots = pool.start()
+
+    def restart(*args):
+        # Another request restarts the pool while this hash runs
+        pool.shutdown()
+        pool.start()
+        raise BrokenProcessPool
+
+    mocker.patch.object(executor, "submit", side_effect=restart)
+    try:
+        with pytest.raises(ServiceUnavailable):
+            pool.run("verify", (), PASSWORD, "")
+
+        assert slots.acquire(blocking=False)
+        _, new_slots = pool.start()
+        assert new_slots is not slots
+        assert new_slots.acquire(blocking=False)
+    finally:
+        pool.shutdown()
+
+
+@override_settings(
+    PASSWORD_HASH_PROCESSES=1, PASSWORD_HASH_MAX_QUEUE=3, PASSWORD_HASH_TIMEOUT=0.5
+)
+def test_hashes_queued_behind_a_failed_one_are_unavailable():
+    pool = HashingPool()
+    pool.start()
+    encoded = make_password(PASSWORD)
+    errors = []
+
+    def run(method: str, params: tuple, *args: str):
+        try:
+            pool.run(method, params, *args)
+        except Exception as e:
+            errors.append(e)
+
+    # Times out and shuts the pool down, cancelling the hashes queued behind it
+    slow = threading.Thread(
+        target=run, args=("encode", (30, 65536, 1), PASSWORD, "saltsalt")
+    )
+    slow.start()
+    queued = [
+        threading.Thread(
+            target=run,
+            args=(
+                "verify",
+                TunedArgon2PasswordHasher().cost_params(),
+                PASSWORD,
+                encoded,
+            ),
+        )
+        for _ in range(3)
+    ]
+    for thread in queued:
+        thread.start()
+    for thread in [slow, *queued]:
+        thread.join(10)
+    pool.shutdown()
+
+    assert errors
+    assert all(isinstance(e, ServiceUnavailable) for e in errors)
+
+
+def test_check_password_through_pool(pooled_hasher, mocker):
+    mocker.patch("django.contrib.auth.hashers.get_hasher", return_value=pooled_hasher)
+    encoded = make_password(PASSWORD)
+
+    assert check_password(PASSWORD, encoded)
+
+
+def test_service_unavailable_is_an_api_exception():
+    assert issubclass(ServiceUnavailable, APIException)
+
+
+@override_settings(ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8192)
+def test_hashes_with_other_params_must_update():
+    hasher = TunedArgon2PasswordHasher()
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    assert not hasher.must_update(encoded)
+
+    with override_settings(ARGON2_TIME_COST=2):
+        assert hasher.must_update(encoded)
+
+
+@override_settings(ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8192)
+def test_harden_runtime_makes_up_missing_work(mocker):
+    hasher = TunedArgon2PasswordHasher()
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    run_hash = mocker.spy(hasher, "run_hash")
+
+    hasher.harden_runtime(PASSWORD, encoded)
+    run_hash.assert_not_called()
+
+    with override_settings(ARGON2_TIME_COST=3):
+        hasher.harden_runtime(PASSWORD, encoded)
+    assert run_hash.call_args.args[1] == (2, 8192, 1)
+
+
+LEGACY_HASHES = {
+    "pbkdf2_sha256": lambda: PBKDF2PasswordHasher().encode(PASSWORD, "salt", 1000),
+    "pbkdf2_sha1": lambda: PBKDF2SHA1PasswordHasher().encode(PASSWORD, "salt", 1000),
+    "bcrypt": lambda: BCryptPasswordHasher().encode(PASSWORD, bcrypt.gensalt(4)),
+    "bcrypt_sha256": lambda: BCryptSHA256PasswordHasher().encode(
+        PASSWORD, bcrypt.gensalt(4)
+    ),
+}
+
+
+@pytest.mark.parametrize("legacy_algorithm", LEGACY_HASHES)
+def test_wrapped_legacy_hash_verifies_without_plaintext(legacy_algorithm):
+    legacy_encoded = LEGACY_HASHES[legacy_algorithm]()
+    hasher = identify_hasher(f"argon2_{legacy_encoded}")
+    wrapped = hasher.wrap(legacy_encoded)
+
+    assert isinstance(hasher, WrappedLegacyPasswordHasher)
+    assert identify_hasher(wrapped) is not None
+    assert legacy_encoded.split("$")[-1] not in wrapped
+    assert check_password(PASSWORD, wrapped)
+    assert not check_password("wrong", wrapped)
+
+
+def test_wrapped_legacy_hash_is_upgraded_on_login(mocker):
+    hasher = Argon2WrappedPBKDF2PasswordHasher()
+    wrapped = hasher.wrap(LEGACY_HASHES["pbkdf2_sha256"]())
+    setter = mocker.Mock()
+
+    assert check_password(PASSWORD, wrapped, setter)
+    setter.assert_called_once_with(PASSWORD)
+
+
+def test_wrapped_legacy_hasher_is_abstract():
+    with pytest.raises(TypeError):
+        WrappedLegacyPasswordHasher()
+
+
+@pytest.mark.parametrize(
+    "encoded",
+    ["argon2_pbkdf2_sha1$1000$salt$argon2id$v=19$m=8,t=1,p=1$c2FsdA$aGFzaA", "$"],
+)
+def test_wrapped_legacy_hasher_rejects_other_hashes(encoded):
+    with pytest.raises(ValueError):
+        Argon2WrappedPBKDF2PasswordHasher().decode(encoded)
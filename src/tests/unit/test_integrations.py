@@ -0,0 +1,97 @@
+import socket
+
+import pytest
+import requests
+from django.test import override_settings
+from urllib3.util.retry import Retry
+
+from core import integrations
+from core.integrations import get_mailchimp, get_session
+from tests.fake_http import FakeHTTPServer
+
+
+def test_sessions_are_reused_per_process(mocker):
+    session = get_session("pybot")
+
+    assert get_session("pybot") is session
+    assert get_session("mailchimp") is not session
+
+    mocker.patch("core.integrations.os.getpid", return_value=-1)
+    assert get_session("pybot") is not session
+
+
+def test_retries_server_errors(fake_server: FakeHTTPServer):
+    fake_server.respond(status=503, times=2)
+
+    res = get_session("mailchimp").put(f"{fake_server.url}/members/a", json={})
+
+    assert res.status_code == 200
+    assert len(fake_server.requests) == 3
+
+
+def test_posts_are_not_retried_after_reaching_the_service(
+    fake_server: FakeHTTPServer,
+):
+    fake_server.respond(status=503)
+
+    res = get_session("pybot").post(f"{fake_server.url}/invite", json={})
+
+    assert res.status_code == 503
+    assert len(fake_server.requests) == 1
+
+
+@override_settings(INTEGRATION_RETRIES=2)
+def test_posts_are_retried_when_they_cant_connect(mocker):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    increment = mocker.spy(Retry, "increment")
+
+    with pytest.raises(requests.ConnectionError):
+        get_session("pybot").post(f"http://127.0.0.1:{port}/invite", json={})
+
+    assert increment.call_count == 3
+
+
+@override_settings(INTEGRATION_RETRIES=2)
+def test_gives_up_after_retries(fake_server: FakeHTTPServer):
+    fake_server.default = fake_server.default._replace(status=502)
+
+    res = get_session("pybot").get(fake_server.url)
+
+    assert res.status_code == 502
+    assert len(fake_server.requests) == 3
+
+
+def test_honours_retry_after(fake_server: FakeHTTPServer, mocker):
+    sleep = mocker.patch("urllib3.util.retry.time.sleep")
+    fake_server.respond(status=429, headers={"Retry-After": "2"})
+
+    res = get_session("pybot").get(fake_server.url)
+
+    assert res.status_code == 200
+    sleep.assert_any_call(2.0)
+
+
+@override_settings(INTEGRATION_READ_TIMEOUT=0.1, INTEGRATION_RETRIES=1)
+def test_times_out_slow_responses(fake_server: FakeHTTPServer):
+    fake_server.respond(delay=0.5, times=2)
+
+    with pytest.raises(requests.ConnectionError):
+        get_session("pybot").get(fake_server.url)
+
+    assert len(fake_server.requests) == 2
+
+
+def test_mailchimp_client_uses_pooled_session(fake_server: FakeHTTPServer):
+    client = get_mailchimp()
+
+    client.lists.all(get_all=False)
+    client.lists.all(get_all=False)
+
+    assert get_mailchimp() is client
+    assert client.session is integrations.get_session("mailchimp")
+    assert [request.path for request in fake_server.requests][0].startswith(
+        "/3.0/lists"
+    )
+    assert fake_server.connections == 1
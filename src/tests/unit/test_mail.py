@@ -0,0 +1,74 @@
+import os
+
+import pytest
+from django.template.base import Template
+from django.template.loader import render_to_string
+from django.test import override_settings
+
+from core import mail
+
+
+@pytest.fixture(autouse=True)
+def clear_mail_cache():
+    mail.clear()
+    yield
+    mail.clear()
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / "static.txt").write_text("Hello {{ name|default:'there' }}")
+    templates = [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [str(tmp_path)],
+        }
+    ]
+    with override_settings(TEMPLATES=templates):
+        yield tmp_path
+
+
+def test_render_static_matches_render_to_string():
+    assert mail.render_static("registration/welcome.html") == render_to_string(
+        "registration/welcome.html"
+    )
+
+
+def test_render_static_renders_once(template_dir, mocker):
+    render = mocker.spy(Template, "render")
+
+    assert mail.render_static("static.txt") == "Hello there"
+    assert mail.render_static("static.txt") == "Hello there"
+
+    assert render.call_count == 1
+
+
+def test_templates_are_recompiled_when_the_file_changes(template_dir, mocker):
+    assert mail.render_static("static.txt") == "Hello there"
+    compile_nodelist = mocker.spy(Template, "compile_nodelist")
+
+    mail.get_compiled_template("static.txt")
+    compile_nodelist.assert_not_called()
+
+    path = template_dir / "static.txt"
+    path.write_text("Welcome {{ name|default:'aboard' }}")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert mail.render_static("static.txt") == "Welcome aboard"
+    compile_nodelist.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_personalized_emails_reuse_compiled_templates(user, mailoutbox, mocker):
+    from allauth.account.adapter import get_adapter
+
+    adapter = get_adapter()
+    context = {"user": user, "activate_url": "https://example.com/a", "key": "a"}
+    adapter.send_mail("account/email/email_confirmation", user.email, context)
+    compile_nodelist = mocker.spy(Template, "compile_nodelist")
+
+    adapter.send_mail("account/email/email_confirmation", user.email, context)
+
+    compile_nodelist.assert_not_called()
+    assert len(mailoutbox) == 2
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.permissions import (
+    HasGroupPermission,
+    get_group_names,
+    group_cache,
+    is_in_group,
+)
+from tests import factories as f
+
+view = SimpleNamespace(required_groups={"GET": ["ProfileAdmin"]})
+
+
+def admin_request(user: User) -> SimpleNamespace:
+    # Fresh instance per "request", like the JWT authentication class returns
+    return SimpleNamespace(user=User.objects.get(pk=user.pk), method="GET")
+
+
+@pytest.mark.django_db
+def test_anonymous_user_has_no_groups():
+    assert get_group_names(AnonymousUser()) == frozenset()
+    assert not is_in_group(AnonymousUser(), "ProfileAdmin")
+
+
+def test_group_membership_is_cached(profile_admin: User):
+    assert is_in_group(profile_admin, "ProfileAdmin")
+    assert group_cache.get(profile_admin.pk) == frozenset({"ProfileAdmin"})
+
+
+def test_warm_cache_authorizes_without_queries(profile_admin: User):
+    permission = HasGroupPermission()
+
+    cold_request = admin_request(profile_admin)
+    with CaptureQueriesContext(connection) as cold:
+        assert permission.has_permission(cold_request, view)
+
+    warm_request = admin_request(profile_admin)
+    with CaptureQueriesContext(connection) as warm:
+        assert permission.has_permission(warm_request, view)
+
+    assert len(cold) == 1
+    assert len(warm) == 0
+
+
+def test_adding_group_invalidates_cache(user: User, profile_admin_group: Group):
+    assert not is_in_group(admin_request(user).user, "ProfileAdmin")
+
+    user.groups.add(profile_admin_group)
+
+    assert is_in_group(admin_request(user).user, "ProfileAdmin")
+
+
+def test_removing_user_from_group_invalidates_cache(
+    profile_admin: User, profile_admin_group: Group
+):
+    assert is_in_group(admin_request(profile_admin).user, "ProfileAdmin")
+
+    profile_admin_group.user_set.remove(profile_admin)
+
+    assert not is_in_group(admin_request(profile_admin).user, "ProfileAdmin")
+
+
+def test_deleting_group_invalidates_cache(
+    profile_admin: User, profile_admin_group: Group
+):
+    other = f.UserFactory()
+    other.groups.add(profile_admin_group)
+    assert is_in_group(admin_request(other).user, "ProfileAdmin")
+
+    profile_admin_group.delete()
+
+    assert not is_in_group(admin_request(profile_admin).user, "ProfileAdmin")
+    assert not is_in_group(admin_request(other).user, "ProfileAdmin")
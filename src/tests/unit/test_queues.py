@@ -0,0 +1,129 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from django_q.models import OrmQ, Schedule, Task
+from django_q.tasks import async_task
+
+from core import batching, metrics
+from core.models import PendingSideEffect
+from core.queues import BULK, CRITICAL, default_queue, queue_stats, record_wait
+
+pytestmark = pytest.mark.django_db
+
+
+def stats_by_queue(**kwargs) -> dict:
+    return {row["queue"]: row for row in queue_stats(**kwargs)}
+
+
+def finished_task(cluster, latency: float, id: str) -> Task:
+    stopped = timezone.now()
+    return Task.objects.create(
+        id=id,
+        name=id,
+        func="core.batching.flush",
+        cluster=cluster,
+        started=stopped - timedelta(seconds=latency),
+        stopped=stopped,
+        success=True,
+    )
+
+
+def test_queues_have_their_own_workers():
+    stats = stats_by_queue()
+
+    assert list(stats) == [default_queue(), CRITICAL, BULK]
+    assert stats[CRITICAL]["workers"] == 2
+    assert stats[BULK]["workers"] == 1
+
+
+@override_settings(SIDE_EFFECT_BATCH_SIZE=1)
+def test_flushes_are_routed_by_kind(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        batching.enqueue(batching.WELCOME_EMAIL, "a@b.com")
+        batching.enqueue(batching.MAILING_LIST, "a@b.com")
+
+    assert sorted(OrmQ.objects.values_list("key", flat=True)) == [BULK, CRITICAL]
+
+
+def test_delayed_flushes_are_routed_by_kind(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        batching.enqueue(batching.SLACK_INVITE, "a@b.com")
+        batching.enqueue(batching.MAILING_LIST, "a@b.com")
+
+    assert PendingSideEffect.objects.count() == 2
+    flushes = Schedule.objects.filter(func="core.batching.flush")
+    assert sorted(flushes.values_list("cluster", flat=True)) == [
+        BULK,
+        CRITICAL,
+    ]
+
+
+def test_queue_depth():
+    async_task("core.batching.flush", batching.MAILING_LIST, cluster=BULK)
+    async_task("core.batching.flush", batching.MAILING_LIST, cluster=BULK)
+    # Picked up by a worker
+    OrmQ.objects.filter(key=BULK).update(lock=timezone.now() - timedelta(seconds=5))
+    async_task("core.batching.flush", batching.SLACK_INVITE, cluster=CRITICAL)
+    OrmQ.objects.filter(key=CRITICAL).update(
+        lock=timezone.now() + timedelta(seconds=60)
+    )
+
+    stats = stats_by_queue()
+
+    assert stats[BULK]["queued"] == 2
+    assert stats[BULK]["oldest_wait"] >= 5
+    assert stats[CRITICAL]["queued"] == 0
+    assert stats[CRITICAL]["running"] == 1
+    assert stats[CRITICAL]["oldest_wait"] is None
+    assert stats[default_queue()]["queued"] == 0
+
+
+def test_queue_latency():
+    finished_task(CRITICAL, 1, "a")
+    finished_task(CRITICAL, 3, "b")
+    finished_task(None, 10, "c")
+    old = finished_task(BULK, 100, "d")
+    Task.objects.filter(pk=old.pk).update(stopped=timezone.now() - timedelta(hours=2))
+
+    stats = stats_by_queue()
+
+    assert stats[CRITICAL]["done"] == 2
+    assert stats[CRITICAL]["mean_latency"] == pytest.approx(2)
+    assert stats[CRITICAL]["max_latency"] == pytest.approx(3)
+    assert stats[default_queue()]["mean_latency"] == pytest.approx(10)
+    assert stats[BULK]["done"] == 0
+    assert stats[BULK]["mean_latency"] is None
+    assert stats_by_queue(since=timedelta(hours=3))[BULK]["done"] == 1
+
+
+def test_record_wait():
+    metrics.reset()
+    queued = timezone.now() - timedelta(seconds=2)
+
+    record_wait({"cluster": CRITICAL, "started": queued})
+    record_wait({"started": queued})
+
+    timings = metrics.snapshot()["timings"]
+    assert timings[f"queue.{CRITICAL}.wait"]["count"] == 1
+    assert timings[f"queue.{CRITICAL}.wait"]["min"] >= 2
+    assert timings[f"queue.{default_queue()}.wait"]["count"] == 1
+
+
+def test_queue_stats_command():
+    async_task("core.batching.flush", batching.MAILING_LIST, cluster=BULK)
+
+    out = StringIO()
+    call_command("queue_stats", "--json", stdout=out)
+    stats = {row["queue"]: row for row in json.loads(out.getvalue())}
+    assert stats[BULK]["queued"] == 1
+
+    out = StringIO()
+    call_command("queue_stats", stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split()[:3] == ["queue", "workers", "queued"]
+    assert lines[-1].split()[:3] == [BULK, "1", "1"]
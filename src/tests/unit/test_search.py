@@ -0,0 +1,9 @@
+from core import search
+
+
+def test_terms():
+    assert search.terms("Jane  SMITH") == ["jane", "smith"]
+    assert search.terms('"smith" OR (near* -x)') == ["smith", "or", "near", "x"]
+    assert search.terms("jane.doe@example.com") == ["jane", "doe", "example", "com"]
+    assert search.terms(" ?! ") == []
+    assert len(search.terms("a " * 50)) == search.MAX_TERMS
@@ -0,0 +1,32 @@
+import pytest
+
+from core import tags
+
+
+@pytest.mark.parametrize(
+    "value, labels",
+    [
+        (None, []),
+        ("", []),
+        (" , ,", []),
+        ("React", ["React"]),
+        ("React, Java", ["React", "Java"]),
+        # Trimmed, deduplicated regardless of case, the first spelling wins
+        ("  Python ,python,PYTHON, Go ", ["Python", "Go"]),
+        ("Machine   Learning, machine learning", ["Machine Learning"]),
+    ],
+)
+def test_split(value, labels):
+    assert tags.split(value) == labels
+
+
+def test_normalize():
+    assert tags.normalize(None) is None
+    assert tags.normalize("") == ""
+    assert tags.normalize("React, Java") == "React, Java"
+    assert tags.normalize("python,Django ,  Python") == "python, Django"
+
+
+def test_tag_name():
+    assert tags.tag_name("Machine  Learning") == "machine learning"
+    assert len(tags.tag_name("x" * 300)) == 100
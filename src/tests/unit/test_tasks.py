@@ -1,17 +1,19 @@
 from typing import List
 
 import pytest
-import requests
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.mail import EmailMultiAlternatives
-from pytest_mock import MockFixture
 
+from core.batching import BatchFailed
 from core.tasks import (
     add_user_to_mailing_list,
+    add_users_to_mailing_list,
     send_slack_invite_job,
+    send_slack_invites,
     send_welcome_email,
 )
+from tests.fake_http import FakeHTTPServer
 
 TEST_EMAIL = "test@test.com"
 
@@ -27,21 +29,95 @@ def test_send_welcome_email(mailoutbox: List[EmailMultiAlternatives]):
 
 
 @pytest.mark.django_db
-def test_send_slack_invite_job(mocker: MockFixture):
-    mock = mocker.patch.object(requests, "post")
+def test_send_slack_invite_job(fake_server: FakeHTTPServer):
     # Tasks are now synchronous functions, call directly
     send_slack_invite_job(TEST_EMAIL)
 
-    assert mock.called
-    assert mock.call_args[0] == (f"{settings.PYBOT_URL}/pybot/api/v1/slack/invite",)
-    assert "email" in mock.call_args[1]["json"]
-    assert mock.call_args[1]["json"]["email"] == TEST_EMAIL
+    request = fake_server.requests[0]
+    assert request.method == "POST"
+    assert request.path == "/pybot/api/v1/slack/invite"
+    assert request.json == {"email": TEST_EMAIL}
+    assert request.headers["Authorization"] == f"Bearer {settings.PYBOT_AUTH_TOKEN}"
 
 
 @pytest.mark.django_db
-def test_add_user_to_mailing_list(user: User, mocker: MockFixture):
-    mock = mocker.patch("core.tasks.MailChimp")
+def test_add_user_to_mailing_list(user: User, fake_server: FakeHTTPServer):
+    fake_server.respond(json={"id": "member-id"})
     # Tasks are now synchronous functions, call directly
     add_user_to_mailing_list(user.email)
 
-    assert mock.called
+    request = fake_server.requests[0]
+    assert request.path == f"/3.0/lists/{settings.MAILCHIMP_LIST_ID}/members"
+    assert request.json["email_address"] == user.email
+
+
+@pytest.mark.django_db
+def test_send_slack_invites_reuses_connection(fake_server: FakeHTTPServer):
+    send_slack_invites([TEST_EMAIL, "other@test.com"])
+    send_slack_invites(["third@test.com"])
+
+    assert [request.json["email"] for request in fake_server.requests] == [
+        TEST_EMAIL,
+        "other@test.com",
+        "third@test.com",
+    ]
+    assert fake_server.connections == 1
+
+
+@pytest.mark.django_db
+def test_send_slack_invites_raises_the_failed_emails(fake_server: FakeHTTPServer):
+    fake_server.respond(status=200)
+    fake_server.respond(status=400)
+    fake_server.respond(status=200)
+
+    with pytest.raises(BatchFailed) as e:
+        send_slack_invites([TEST_EMAIL, "other@test.com", "third@test.com"])
+
+    # Every invite was still attempted, only the failed one is retried
+    assert len(fake_server.requests) == 3
+    assert list(e.value.failed) == ["other@test.com"]
+
+
+@pytest.mark.django_db
+def test_add_users_to_mailing_list_in_one_call(user: User, fake_server: FakeHTTPServer):
+    fake_server.respond(json={"total_created": 1, "error_count": 0})
+
+    add_users_to_mailing_list([user.email])
+
+    assert len(fake_server.requests) == 1
+    request = fake_server.requests[0]
+    assert request.path == f"/3.0/lists/{settings.MAILCHIMP_LIST_ID}"
+    member = request.json["members"][0]
+    assert member["email_address"] == user.email
+    assert member["merge_fields"]["FNAME"] == user.first_name
+
+
+@pytest.mark.django_db
+def test_add_users_to_mailing_list_raises_member_errors(
+    user: User, fake_server: FakeHTTPServer
+):
+    other = User.objects.create_user("other", "other@test.com")
+    existing = User.objects.create_user("existing", "existing@test.com")
+    fake_server.respond(
+        json={
+            "total_created": 1,
+            "error_count": 2,
+            "errors": [
+                {
+                    "email_address": other.email,
+                    "error": "looks fake or invalid",
+                    "error_code": "ERROR_GENERIC",
+                },
+                {
+                    "email_address": existing.email,
+                    "error": "is already a list member",
+                    "error_code": "ERROR_CONTACT_EXISTS",
+                },
+            ],
+        }
+    )
+
+    with pytest.raises(BatchFailed) as e:
+        add_users_to_mailing_list([user.email, other.email, existing.email])
+
+    assert e.value.failed == {other.email: "looks fake or invalid"}
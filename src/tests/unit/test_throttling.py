@@ -0,0 +1,127 @@
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import metrics
+from core.throttling import LoginIPRateThrottle, LoginRateThrottle
+
+factory = APIRequestFactory()
+
+
+def login_request(email: str, ip: str = "10.0.0.1", **headers) -> Request:
+    request = factory.post(
+        "/auth/login/", {"email": email}, format="json", REMOTE_ADDR=ip, **headers
+    )
+    request = Request(request)
+    request._full_data = {"email": email}
+    return request
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(mocker):
+    clock = Clock(6000.0)  # the start of a one minute window
+    mocker.patch.object(LoginRateThrottle, "timer", clock)
+    mocker.patch.dict(LoginRateThrottle.THROTTLE_RATES, {"login": "3/min"})
+    return clock
+
+
+def attempt(email: str, ip: str = "10.0.0.1") -> LoginRateThrottle:
+    throttle = LoginRateThrottle()
+    throttle.allowed = throttle.allow_request(login_request(email, ip), None)
+    return throttle
+
+
+def test_rejects_over_limit_with_wait(clock):
+    assert all(attempt("a@b.com").allowed for _ in range(3))
+
+    throttle = attempt("a@b.com")
+    assert not throttle.allowed
+    assert throttle.wait() == 60
+
+
+def test_keyed_on_ip_and_normalized_email(clock):
+    for _ in range(3):
+        attempt("a@b.com")
+
+    assert not attempt(" A@B.com ").allowed
+    assert attempt("c@d.com").allowed
+    assert attempt("a@b.com", ip="10.0.0.2").allowed
+
+
+def test_window_slides(clock):
+    for _ in range(3):
+        attempt("a@b.com")
+
+    # Half of the previous window's 3 attempts still count
+    clock.now += 90
+    assert attempt("a@b.com").allowed
+    assert attempt("a@b.com").allowed
+    throttle = attempt("a@b.com")
+    assert not throttle.allowed
+    # 3 * (30 - t) / 60 + 2 < 3 once t > 10
+    assert throttle.wait() == 10
+
+    clock.now += 11
+    assert attempt("a@b.com").allowed
+
+
+def test_counts_rejections(clock):
+    metrics.reset()
+    for _ in range(5):
+        attempt("a@b.com")
+
+    assert metrics.snapshot()["counters"]["throttle.login.rejected"] == 2
+
+
+def test_ip_throttle_ignores_email(mocker):
+    mocker.patch.dict(LoginIPRateThrottle.THROTTLE_RATES, {"login_ip": "2/min"})
+    throttle = LoginIPRateThrottle()
+
+    assert throttle.allow_request(login_request("a@b.com"), None)
+    assert throttle.allow_request(login_request("c@d.com"), None)
+    assert not throttle.allow_request(login_request("e@f.com"), None)
+
+
+@pytest.mark.parametrize(
+    "num_proxies, forwarded_for",
+    [
+        # Straight to the app: the header is ignored
+        (0, "{}"),
+        # Behind the load balancer, which appends the client's address
+        (1, "{}, 10.0.0.1"),
+    ],
+)
+def test_spoofed_forwarded_for_keeps_counting(
+    mocker, num_proxies: int, forwarded_for: str
+):
+    mocker.patch.dict(LoginIPRateThrottle.THROTTLE_RATES, {"login_ip": "2/min"})
+    rest_framework = {**settings.REST_FRAMEWORK, "NUM_PROXIES": num_proxies}
+
+    with override_settings(REST_FRAMEWORK=rest_framework):
+        allowed = [
+            LoginIPRateThrottle().allow_request(
+                login_request(
+                    "a@b.com",
+                    ip="10.0.0.1" if num_proxies == 0 else "172.16.0.5",
+                    HTTP_X_FORWARDED_FOR=forwarded_for.format(f"203.0.113.{i}"),
+                ),
+                None,
+            )
+            for i in range(3)
+        ]
+
+    assert allowed == [True, True, False]
+
+
+def test_ignores_forwarded_for_by_default():
+    assert settings.REST_FRAMEWORK["NUM_PROXIES"] == 0
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+from django.test import override_settings
+
+from core import zipcodes
+
+
+@pytest.mark.parametrize(
+    "zipcode, expected",
+    [
+        ("10001", 10001),
+        ("00501", 501),
+        (" 90210-1234 ", 90210),
+        ("9021", None),
+        ("abcde", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse(zipcode, expected):
+    assert zipcodes.parse(zipcode) == expected
+
+
+def test_centroid(zip_centroids):
+    for zipcode, centroid in zip_centroids.items():
+        assert zipcodes.centroid(zipcode) == centroid
+    assert zipcodes.centroid("10001-0001") == zip_centroids["10001"]
+    assert zipcodes.centroid("10002") is None
+    assert zipcodes.centroid("99999") is None
+    assert zipcodes.centroid("00000") is None
+
+
+def test_locate(zip_centroids):
+    assert zipcodes.locate("90210") == zip_centroids["90210"]
+    assert zipcodes.locate("12345") == (None, None)
+
+
+def test_loaded_once(zip_centroids):
+    assert zipcodes.get_index() is zipcodes.get_index()
+
+
+def test_large_index(tmp_path):
+    rng = random.Random(0)
+    centroids = {
+        zipcode: (round(rng.uniform(18, 72), 4), round(rng.uniform(-170, -65), 4))
+        for zipcode in rng.sample(range(100_000), 40_000)
+    }
+    path = tmp_path / "zip_centroids.bin"
+    assert zipcodes.write_index(path, ((z, *c) for z, c in centroids.items())) == (
+        40_000
+    )
+
+    index = zipcodes.ZipIndex(path)
+    assert len(index) == 40_000
+    # 12 bytes per zip code
+    assert path.stat().st_size == zipcodes.HEADER.size + 12 * 40_000
+    for zipcode in range(100_000):
+        expected = centroids.get(zipcode)
+        found = index.get(zipcode)
+        if expected is None:
+            assert found is None
+        else:
+            assert found == pytest.approx(expected, abs=1e-4)
+
+
+def test_without_index(tmp_path):
+    zipcodes.reset_index()
+    with override_settings(ZIP_CENTROIDS_PATH=str(tmp_path / "missing.bin")):
+        assert zipcodes.get_index() is None
+        assert zipcodes.centroid("10001") is None
+        assert zipcodes.locate("10001") is None
+    zipcodes.reset_index()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "zip_centroids.bin"
+    path.write_bytes(b"not an index")
+
+    with pytest.raises(ValueError):
+        zipcodes.ZipIndex(path)
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [b"", b"not an index", zipcodes.HEADER.pack(zipcodes.MAGIC, 1, 2) + bytes(12)],
+)
+def test_unreadable_index_is_not_used(tmp_path, caplog, contents: bytes):
+    path = tmp_path / "zip_centroids.bin"
+    path.write_bytes(contents)
+
+    zipcodes.reset_index()
+    with override_settings(ZIP_CENTROIDS_PATH=str(path)):
+        assert zipcodes.get_index() is None
+        assert zipcodes.locate("10001") is None
+    zipcodes.reset_index()
+
+    [record] = caplog.records
+    assert "Invalid zip centroids" in record.message